@@ -1,20 +1,14 @@
 #!/usr/bin/env python3
 
 from servopkg.bus import ServoBus
+from commissioning import scan_bus
 
-def scan_servos(port: str, baudrate: int, max_id: int = 20):
-    bus = ServoBus(port, baudrate)
-    sdk = bus.sdk
-    found = []
-    try:
-        for sid in range(0, max_id + 1):
-            model, comm, err = sdk.ping(sid)
-            if comm == 0 and err == 0 and model is not None:
-                print(f"Servo found at ID {sid} (model {model})")
-                found.append(sid)
-    finally:
-        bus.close()
-    return found
+def scan_servos(port: str, baudrate: int, max_id: int = 253):
+    # SYNC_READ probes + short-timeout sweep (commissioning.py); the whole ID range takes about a second
+    scan = scan_bus(port, baudrate, range(0, max_id + 1))
+    for servo in scan.servos:
+        print(f"Servo found at ID {servo.sts_id} (model {servo.model})")
+    return [servo.sts_id for servo in scan.servos]
 
 def prompt_int(prompt: str, lo: int, hi: int) -> int:
     while True:
@@ -46,7 +40,7 @@ if __name__ == "__main__":
             sdk = bus.sdk
             try:
                 for sid in ids:
-                    ok = sdk.DefineMiddle(sid)
+                    ok = sdk.SetMiddle(sid)
                     if ok:
                         print(f"✅ Midpoint defined on ID {sid}")
                     else:
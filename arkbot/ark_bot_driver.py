@@ -1,26 +1,43 @@
 # ark_bot_driver.py
 from typing import Dict, Any, List
 import math
+import os
 import time
-import threading
+
+import numpy as np
 
 from ark.system.driver.robot_driver import RobotDriver
 from ark.tools.log import log
 
 # ---- Your servo SDK ----
-from servopkg import PortHandler, sts  # expects .ReadAbsPos, ChangeMode, send_goal, ...
-# --- imports unchanged ---
-
-_TWO_PI = 2.0 * math.pi
+from servopkg import ServoBus, trace  # expects .ReadAbsPos, ChangeMode, send_goal, ...
+from servopkg import INST_NAMES, STS_ABSPOS, STS_TORQUE_ENABLE, COMM_SUCCESS
+from bus_shard import BusShard
+from joint_calibration import JointCalibration
+from joint_index import JointGroup, JointIndex
+from motion_profile import MotionProfile
+from state_snapshot import JointSample
+from trajectory import TrajectoryBuffer
+from kinematics import KinematicChain, load_urdf_joints
+from ik import IKSolver
+from recorder import Recorder
+from turn_state import TurnState
+from disk_cache import cache_dir
+
+_trace = trace.channel("driver")
 
 class ArkBotDriver(RobotDriver):
     def __init__(self, component_name: str, component_config: Dict[str, Any] = None, sim: bool = False):
         super().__init__(component_name, component_config, sim)
         rc = self.config["real_config"]
 
-        # Serial, mapping, ratios (unchanged) ...
-        self.port = rc["port"]
-        self.baud = int(rc.get("baudrate", 1_000_000))
+        # Serial receive mode for every bus: "select" sleeps on the fd instead of busy-polling
+        self.rx_mode = rc.get("rx_mode", "spin")
+
+        # Tracing: levels per subsystem (driver, port, ...), rate limit, optional background ring
+        tc = rc.get("trace", {})
+        if tc:
+            trace.configure(levels=tc.get("levels"), rate_hz=tc.get("rate_hz"), ring_size=tc.get("ring_size"))
 
         self.joint_order = list(rc["joint_order"])
         self.motor_ids   = [int(x) for x in rc["motor_ids"]]
@@ -56,6 +73,11 @@ class ArkBotDriver(RobotDriver):
             for sid in self.motor_ids
         }
 
+        # Same calibration as arrays in joint_order, for whole-vector conversions
+        self.calib = JointCalibration(self.motor_ids, self.ticks_per_turn, self.gear_ratio,
+                                      self.motor_orientations, self._home_total_ticks, self.pos_off)
+        self.index = JointIndex(self.joint_order, self.motor_ids, self.config.get("joint_groups", {}))
+
         # Motion defaults
         self.speed_default = int(rc.get("speed_default", 133))
         self.acc_default   = int(rc.get("acc_default", 50))
@@ -63,152 +85,365 @@ class ArkBotDriver(RobotDriver):
         self._speed_min = int(rc.get("speed_min", 1))
         self._speed_max = int(rc.get("speed_max", 4095))    
 
-        # SDK + threading
-        self._port = PortHandler(self.port)
-        if not self._port.openPort():
-            raise RuntimeError(f"Failed to open port {self.port}")
-        if not self._port.setBaudRate(self.baud):
-            raise RuntimeError(f"Failed to set baudrate {self.baud}")
-        self._pkt = sts(self._port)
-
-        self._comm_lock = threading.Lock()
-        self._goals_ticks: Dict[int, int] = {}
-        self._events: Dict[int, threading.Event] = {}
-        self._stop = threading.Event()
+        # Per-joint speed/acc caps (motor_speeds / motor_accs / gripper override the defaults);
+        # group commands are scaled so every joint arrives together (motion_profile: "fixed" = always the caps)
+        self.motion = MotionProfile.from_config(rc, self.motor_ids, self.gear_ratio)
+
+        # State is read as one block 56..70 (pos, speed, load, voltage, temp, moving, abs pos, current)
+        # per servo; bulk_read fetches every servo's block with a single SYNC_READ broadcast.
+        self.bulk_read = bool(rc.get("bulk_read", False))
+
+        # Background poller: read the bus at poll_hz into a snapshot that reads return immediately.
+        # 0 keeps the old behaviour of reading the bus on every call.
+        self.poll_hz = float(rc.get("poll_hz", 0.0))
+
+        # Streamed trajectories are buffered here and interpolated by the bus threads at trajectory_hz
+        self.trajectory = TrajectoryBuffer(len(self.motor_ids), int(rc.get("trajectory_capacity", 1024)))
+        self.trajectory_hz = float(rc.get("trajectory_hz", 100.0))
+
+        # Cartesian commands: native IK on the URDF chain, one solver per end-effector link, built on first use
+        self._ik_options = dict(rc.get("ik", {}))
+        self._ik: Dict[int, Any] = {}
+
+        # Buses: each adapter gets its own port, baud and motor_ids subset, and its own I/O thread.
+        # Without a "buses" list, port/baudrate/motor_ids describe the single bus.
+        bus_cfgs = rc.get("buses") or [{"port": rc["port"], "baudrate": rc.get("baudrate", 1_000_000),
+                                        "motor_ids": self.motor_ids}]
+        wired = [int(sid) for bc in bus_cfgs for sid in bc["motor_ids"]]
+        if sorted(wired) != sorted(self.motor_ids):
+            raise ValueError(f"real_config.buses must list every motor id exactly once; got {wired}, expected {self.motor_ids}")
+
+        # Goal dedup per servo: skip goals within deadband ticks of the last one sent, unless the
+        # speed/acc changed (fixed profile only; the synchronized one recomputes them from the
+        # remaining distance every command); re-send the last goal to any servo that heard
+        # nothing for command_keepalive_s
+        deadband = int(rc.get("command_deadband_ticks", 0))
+        keepalive = float(rc.get("command_keepalive_s", 0.0))
+
+        self.buses: List[ServoBus] = []
+        self.shards: List[BusShard] = []
+        self._shard_of: Dict[int, BusShard] = {}
+        slot_of_sid = {sid: i for i, sid in enumerate(self.motor_ids)}
+        try:
+            for bc in bus_cfgs:
+                bus = self._open_bus(bc, rc)
+                self.buses.append(bus)
+                shard = BusShard(bus, [slot_of_sid[sid] for sid in bus.motor_ids], self.calib,
+                                 self.bulk_read, self.poll_hz, self.speed_for, self.acc_for,
+                                 self.trajectory, self.trajectory_hz, deadband, keepalive,
+                                 not self.motion.synchronized)
+                self.shards.append(shard)
+                for sid in bus.motor_ids:
+                    self._shard_of[sid] = shard
+        except Exception:
+            for bus in self.buses:
+                bus.close()
+            raise
 
         # Seed from current absolute tick and init loop counters
-        self._previous_ticks: Dict[int, int] = {}
-        self._loop_count: Dict[int, int] = {}
-
-        for sid in self.motor_ids:
-            with self._comm_lock:
-                self._pkt.ChangeMode(sid, 0)     # position mode
-                self._pkt.ChangeMaxLimit(sid, 0) # disable limits if 0 means “none” in your SDK
-                self._pkt.ChangeMinLimit(sid, 0)
-
-            cur_ticks = self._safe_read_abs_pos(sid)
-            self._goals_ticks[sid] = cur_ticks
-
-            # Initialize loop counters relative to current tick
-            self._previous_ticks[sid] = cur_ticks
-            self._loop_count[sid] = self.home_loops.get(sid, 0)
-
-            self._events[sid] = threading.Event()
-
-        # Workers
-        self._workers = []
-        for sid in self.motor_ids:
-            t = threading.Thread(target=self._motor_worker, args=(sid,), daemon=True, name=f"motor-{sid}")
-            t.start()
-            self._workers.append(t)
-
-        log.info(f"[{component_name}] ArkBotDriver initialised on {self.port} @ {self.baud}")
+        start_ticks = []
+        try:
+            # position mode, limits 0/0 (multi-turn); one EEPROM read per bus, writes only where they differ
+            for bus in self.buses:
+                with bus.lock:
+                    errors = bus.sdk.ConfigureEproms({sid: {"mode": 0, "min_limit": 0, "max_limit": 0}
+                                                      for sid in bus.motor_ids})
+                for sid, error in errors.items():
+                    if error:
+                        log.warn(f"ArkBotDriver servo {sid}: {error}")
+
+            for sid in self.motor_ids:
+                start_ticks.append(self._safe_read_abs_pos(sid))
+        except Exception:
+            for bus in self.buses:
+                bus.close()
+            raise
+
+        # Loop counters: from the persisted turn state where it still matches the servos, else home_loops
+        home_loops = [self.home_loops.get(sid, 0) for sid in self.motor_ids]
+        self.turn_state = None
+        ts = rc.get("turn_state", {})
+        if ts is not False:
+            ts = dict(ts or {})
+            path = os.path.expanduser(ts.get("path") or os.path.join(cache_dir(), f"{component_name}-turns.json"))
+            self.turn_state = TurnState(path, self.motor_ids, self.ticks_per_turn, int(ts.get("max_drift_ticks", 1024)))
+            loops, restored = self.turn_state.restore(start_ticks, home_loops)
+            if restored.any():
+                log.info(f"ArkBotDriver turn counts restored from {path} for {np.asarray(self.motor_ids)[restored].tolist()}")
+            home_loops = loops
+        self.calib.seed(start_ticks, home_loops)
+
+        # Optional joint-state / goal recording from the bus threads (see recorder.py)
+        self.recorder = None
+        record = rc.get("record")
+        if record:
+            record = dict(record)
+            self.start_recording(record.pop("path"), **record)
+
+        # One thread per bus sends goals and (with poll_hz) polls that bus's joints
+        for shard in self.shards:
+            shard.poll_once()
+            shard.start()
+        if self.turn_state is not None:
+            self.turn_state.start(self._total_ticks, float(ts.get("interval", 0.5)))
+
+        ports = ", ".join(f"{bus.port_name} @ {bus.baudrate} {bus.motor_ids}" for bus in self.buses)
+        log.info(f"[{component_name}] ArkBotDriver initialised on {ports}")
 
     # ---------------- driver API ----------------
 
     def pass_joint_positions(self, joints: List[str]) -> Dict[str, float]:
-        out: Dict[str, float] = {}
-        half = self.ticks_per_turn // 2
-        for jname in joints:
-            sid   = self._sid_from_joint(jname)
-            ticks = self._safe_read_abs_pos(sid)
-
-            raw = ticks - self._previous_ticks[sid]
-            if   raw >  half: self._loop_count[sid] -= 1   # wrapped 4095->0
-            elif raw < -half: self._loop_count[sid] += 1   # wrapped 0->4095
-            self._previous_ticks[sid] = ticks
-
-            total_ticks = self._loop_count[sid] * self.ticks_per_turn + ticks
-            home_total  = self._home_total_ticks.get(sid, 0)
-            gear        = self.gear_ratio.get(sid, 1.0)
-            pos_offset  = self.pos_off.get(sid, 0.0)
-
-            angle = ((total_ticks - home_total) / (self.ticks_per_turn * gear)) * _TWO_PI
-            out[jname] = angle - pos_offset
-            # print(f"[sid {sid}] ticks={ticks} loops={self._loop_count[sid]} total={total_ticks} -> {out[jname]:.3f} rad")
+        angles = self.pass_joint_position_array(self.index.lookup(joints))
+        return dict(zip(joints, angles.tolist()))
 
-        return out
+    def pass_joint_position_array(self, group: JointGroup = None) -> np.ndarray:
+        """Joint angles for ``group`` (default: every joint, in joint_order) as one array."""
+        positions = self.get_latest_state().positions
+        return positions if group is None else positions[group.slots]
 
+    def pass_joint_velocities(self, joints: List[str]) -> Dict[str, float]:
+        velocities = self.get_latest_state().velocities[self.index.lookup(joints).slots]
+        return dict(zip(joints, velocities.tolist()))
+
+    def pass_joint_efforts(self, joints: List[str]) -> Dict[str, float]:
+        """Signed servo load as a fraction of its maximum torque (-1..1)."""
+        efforts = self.get_latest_state().efforts()[self.index.lookup(joints).slots]
+        return dict(zip(joints, efforts.tolist()))
+
+    def check_torque_status(self, joints: List[str]) -> Dict[str, bool]:
+        """Whether each joint's servo has torque enabled; joints that do not answer are left out."""
+        out: Dict[str, bool] = {}
+        group = self.index.lookup(joints)
+        for jname, sid in zip(group.joints, group.motor_ids):
+            bus = self._shard_of[sid].bus
+            with bus.lock:
+                enabled, result, error = bus.sdk.read1ByteTxRx(sid, STS_TORQUE_ENABLE)
+            if result == COMM_SUCCESS:
+                out[jname] = bool(enabled)
+        return out
 
     def pass_joint_group_control_cmd(self, control_mode: str, cmd: Dict[str, float], **kwargs) -> None:
-        group = kwargs.get("group_name", "arm")
+        group = self.index.lookup(cmd.keys())
+        angles = np.fromiter(cmd.values(), float, len(cmd))
+        self._command_positions(control_mode, group, angles, kwargs.get("group_name", "arm"))
+
+    def pass_joint_group_position_array(self, group_name: str, angles: np.ndarray, control_mode: str = None) -> None:
+        """Command a configured joint group with angles in the group's joint order."""
+        group = self.index.group(group_name)
+        self._command_positions(control_mode or group.control_mode, group, angles, group_name)
+
+    def _command_positions(self, control_mode: str, group: JointGroup, angles: np.ndarray, group_name: str) -> None:
         if control_mode != "position":
-            log.warn(f"Only position mode is implemented; ignoring control_mode={control_mode} for group {group}")
+            log.warn(f"Only position mode is implemented; ignoring control_mode={control_mode} for group {group_name}")
             return
 
-        for jname, target_rad in cmd.items():
-            sid = self._sid_from_joint(jname)
-            goal_total = self._angle_rad_to_total_ticks(sid, float(target_rad))
-            
-            self._goals_ticks[sid] = int(round(goal_total))
-            self._events[sid].set()
+        # a direct command on a joint takes it over from a running trajectory
+        if self.trajectory.active and np.isin(group.slots, self.trajectory.slots).any():
+            self.trajectory.clear()
+
+        if self.motion.synchronized and self.poll_hz <= 0:
+            # nothing keeps the snapshots current: profile from where the joints are now
+            for shard in {self._shard_of[sid] for sid in group.motor_ids}:
+                shard.poll_once()
+        goal_total = np.rint(self.calib.rad_to_ticks(angles, group.slots))
+        speeds, accs = self.motion.profile(group.slots, self._total_ticks()[group.slots], goal_total)
+        goal_ticks = goal_total.astype(np.int64).tolist()
+
+        by_shard: Dict[BusShard, Dict[int, tuple]] = {}
+        for sid, goal, speed, acc in zip(group.motor_ids, goal_ticks, speeds.tolist(), accs.tolist()):
+            by_shard.setdefault(self._shard_of[sid], {})[sid] = (goal, speed, acc)
+
+        if _trace.isEnabled(trace.DEBUG):
+            # one rate-limited line per command, not one per joint
+            _trace.debug("%s: sids %s -> goals %s speeds %s accs %s", group_name, group.motor_ids,
+                         goal_ticks, speeds.tolist(), accs.tolist())
+
+        for shard, goals in by_shard.items():
+            shard.submit(goals)
+
+    def push_trajectory(self, group_name: str, times, positions, interpolation: str = "min_jerk",
+                        append: bool = False) -> None:
+        """Stream waypoints for a joint group; the bus threads interpolate them at trajectory_hz.
+
+        ``times`` are seconds from now (or, with ``append``, from the start of the running
+        trajectory) and ``positions`` is len(times) x len(group) in the group's joint order.
+        A fresh trajectory starts from the measured joint positions (in the command frame,
+        see command_positions); appended batches replace any buffered waypoints from their
+        first time onwards.
+        """
+        self._push_trajectory(self.index.group(group_name), times, positions, interpolation, append)
+
+    def _push_trajectory(self, group: JointGroup, times, positions, interpolation: str, append: bool) -> None:
+        times = np.asarray(times, dtype=float)
+        if append and self.trajectory.active:
+            self.trajectory.push(group.slots, self.trajectory.start_time + times, positions, interpolation)
+        else:
+            now = time.monotonic()
+            self.trajectory.push(group.slots, now + times, positions, interpolation,
+                                 start=(now, self.command_positions()))
+        for shard in self.shards:
+            shard.wake()
+
+    def pass_cartesian_control_cmd(self, control_mode: str, position, quaternion, end_effector_idx: int = None,
+                                   gripper: float = None, **kwargs) -> None:
+        """Move the end-effector link to ``position`` and (x, y, z, w) ``quaternion`` (base frame) via IK,
+        starting the solver from the current joint positions. ``gripper`` goes to the "gripper" joint
+        group as a joint target, in that group's control_mode."""
+        solver, group = self._ik_for(end_effector_idx)
+        angles, ok = solver.solve(position, quaternion, seed=self.command_positions()[group.slots])
+        if not ok:
+            _trace.warn("IK did not converge for position=%s quaternion=%s; command dropped", position, quaternion)
+            return
+        self._command_positions(control_mode, group, angles, "cartesian")
+        if gripper is not None and "gripper" in self.index.groups:
+            g = self.index.group("gripper")
+            if g.control_mode != "position":
+                _trace.warn("gripper=%s ignored: the gripper group is in %s mode, only position is implemented",
+                            gripper, g.control_mode)
+            else:
+                self._command_positions(g.control_mode, g, np.full(len(g.joints), float(gripper)), "gripper")
+
+    def pass_cartesian_trajectory(self, times, positions, quaternions=None, end_effector_idx: int = None,
+                                  interpolation: str = "min_jerk", append: bool = False) -> np.ndarray:
+        """Solve a whole end-effector path (each pose warm-started from the previous one) and stream
+        it as a joint trajectory; see push_trajectory for ``times``. Returns the joint angles."""
+        solver, group = self._ik_for(end_effector_idx)
+        # a fresh path starts from where the joints are; an appended one continues from the buffered path
+        seed = None if append and self.trajectory.active else self.command_positions()[group.slots]
+        angles, ok = solver.solve_path(positions, quaternions, seed=seed)
+        if not ok.all():
+            raise ValueError(f"IK did not converge for waypoints {np.flatnonzero(~ok).tolist()}")
+        self._push_trajectory(group, times, angles, interpolation, append)
+        return angles
+
+    def get_latest_state(self) -> JointSample:
+        """Freshest joint sample (a copy, in joint_order), merged across buses and stamped with
+        the oldest bus read; polls the buses first if the poller is off."""
+        if self.poll_hz <= 0:
+            for shard in self.shards:
+                shard.poll_once()
+        if len(self.shards) == 1:
+            return self.shards[0].state.read()
+        return JointSample.merge(len(self.motor_ids), ((shard.slots, shard.state.read()) for shard in self.shards))
+
+    def command_positions(self) -> np.ndarray:
+        """Latest measured pose of every joint in the frame commands are given in. Measured angles
+        (get_latest_state) leave motor orientation out, as they always have, so on orientation -1
+        joints they are mirrored relative to what pass_joint_group_* expects."""
+        return self.calib.ticks_to_command_rad(self.get_latest_state().ticks)
+
+    def _total_ticks(self) -> np.ndarray:
+        """Unwrapped ticks of every joint from the latest snapshots, without touching the bus."""
+        out = np.empty(len(self.motor_ids))
+        for shard in self.shards:
+            out[shard.slots] = shard.state.read().ticks
+        return out
 
-            # Debug:
-            print(f"[sid {sid}] θ={target_rad:.3f} rad -> total={goal_total:.1f} ticks -> send={goal_total}")
+    def bus_health(self) -> Dict[str, Any]:
+        """Per-bus counters and latency histograms (servopkg.BusStats), keyed by port; servo
+        counters are keyed by joint name."""
+        names = dict(zip(self.motor_ids, self.joint_order))
+        out = {}
+        for shard in self.shards:
+            bus = shard.bus
+            stats = bus.getStats()
+            stats["servos"] = {names.get(sid, str(sid)): counts for sid, counts in stats["servos"].items()}
+            stats["commands"] = dict(shard.commands.stats)  # goals requested / sent / suppressed by the dedup
+            out[bus.port_name] = stats
+        return out
 
-        time.sleep(0.001)
+    def reset_bus_health(self):
+        for bus in self.buses:
+            bus.port.stats.reset()
 
     # ---------------- helpers ----------------
 
-    def _angle_rad_to_total_ticks(self, sid: int, angle_rad: float) -> float:
-        """goal_total_ticks = home_total_ticks + angle_rad * (ticks_per_turn / 2π) * gear_ratio - (pos_offset in ticks)"""
-        gear = float(self.gear_ratio.get(sid, 1.0))
-        home_total = float(self._home_total_ticks.get(sid, 0))
-        pos_offset = float(self.pos_off.get(sid, 0.0))
-        ori = self.motor_orientations.get(sid, 1)
-        motor_mech_angle = (angle_rad + pos_offset) * float(ori)
-        # desired mechanical angle *from home*, expressed in ticks on the *motor* side
-        mech_ticks = (motor_mech_angle * (self.ticks_per_turn / _TWO_PI)) * gear
-        return home_total + mech_ticks
-
-    def _safe_read_abs_pos(self, sid: int) -> int:
-        with self._comm_lock:
-            val = self._pkt.ReadAbsPos(sid)
-        return 0 if val is None else int(val)
-
-    def _sid_from_joint(self, joint_name: str) -> int:
-        try:
-            idx = self.joint_order.index(joint_name)
-        except ValueError:
-            raise KeyError(f"Unknown joint name '{joint_name}'. Check real_config.joint_order.")
-        return self.motor_ids[idx]
+    def _open_bus(self, bc: Dict[str, Any], rc: Dict[str, Any]) -> ServoBus:
+        """Open one adapter; rx_mode and the latency settings default to the real_config values."""
+        bus = ServoBus(bc["port"], int(bc.get("baudrate", rc.get("baudrate", 1_000_000))),
+                       bc["motor_ids"], bc.get("rx_mode", self.rx_mode))
+        port = bus.port
+
+        # Reply timeouts: latency allowance on top of wire time, per port and per instruction,
+        # optionally shrunk to what the bus actually needs (adaptive_latency)
+        latency_ms = bc.get("latency_ms", rc.get("latency_ms"))
+        if latency_ms is not None:
+            port.setLatencyTimer(float(latency_ms))
+        for name, msec in bc.get("latency_ms_by_instruction", rc.get("latency_ms_by_instruction", {})).items():
+            if name not in INST_NAMES:
+                bus.close()
+                raise KeyError(f"Unknown instruction '{name}' in real_config.latency_ms_by_instruction, expected one of {sorted(INST_NAMES)}")
+            port.setLatencyTimer(float(msec), INST_NAMES[name])
+        port.setAdaptiveLatency(bc.get("adaptive_latency", rc.get("adaptive_latency", False)))
+        return bus
+
+    def _ik_for(self, end_effector_idx: int = None):
+        """(IKSolver, JointGroup) for the chain ending at URDF link index ``end_effector_idx``
+        (PyBullet numbering: link i is the child of the i-th joint)."""
+        idx = int(self.config.get("ee_index", 5) if end_effector_idx is None else end_effector_idx)
+        entry = self._ik.get(idx)
+        if entry is None:
+            urdf_path = self.config.get("urdf_path", "ark_bot.urdf")
+            if not os.path.isabs(urdf_path) and not os.path.exists(urdf_path):
+                urdf_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), urdf_path)
+            joints = load_urdf_joints(urdf_path)  # parsed once per URDF content, then cached
+            chain = KinematicChain(joints, joints[idx].child)
+            entry = self._ik[idx] = (IKSolver(chain, **self._ik_options), self.index.lookup(chain.joint_names))
+        return entry
+
+    def _safe_read_abs_pos(self, sid: int, attempts: int = 3) -> int:
+        """Absolute tick of ``sid``; a servo that never answers is an error, not tick 0."""
+        bus = self._shard_of[sid].bus
+        for _ in range(attempts):
+            with bus.lock:
+                val, result, error = bus.sdk.read2ByteTxRx(sid, STS_ABSPOS)
+            if result == COMM_SUCCESS and error == 0:
+                return int(val)
+            _trace.warn("[sid %d] absolute position read failed: %s %s", sid,
+                        bus.sdk.getTxRxResult(result), bus.sdk.getRxPacketError(error))
+        raise RuntimeError(f"Servo {sid} on {bus.port_name} did not report its position "
+                           f"({bus.sdk.getTxRxResult(result)}); counters: {bus.port.stats.servos.get(sid, {})}")
 
     def speed_for(self, sid:int) -> int:
-        gear = float(self.gear_ratio.get(sid, 1.0))
-        spd = int(round(self.speed_default) * gear )
-        return max(self._speed_min, min(self._speed_max, spd))
-
-    # Worker unchanged (still sends 0..4095 goals)
-    def _motor_worker(self, sid: int):
-        last_sent = None
-        while not self._stop.is_set():
-            ev = self._events[sid]
-            ev.wait(timeout=0.25)
-            if self._stop.is_set(): break
-            if ev.is_set():
-                goal_total = self._goals_ticks[sid]
-                ev.clear()
-                if goal_total != last_sent:
-                    with self._comm_lock:
-                        speed = self.speed_for(sid)
-                        self._pkt.send_goal(sid, int(goal_total), speed, self.acc_default)
-                    last_sent = goal_total
+        return self.motion.speed_for[sid]
+
+    def acc_for(self, sid:int) -> int:
+        return self.motion.acc_for[sid]
+
+    # ---------------- recording ----------------
+
+    def start_recording(self, path: str, chunk_rows: int = 4096, flush_interval: float = 0.5) -> Recorder:
+        """Log every poll and every goal write of every bus to the directory ``path`` until stop_recording()."""
+        self.stop_recording()
+        path = time.strftime(os.path.expanduser(path))  # e.g. "~/arkbot-logs/%Y%m%d-%H%M%S"
+        self.recorder = Recorder(path, self.joint_order, self.motor_ids, chunk_rows, flush_interval)
+        for shard in self.shards:
+            shard.recorder = self.recorder
+        log.info(f"ArkBotDriver recording to {path}")
+        return self.recorder
+
+    def stop_recording(self):
+        recorder, self.recorder = self.recorder, None
+        if recorder is None:
+            return
+        for shard in self.shards:
+            shard.recorder = None
+        recorder.close()
+        log.info(f"ArkBotDriver recording {recorder.path} closed: {recorder.state.rows} states, "
+                 f"{recorder.goals.rows} goal writes")
 
     def shutdown_driver(self):
-        self._stop.set()
-        for ev in self._events.values():
-            ev.set()
-        time.sleep(0.1)
-        try: self._port.closePort()
-        except Exception: pass
+        for shard in self.shards:
+            shard.stop()
+        if self.turn_state is not None:
+            self.turn_state.stop()
+        self.stop_recording()
+        for bus in self.buses:
+            log.info(f"ArkBotDriver bus {bus.port_name} timing: {bus.port.getTimingStats()}")
+            summary = bus.port.stats.snapshot()
+            log.info(f"ArkBotDriver bus {bus.port_name} health: {summary['transactions']}, "
+                     f"lock wait p99 {summary['lock_wait_us']['p99']} us")
+        trace.stop()
+        for bus in self.buses:
+            bus.close()
         log.info("ArkBotDriver shutdown complete")
-
-    def pass_joint_velocities(self, joints: List[str]) -> Dict[str, float]:
-        raise NotImplementedError
-
-    def pass_joint_efforts(self, joints: List[str]) -> Dict[str, float]:
-        raise NotImplementedError
-
-    def check_torque_status(self, joints: List[str]) -> Dict[str, float]:
-        raise NotImplementedError
-
@@ -1,5 +1,6 @@
 from typing import Any, Dict
 from dataclasses import dataclass
+import json
 from enum import Enum
 import numpy as np
 
@@ -8,8 +9,11 @@ from ark.system.component.robot import Robot
 from ark.system.driver.robot_driver import RobotDriver
 from ark.system.pybullet.pybullet_robot_driver import BulletRobotDriver
 from ark.tools.log import log
-from arktypes import joint_state_t, joint_group_command_t, task_space_command_t
+from arktypes import joint_state_t, joint_group_command_t, task_space_command_t, string_t
 from arktypes.utils import unpack
+from servopkg import trace
+
+_trace = trace.channel("arkbot")
 
 
 
@@ -29,28 +33,49 @@ class ArkBot(Robot):
     
         self.joint_group_command_ch = f"{self.name}/joint_group_command"
         self.cartesian_position_control_ch = f"{self.name}/cartesian_command"
+        self.joint_trajectory_ch = f"{self.name}/joint_trajectory"
         if self.sim:
             self.joint_group_command_ch += "/sim"
             self.cartesian_position_control_ch += "/sim"
+            self.joint_trajectory_ch += "/sim"
        
         self.create_subscriber(self.joint_group_command_ch, joint_group_command_t, self._joint_group_command_cb)
         self.create_subscriber(self.cartesian_position_control_ch, task_space_command_t, self._cartesian_position_cb)
+        # waypoint batches ride in joint_group_command_t: cmd is row-major [t, q1..qn] per waypoint,
+        # name is "group[:interpolation][:append]"
+        self.create_subscriber(self.joint_trajectory_ch, joint_group_command_t, self._joint_trajectory_cb)
         
         self.joint_states_pub = f"{self.name}/joint_states" + ("/sim" if self.sim else "")
         self.component_channels_init({ self.joint_states_pub: joint_state_t })
 
+        # Bus health (servopkg.BusStats per bus) as JSON at a low rate; real robot only
+        health_hz = float(self.config.get("real_config", {}).get("bus_health_hz", 0))
+        if not self.sim and health_hz > 0:
+            self.bus_health_ch = f"{self.name}/bus_health"
+            self._bus_health_pub = self.create_publisher(self.bus_health_ch, string_t)
+            self.create_stepper(health_hz, self._publish_bus_health)
+
         self.joint_group_command = None
         self.cartesian_position_control_command = None
 
+        # joint_state_t reused between publishes; rebuilt only if the joint set changes
+        self._joint_state_msg = None
+        self._joint_state_names = None
+
     def control_robot(self):
         if self.joint_group_command:
-            print(self.joint_group_command)
+            _trace.debug("joint group command %s", self.joint_group_command)
             group_name = self.joint_group_command["name"]
-            ordered_names = list(self.joint_groups[group_name]["joints"])
             ordered_vals = self.joint_group_command["cmd"]
-            cmd_dict = dict(zip(ordered_names, ordered_vals))
-            control_mode = self.joint_groups[group_name]["control_mode"]
-            self.control_joint_group(control_mode=control_mode, cmd=cmd_dict)
+            if self.sim:
+                ordered_names = list(self.joint_groups[group_name]["joints"])
+                cmd_dict = dict(zip(ordered_names, ordered_vals))
+                control_mode = self.joint_groups[group_name]["control_mode"]
+                self.control_joint_group(control_mode=control_mode, cmd=cmd_dict)
+            else:
+                # real driver resolves the group to motor slots once at startup and
+                # converts the whole command in one vectorized call
+                self._driver.pass_joint_group_position_array(group_name, np.asarray(ordered_vals, dtype=float))
             self.joint_group_command = None
 
         if self.cartesian_position_control_command:
@@ -67,26 +92,65 @@ class ArkBot(Robot):
             self.cartesian_position_control_command = None
 
     def get_state(self) -> Dict[str, Any]:
-        joints = self.get_joint_positions()
-        return {"joint_positions": joints}
+        if self.sim:
+            joints = self.get_joint_positions()
+            positions = np.fromiter(joints.values(), dtype=float, count=len(joints))
+            return {"joint_names": tuple(joints.keys()), "joint_positions": positions,
+                    "joint_velocities": None, "joint_efforts": None, "age": 0.0}
+        # served from the driver's poller snapshot, no bus I/O on the publish path
+        sample = self._driver.get_latest_state()
+        return {"joint_names": self._driver.index.names, "joint_positions": sample.positions,
+                "joint_velocities": sample.velocities, "joint_efforts": sample.efforts(),
+                "joint_temperatures": sample.temperatures, "age": sample.age()}
 
     def pack_data(self, state: Dict[str, Any]) -> Dict[str, Any]:
-        joint_state = state["joint_positions"]
+        names = state["joint_names"]
+        positions = state["joint_positions"]
+        _trace.trace("joint state age %.1f ms", state["age"] * 1000.0)
+
+        msg = self._joint_state_msg
+        if msg is None or names != self._joint_state_names:
+            msg = self._joint_state_msg = joint_state_t()
+            self._joint_state_names = names
+            msg.n = len(names)
+            msg.name = list(names)
+            msg.position = [0.0] * msg.n
+            msg.velocity = [0.0] * msg.n
+            msg.effort   = [0.0] * msg.n
+        msg.position[:] = positions.tolist()
+        # servos that missed this poll report NaN; publish 0.0 for them
+        if state["joint_velocities"] is not None:
+            msg.velocity[:] = np.nan_to_num(state["joint_velocities"]).tolist()
+        if state["joint_efforts"] is not None:
+            msg.effort[:] = np.nan_to_num(state["joint_efforts"]).tolist()
 
-        msg = joint_state_t()
-        msg.n = len(joint_state)
-        msg.name = list(joint_state.keys())
-        msg.position = list(joint_state.values())
-        msg.velocity = [0.0] * msg.n
-        msg.effort   = [0.0] * msg.n
-
-        # print(joint_state)
         return { self.joint_states_pub: msg }
 
+    def _publish_bus_health(self):
+        msg = string_t()
+        msg.data = json.dumps(self._driver.bus_health())
+        self._bus_health_pub.publish(msg)
+
     def _joint_group_command_cb(self, t, ch, msg):
         cmd, name = unpack.joint_group_command(msg)
         self.joint_group_command = {"cmd": cmd, "name": name}
 
+    def _joint_trajectory_cb(self, t, ch, msg):
+        cmd, name = unpack.joint_group_command(msg)
+        if self.sim:
+            log.warn(f"[{self.name}] joint trajectories are only interpolated by the real driver; ignoring")
+            return
+        group_name, *options = name.split(":")
+        interpolation = next((opt for opt in options if opt != "append"), "min_jerk")
+        # handed straight to the driver so back-to-back batches are never dropped between control ticks
+        try:
+            n = len(self.joint_groups[group_name]["joints"])
+            waypoints = np.asarray(cmd, dtype=float).reshape(-1, n + 1)
+            self._driver.push_trajectory(group_name, waypoints[:, 0], waypoints[:, 1:],
+                                         interpolation, append="append" in options)
+        except (KeyError, ValueError) as e:
+            log.warn(f"[{self.name}] rejected trajectory for {group_name}: {e}")
+
     def _cartesian_position_cb(self, t, ch, msg):
         name, position, quaternion, gripper = unpack.task_space_command(msg)
         self.cartesian_position_control_command = {
@@ -0,0 +1,179 @@
+# bus_shard.py
+from typing import Callable, Dict
+import threading
+import time
+
+import numpy as np
+
+from servopkg import COMM_SUCCESS, ServoBus, trace
+from command_cache import Command, CommandCache
+from joint_calibration import JointCalibration
+from state_snapshot import StateSnapshot
+from trajectory import TrajectoryBuffer
+
+_trace = trace.channel("driver")
+
+
+class BusShard:
+    """The joints wired to one ServoBus, and the thread that owns that bus.
+
+    The thread sends pending goals as one SYNC_WRITE as soon as they arrive,
+    samples a running trajectory every 1/trajectory_hz into one SYNC_WRITE per
+    tick and, with poll_hz > 0, polls the shard's joints into its own snapshot.
+    Shards on different adapters run fully in parallel; the driver merges their
+    snapshots.
+    """
+
+    def __init__(self, bus: ServoBus, slots, calib: JointCalibration, bulk_read: bool, poll_hz: float,
+                 speed_for: Callable[[int], int], acc_for: Callable[[int], int],
+                 trajectory: TrajectoryBuffer = None, trajectory_hz: float = 100.0,
+                 deadband: int = 0, keepalive: float = 0.0, compare_speed: bool = True):
+        self.bus = bus
+        self.slots = np.asarray(slots, dtype=np.intp)
+        self.calib = calib
+        self.bulk_read = bulk_read
+        self.poll_hz = poll_hz
+        self.speed_for = speed_for
+        self.acc_for = acc_for
+
+        self.state = StateSnapshot(len(self.slots))
+        # StateSnapshot and the calibration's unwrap state take one writer at a time; with poll_hz 0
+        # get_latest_state polls from whichever thread asks
+        self._poll_lock = threading.Lock()
+
+        self._goal_lock = threading.Lock()
+        self._pending_goals: Dict[int, Command] = {}
+        self.commands = CommandCache(deadband, keepalive, compare_speed)  # last command per servo, only touched by the thread
+        self._goal_event = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+        self.trajectory = trajectory
+        self.trajectory_hz = trajectory_hz
+        self._traj_done_gen = -1   # generation whose final waypoint this shard already sent
+        self._traj_next = None     # next tick while a trajectory is running
+
+        self.recorder = None  # recorder.Recorder while the driver is recording
+
+    @property
+    def motor_ids(self):
+        return self.bus.motor_ids
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._worker, daemon=True, name=f"arkbot-bus:{self.bus.port_name}")
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._goal_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+
+    def submit(self, goals: Dict[int, Command]) -> None:
+        """Queue {sid: (goal ticks, speed, acc)} for the thread's next SYNC_WRITE."""
+        with self._goal_lock:
+            self._pending_goals.update(goals)
+        self._goal_event.set()
+
+    def wake(self) -> None:
+        """Have the thread look at the trajectory buffer now rather than at its next deadline."""
+        self._goal_event.set()
+
+    def poll_once(self) -> None:
+        with self._poll_lock:
+            self._poll()
+
+    def _poll(self) -> None:
+        statuses = self.bus.readStatus(self.bulk_read)
+        stamp = time.monotonic()
+        calib, slots = self.calib, self.slots
+
+        # a servo that did not answer keeps its last tick, so the unwrap sees no motion
+        ticks = [calib.previous[slot] if st is None else st.abs_position for slot, st in zip(slots, statuses)]
+        sample = self.state.back()
+        sample.ticks[:] = calib.unwrap(ticks, slots)
+        sample.positions[:] = calib.ticks_to_rad(sample.ticks, slots)
+        sample.comm[:] = self.bus.last_comm
+        for i, st in enumerate(statuses):
+            if st is None:
+                sample.velocities[i] = sample.loads[i] = sample.voltages[i] = np.nan
+                sample.temperatures[i] = sample.currents[i] = sample.moving[i] = np.nan
+            else:
+                sample.velocities[i] = st.speed * calib.rad_per_tick[slots[i]]
+                sample.loads[i] = st.load
+                sample.voltages[i] = st.voltage * 0.1
+                sample.temperatures[i] = st.temperature
+                sample.currents[i] = st.current
+                sample.moving[i] = st.moving
+        sample.stamp = stamp
+        self.state.publish()
+        recorder = self.recorder
+        if recorder is not None:
+            recorder.record_state(slots, sample, [np.nan if st is None else st.abs_position for st in statuses])
+
+    def _write_goals(self, goals: Dict[int, int]) -> None:
+        """One SYNC_WRITE of {sid: goal ticks} at each servo's speed/acc cap, leaving out servos it would not change."""
+        speed_for, acc_for = self.speed_for, self.acc_for
+        self._write(self.commands.filter({sid: (goal, speed_for(sid), acc_for(sid)) for sid, goal in goals.items()}))
+
+    def _write(self, writes) -> None:
+        if not writes:
+            return
+        result = self.bus.writeGoals(writes)
+        self.commands.sent(writes, time.monotonic(), result == COMM_SUCCESS)
+        recorder = self.recorder
+        if recorder is not None:
+            recorder.record_goals(writes, result)
+
+    def _send_goals(self) -> None:
+        self._goal_event.clear()
+        with self._goal_lock:
+            pending, self._pending_goals = self._pending_goals, {}
+        if pending:
+            self._write(self.commands.filter(pending))
+
+    def _trajectory_tick(self, now: float) -> None:
+        traj = self.trajectory
+        positions, done, gen = traj.sample(now)
+        if positions is None or gen == self._traj_done_gen:
+            self._traj_next = None
+            return
+        mine = np.isin(traj.slots, self.slots)
+        if mine.any():
+            slots = traj.slots[mine]
+            goals = np.rint(self.calib.rad_to_ticks(positions[mine], slots)).astype(np.int64).tolist()
+            sids = [self.calib.motor_ids[slot] for slot in slots.tolist()]
+            self._write_goals(dict(zip(sids, goals)))
+        if done:
+            self._traj_done_gen = gen
+            self._traj_next = None
+
+    def _worker(self) -> None:
+        period = 1.0 / self.poll_hz if self.poll_hz > 0 else None
+        tick = 1.0 / self.trajectory_hz
+        next_poll = time.monotonic()
+        while not self._stop.is_set():
+            deadlines = [t for t in (next_poll if period else None, self._traj_next, self.commands.next_keepalive())
+                         if t is not None]
+            timeout = max(0.0, min(deadlines) - time.monotonic()) if deadlines else 0.25
+            self._goal_event.wait(timeout)
+            if self._stop.is_set():
+                break
+            try:
+                if self._goal_event.is_set():
+                    self._send_goals()
+                    if self.trajectory is not None and self._traj_next is None and self.trajectory.active:
+                        self._traj_next = time.monotonic()
+                now = time.monotonic()
+                if self._traj_next is not None and now >= self._traj_next:
+                    self._trajectory_tick(now)
+                    if self._traj_next is not None:
+                        self._traj_next = max(self._traj_next + tick, now)
+                self._write(self.commands.keepalive_due(time.monotonic()))
+                if period is not None and time.monotonic() >= next_poll:
+                    self.poll_once()
+                    next_poll += period
+                    if next_poll < time.monotonic():
+                        next_poll = time.monotonic()  # fell behind; don't try to catch up with a burst
+            except Exception as e:
+                _trace.error("bus %s: %r", self.bus.port_name, e)
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""Light collision meshes for ark_bot.urdf.
+
+The CAD exports under meshes/collision are the full-resolution visual meshes
+(tens of thousands of triangles per link). This builds a convex hull (needs
+scipy) or a vertex-clustered decimation (NumPy only) of each one, caches the
+result by source content hash, and writes a URDF variant whose <collision>
+elements point at the light meshes; <visual> elements are left alone.
+
+    python collision_mesh.py                     # hull if scipy is installed, else cluster
+    python collision_mesh.py --method cluster --resolution 24
+"""
+
+from typing import Dict, Tuple
+import argparse
+import os
+import re
+import shutil
+
+import numpy as np
+
+from disk_cache import atomic_write, cache_dir, file_digest
+from stl_io import index_triangles, read_stl, resolve_mesh, write_stl
+
+try:
+    from scipy.spatial import ConvexHull
+except ImportError:  # hulls need scipy; vertex clustering does not
+    ConvexHull = None
+
+METHODS = ("hull", "cluster")
+DEFAULT_METHOD = "hull" if ConvexHull is not None else "cluster"
+DEFAULT_RESOLUTION = 32
+
+_COLLISION = re.compile(r"<collision\b.*?</collision>", re.DOTALL)
+_FILENAME = re.compile(r'filename="([^"]+)"')
+
+
+def cluster_decimate(vertices: np.ndarray, faces: np.ndarray, resolution: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Merge the vertices in each cell of a grid with ``resolution`` cells along the longest side.
+
+    Triangles that collapse, or that duplicate another once merged, are dropped.
+    """
+    lo = vertices.min(axis=0)
+    cell = max(float((vertices.max(axis=0) - lo).max()) / resolution, 1e-12)
+    grid = np.floor((vertices - lo) / cell).astype(np.int64)
+    key = (grid[:, 0] * (resolution + 1) + grid[:, 1]) * (resolution + 1) + grid[:, 2]
+    _, cluster = np.unique(key, return_inverse=True)
+    cluster = cluster.reshape(-1)
+
+    counts = np.bincount(cluster)
+    merged = np.zeros((len(counts), 3))
+    np.add.at(merged, cluster, vertices)
+    merged /= counts[:, np.newaxis]
+
+    f = cluster[faces]
+    f = f[(f[:, 0] != f[:, 1]) & (f[:, 1] != f[:, 2]) & (f[:, 0] != f[:, 2])]
+    _, first = np.unique(np.sort(f, axis=1), axis=0, return_index=True)
+    f = f[np.sort(first)]
+
+    used, f = np.unique(f, return_inverse=True)
+    return merged[used].astype(np.float32), f.reshape(-1, 3)
+
+
+def convex_hull(vertices: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Convex hull with outward-facing triangles."""
+    if ConvexHull is None:
+        raise ImportError("convex hulls need scipy; use method='cluster' instead")
+    hull = ConvexHull(vertices)
+    used, f = np.unique(hull.simplices, return_inverse=True)
+    v = vertices[used]
+    f = f.reshape(-1, 3)
+    tri = v[f]
+    inward = np.einsum("ij,ij->i", np.cross(tri[:, 1] - tri[:, 0], tri[:, 2] - tri[:, 0]),
+                       tri.mean(axis=1) - v.mean(axis=0)) < 0
+    f[inward] = f[inward][:, ::-1]
+    return v.astype(np.float32), f
+
+
+def simplify(triangles: np.ndarray, method: str = DEFAULT_METHOD,
+             resolution: int = DEFAULT_RESOLUTION) -> Tuple[np.ndarray, np.ndarray]:
+    if method not in METHODS:
+        raise ValueError(f"Unknown method '{method}', expected one of {METHODS}")
+    vertices, faces = index_triangles(triangles)
+    if method == "hull":
+        return convex_hull(vertices)
+    return cluster_decimate(vertices, faces, resolution)
+
+
+def simplified_mesh(src: str, method: str = DEFAULT_METHOD, resolution: int = DEFAULT_RESOLUTION) -> str:
+    """Path of the cached light version of STL ``src``, building it on first use."""
+    digest = file_digest(src)
+    tag = method if method == "hull" else f"{method}{resolution}"
+    path = os.path.join(cache_dir(), f"collision-{digest}-{tag}.stl")
+    if not os.path.exists(path):
+        vertices, faces = simplify(read_stl(src), method, resolution)
+        header = f"arkbot collision {tag} of {os.path.basename(src)} {digest}".encode()
+        atomic_write(path, lambda f: write_stl(f, vertices, faces, header))
+    return path
+
+
+def write_collision_urdf(urdf_path: str, out_urdf: str, mesh_subdir: str = "meshes/collision_simplified",
+                         method: str = DEFAULT_METHOD, resolution: int = DEFAULT_RESOLUTION) -> Dict[str, str]:
+    """Write ``out_urdf`` (next to ``urdf_path``) with every <collision> mesh replaced by its light
+    version under ``mesh_subdir``. Returns {original reference: new reference}."""
+    with open(urdf_path) as f:
+        text = f.read()
+    base = os.path.dirname(os.path.abspath(urdf_path))
+    os.makedirs(os.path.join(base, mesh_subdir), exist_ok=True)
+    renamed: Dict[str, str] = {}
+
+    def light(match):
+        ref = match.group(1)
+        if ref not in renamed:
+            name = os.path.basename(ref)
+            shutil.copyfile(simplified_mesh(resolve_mesh(urdf_path, ref), method, resolution),
+                            os.path.join(base, mesh_subdir, name))
+            renamed[ref] = f"/{mesh_subdir}/{name}"
+        return f'filename="{renamed[ref]}"'
+
+    text = _COLLISION.sub(lambda m: _FILENAME.sub(light, m.group(0)), text)
+    atomic_write(os.path.join(base, os.path.basename(out_urdf)), lambda f: f.write(text.encode()))
+    return renamed
+
+
+def main():
+    here = os.path.dirname(os.path.abspath(__file__))
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--urdf", default=os.path.join(here, "ark_bot.urdf"))
+    ap.add_argument("--out", default="ark_bot_collision.urdf")
+    ap.add_argument("--method", choices=METHODS, default=DEFAULT_METHOD)
+    ap.add_argument("--resolution", type=int, default=DEFAULT_RESOLUTION,
+                    help="cluster cells along each mesh's longest side")
+    args = ap.parse_args()
+
+    renamed = write_collision_urdf(args.urdf, args.out, method=args.method, resolution=args.resolution)
+    base = os.path.dirname(os.path.abspath(args.urdf))
+    for ref, new in renamed.items():
+        before = len(read_stl(resolve_mesh(args.urdf, ref)))
+        after = len(read_stl(os.path.join(base, new.lstrip("/"))))
+        print(f"{os.path.basename(ref):<24} {before:7d} -> {after:5d} triangles")
+    print(f"Wrote {os.path.join(base, args.out)} ({args.method})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# command_cache.py
+from typing import Dict, Optional, Tuple
+
+Command = Tuple[int, int, int]  # goal ticks, speed, acc
+
+
+class CommandCache:
+    """What each servo was last sent, so commands that would not change anything stay off the wire.
+
+    A command goes out if the servo has none on record or its goal is more
+    than ``deadband`` ticks from the last goal sent (not the last one
+    requested, so a slow ramp still moves once it has built up). With
+    ``compare_speed`` a speed or acc that differs from the last one sent also
+    sends it. Leave it off under the synchronized motion profile: that derives
+    speed/acc from the remaining distance, so they change with every reading
+    even while the goal holds. With ``keepalive`` > 0 the last command is
+    re-sent to any servo that has heard nothing for that many seconds. Owned
+    by one bus thread; not locked.
+    """
+
+    def __init__(self, deadband: int = 0, keepalive: float = 0.0, compare_speed: bool = True):
+        self.deadband = int(deadband)
+        self.keepalive = float(keepalive)
+        self.compare_speed = bool(compare_speed)
+        self._sent: Dict[int, Command] = {}
+        self._sent_at: Dict[int, float] = {}
+        self.stats = {"requested": 0, "sent": 0, "suppressed": 0, "keepalive": 0, "failed": 0}
+
+    def filter(self, commands: Dict[int, Command]) -> Dict[int, Command]:
+        """The subset of {sid: (goal, speed, acc)} that needs sending."""
+        out = {}
+        deadband, compare_speed = self.deadband, self.compare_speed
+        for sid, cmd in commands.items():
+            prev = self._sent.get(sid)
+            if prev is None or abs(cmd[0] - prev[0]) > deadband or (compare_speed and cmd[1:] != prev[1:]):
+                out[sid] = cmd
+        self.stats["requested"] += len(commands)
+        self.stats["suppressed"] += len(commands) - len(out)
+        return out
+
+    def sent(self, commands: Dict[int, Command], now: float, ok: bool = True) -> None:
+        if not ok:
+            # don't trust the record for these servos; the next command for them goes out regardless
+            self.stats["failed"] += len(commands)
+            for sid in commands:
+                self._sent.pop(sid, None)
+                self._sent_at.pop(sid, None)
+            return
+        self.stats["sent"] += len(commands)
+        self._sent.update(commands)
+        self._sent_at.update(dict.fromkeys(commands, now))
+
+    def last(self, sid: int) -> Optional[Command]:
+        return self._sent.get(sid)
+
+    def next_keepalive(self) -> Optional[float]:
+        """Time the oldest record falls due for a keepalive, or None."""
+        if self.keepalive <= 0 or not self._sent_at:
+            return None
+        return min(self._sent_at.values()) + self.keepalive
+
+    def keepalive_due(self, now: float) -> Dict[int, Command]:
+        if self.keepalive <= 0:
+            return {}
+        due = {sid: self._sent[sid] for sid, t in self._sent_at.items() if now - t >= self.keepalive}
+        self.stats["keepalive"] += len(due)
+        return due
+
+    def clear(self) -> None:
+        self._sent.clear()
+        self._sent_at.clear()
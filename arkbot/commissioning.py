@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""Find, configure and describe every STS servo on one or more adapters.
+
+Each port is scanned in its own thread. A scan first probes IDs in batches
+with SYNC_READs of the model number, so a whole block of IDs costs one
+reply window, then sweeps the IDs the probe did not hear with single reads
+on a short timeout. Optional batch configuration (new IDs, mode, angle
+limits, midpoint) runs per port in parallel too, and the result is printed
+as a real_config block for arkbot.yaml.
+
+    python commissioning.py /dev/ttyACM0 /dev/ttyACM1
+    python commissioning.py /dev/ttyACM0 --assign 1:11,2:12 --mode 0 --limits 0:0 --home
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+import argparse
+import json
+import os
+import time
+
+from servopkg import ServoBus, GroupSyncRead, LATENCY_TIMER, RX_MODE_SELECT, RX_MODE_SPIN, trace
+from servopkg import (BROADCAST_ID, COMM_RX_CORRUPT, COMM_SUCCESS, INST_READ, INST_SYNC_READ, STS_ABSPOS,
+                      STS_MAX_ANGLE_LIMIT_L, STS_MIN_ANGLE_LIMIT_L, STS_MODE, STS_MODEL_L)
+
+_trace = trace.channel("commissioning")
+
+DEFAULT_TIMEOUT_MS = 4.0  # reply allowance per probe; configuration keeps the stock LATENCY_TIMER
+PROBE_CHUNK = 64          # IDs per SYNC_READ probe (the packet carries one byte per ID)
+ALL_IDS = range(0, BROADCAST_ID)
+# ports are scanned from parallel threads; sleeping on the fd keeps them from fighting over the GIL
+RX_MODE = RX_MODE_SELECT if os.name == "posix" else RX_MODE_SPIN
+
+
+class ServoInfo(NamedTuple):
+    port: str
+    baudrate: int
+    sts_id: int
+    model: int
+    mode: Optional[int]
+    min_limit: Optional[int]
+    max_limit: Optional[int]
+    abs_position: Optional[int]
+
+
+class BusScan(NamedTuple):
+    port: str
+    baudrate: int
+    servos: List[ServoInfo]
+    suspects: List[int]  # IDs that answered with corrupt packets: two servos sharing an ID, or noise
+    seconds: float
+
+
+def _open(port: str, baudrate: int, timeout_ms: float) -> ServoBus:
+    bus = ServoBus(port, baudrate, rx_mode=RX_MODE)
+    bus.port.setAdaptiveLatency(False)
+    for inst in (None, INST_READ, INST_SYNC_READ):
+        bus.port.setLatencyTimer(timeout_ms, inst)
+    return bus
+
+
+def _probe(bus: ServoBus, ids: Sequence[int]) -> Dict[int, int]:
+    """{id: model} for the servos that answered one SYNC_READ of the model number."""
+    group = GroupSyncRead(bus.sdk, STS_MODEL_L, 2)
+    for sid in ids:
+        group.addParam(sid)
+    with bus.lock:
+        group.txRxPacket()
+    found = {}
+    for sid in ids:
+        ok, error = group.isAvailable(sid, STS_MODEL_L, 2)
+        if ok:
+            found[sid] = group.getData(sid, STS_MODEL_L, 2)
+    return found
+
+
+def _read_word(bus: ServoBus, sid: int, address: int) -> Optional[int]:
+    with bus.lock:
+        val, result, _ = bus.sdk.read2ByteTxRx(sid, address)
+    return val if result == COMM_SUCCESS else None
+
+
+def _describe(bus: ServoBus, sid: int, model: int) -> ServoInfo:
+    with bus.lock:
+        mode, result, _ = bus.sdk.read1ByteTxRx(sid, STS_MODE)
+    return ServoInfo(bus.port_name, bus.baudrate, sid, model, mode if result == COMM_SUCCESS else None,
+                     _read_word(bus, sid, STS_MIN_ANGLE_LIMIT_L), _read_word(bus, sid, STS_MAX_ANGLE_LIMIT_L),
+                     _read_word(bus, sid, STS_ABSPOS))
+
+
+def scan_bus(port: str, baudrate: int = 1_000_000, ids: Sequence[int] = ALL_IDS,
+             timeout_ms: float = DEFAULT_TIMEOUT_MS, sweep: bool = True) -> BusScan:
+    """Every servo answering on ``port`` at ``baudrate`` among ``ids``.
+
+    With ``sweep`` the IDs the SYNC_READ probes missed are read one by one, which
+    catches servos whose firmware drops out of a reply train with gaps in it.
+    """
+    t0 = time.perf_counter()
+    ids = [int(sid) for sid in ids if 0 <= int(sid) < BROADCAST_ID]
+    bus = _open(port, baudrate, timeout_ms)
+    try:
+        models: Dict[int, int] = {}
+        for i in range(0, len(ids), PROBE_CHUNK):
+            models.update(_probe(bus, ids[i:i + PROBE_CHUNK]))
+        suspects = []
+        if sweep:
+            for sid in ids:
+                if sid in models:
+                    continue
+                with bus.lock:
+                    model, result, _ = bus.sdk.read2ByteTxRx(sid, STS_MODEL_L)
+                if result == COMM_SUCCESS:
+                    models[sid] = model
+                elif result == COMM_RX_CORRUPT:
+                    suspects.append(sid)
+        servos = [_describe(bus, sid, models[sid]) for sid in sorted(models)]
+    finally:
+        bus.close()
+    _trace.info("%s @ %d: %d servos in %.3f s", port, baudrate, len(servos), time.perf_counter() - t0)
+    return BusScan(port, baudrate, servos, suspects, time.perf_counter() - t0)
+
+
+def scan_ports(ports: Sequence[str], baudrates: Sequence[int] = (1_000_000,), **kwargs) -> List[BusScan]:
+    """scan_bus on every port in parallel (one thread per port, baud rates tried in turn)."""
+    def scan(port):
+        return [scan_bus(port, baud, **kwargs) for baud in baudrates]
+
+    with ThreadPoolExecutor(max_workers=max(1, len(ports))) as pool:
+        return [s for scans in pool.map(scan, ports) for s in scans]
+
+
+def id_moves(assign: Dict[int, int], present: Sequence[int]) -> List[Tuple[int, int, int]]:
+    """The ChangeID steps that take the servos ``present`` on one bus to ``assign`` ({id: new id}),
+    as (servo's original id, from, to), in an order where every step's target is free.
+
+    A target must not be on the bus already unless that servo is moving away too. Swaps and
+    longer cycles go through a free temporary ID. Raises ValueError for a plan that would leave
+    two servos sharing an ID.
+    """
+    present = {int(sid) for sid in present}
+    pending = {int(sid): int(new) for sid, new in assign.items() if int(sid) in present and int(new) != int(sid)}
+    for new in pending.values():
+        if not 0 <= new < BROADCAST_ID:
+            raise ValueError(f"new id {new} must be between 0 and {BROADCAST_ID - 1}")
+    targets = list(pending.values())
+    if len(set(targets)) != len(targets):
+        raise ValueError(f"two servos assigned the same id: {sorted(targets)}")
+    taken = sorted(set(targets) & (present - set(pending)))
+    if taken:
+        raise ValueError(f"ids {taken} are already on the bus and not being moved")
+
+    steps = []
+    occupied = set(present)
+    at = {sid: sid for sid in pending}  # where each servo being moved currently answers
+    while pending:
+        ready = [sid for sid, new in pending.items() if new not in occupied]
+        if not ready:
+            # only cycles left: park one servo on an ID nobody has or wants, which frees its own
+            sid = min(pending)
+            temp = next(i for i in range(BROADCAST_ID - 1, -1, -1) if i not in occupied and i not in targets)
+            steps.append((sid, at[sid], temp))
+            occupied.discard(at[sid])
+            occupied.add(temp)
+            at[sid] = temp
+            continue
+        for sid in ready:
+            new = pending.pop(sid)
+            steps.append((sid, at[sid], new))
+            occupied.discard(at[sid])
+            occupied.add(new)
+    return steps
+
+
+def _answers(sdk, sid: int) -> bool:
+    _, result, _ = sdk.ping(sid)
+    return result == COMM_SUCCESS
+
+
+def configure_bus(port: str, baudrate: int, plan: Dict[int, Dict[str, int]],
+                  timeout_ms: float = LATENCY_TIMER) -> Dict[int, Optional[str]]:
+    """Apply ``plan`` ({id: {"midpoint", "mode", "min_limit", "max_limit", "id"}}, any subset)
+    to the servos on one bus; ``plan`` must list every servo on it. Returns {id: None or the
+    first error}. New IDs are written last, in id_moves order, each one checked on the bus
+    before the next; after a failed one the remaining ID changes are skipped."""
+    steps = id_moves({sid: spec["id"] for sid, spec in plan.items() if "id" in spec}, plan)
+    bus = _open(port, baudrate, timeout_ms)
+    sdk = bus.sdk
+    out: Dict[int, Optional[str]] = {sid: None for sid in plan}
+    eprom = {sid: {k: spec[k] for k in ("mode", "min_limit", "max_limit") if k in spec} for sid, spec in plan.items()}
+    try:
+        with bus.lock:
+            for sid, spec in plan.items():
+                if spec.get("midpoint") and not sdk.SetMiddle(sid):
+                    out[sid] = f"Failed to set midpoint on {sid}"
+            # mode and limits for the whole bus in one unlock / write / lock round
+            out.update(sdk.ConfigureEproms({sid: f for sid, f in eprom.items() if f and not out[sid]}))
+            failed = False
+            for sid, src, dst in steps:
+                if failed or out[sid]:
+                    out[sid] = out[sid] or "ID change skipped: an earlier one on this bus failed"
+                    failed = True
+                    continue
+                if _answers(sdk, dst):
+                    error = f"id {dst} is already answering on the bus"
+                else:
+                    error = sdk.ChangeID(src, dst)
+                    if not error and _answers(sdk, src):
+                        error = f"id {src} still answers after moving to {dst}"
+                if error:
+                    out[sid] = error if src == sid else f"{error} (servo {sid} is at id {src} now)"
+                    failed = True
+    finally:
+        bus.close()
+    for sid, error in out.items():
+        if error:
+            _trace.error("%s id %d: %s", port, sid, error)
+    return out
+
+
+def configure_ports(scans: Sequence[BusScan], plan_for, timeout_ms: float = LATENCY_TIMER
+                    ) -> Dict[Tuple[str, int], Dict[int, Optional[str]]]:
+    """configure_bus on every scanned bus in parallel; ``plan_for(servo_info)`` gives each servo's spec."""
+    def configure(scan):
+        plan = {s.sts_id: plan_for(s) for s in scan.servos}
+        return (scan.port, scan.baudrate), configure_bus(scan.port, scan.baudrate, plan, timeout_ms)
+
+    with ThreadPoolExecutor(max_workers=max(1, len(scans))) as pool:
+        return dict(pool.map(configure, scans))
+
+
+def real_config_block(scans: Sequence[BusScan], joint_names: Sequence[str] = (), home: bool = False) -> str:
+    """real_config keys for what was found, ready to paste into arkbot.yaml. With ``home``
+    the current pose becomes the home pose (home_ticks from each servo's absolute position)."""
+    servos = [s for scan in scans for s in scan.servos]
+    ids = [s.sts_id for s in servos]
+    names = list(joint_names)[:len(ids)]
+    names += [f"joint_{sid}" for sid in ids[len(names):]]
+
+    lines = ["real_config:"]
+    buses = [scan for scan in scans if scan.servos]
+    if len(buses) == 1:
+        lines += [f'  port: "{buses[0].port}"', f"  baudrate: {buses[0].baudrate}"]
+    elif buses:
+        lines.append("  buses:")
+        lines += [f'    - {{ port: "{scan.port}", baudrate: {scan.baudrate}, '
+                  f"motor_ids: {[s.sts_id for s in scan.servos]} }}" for scan in buses]
+    lines.append(f"  motor_ids: {ids}")
+    lines.append(f"  joint_order: {json.dumps(names)}")
+    if home:
+        ticks = {str(s.sts_id): s.abs_position for s in servos if s.abs_position is not None}
+        lines.append(f"  home_ticks: {json.dumps(ticks)}")
+        lines.append(f"  home_loops: {json.dumps({sid: 0 for sid in ticks})}")
+    return "\n".join(lines)
+
+
+def _pairs(text: str) -> List[Tuple[int, int]]:
+    return [tuple(int(v) for v in item.split(":")) for item in text.split(",") if item]
+
+
+def _ids(text: str) -> List[int]:
+    out = []
+    for item in text.split(","):
+        lo, _, hi = item.partition("-")
+        out.extend(range(int(lo), int(hi or lo) + 1))
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("ports", nargs="+")
+    ap.add_argument("--baud", type=int, action="append", help="repeat to try several (default 1000000)")
+    ap.add_argument("--ids", type=_ids, default=list(ALL_IDS), help="e.g. 1-20,30 (default 0-253)")
+    ap.add_argument("--timeout-ms", type=float, default=DEFAULT_TIMEOUT_MS)
+    ap.add_argument("--no-sweep", action="store_true", help="SYNC_READ probes only")
+    ap.add_argument("--assign", type=_pairs, default=[], help="ID changes, e.g. 1:11,2:12")
+    ap.add_argument("--mode", type=int, help="operating mode for every servo found (0 = position)")
+    ap.add_argument("--limits", type=_pairs, help="MIN:MAX angle limits for every servo (0:0 = multi-turn)")
+    ap.add_argument("--midpoint", action="store_true", help="make the current position 2048 on every servo")
+    ap.add_argument("--home", action="store_true", help="emit home_ticks for the current pose")
+    ap.add_argument("--names", default="", help="comma-separated joint_order, in ID order")
+    args = ap.parse_args()
+
+    kwargs = dict(ids=args.ids, timeout_ms=args.timeout_ms, sweep=not args.no_sweep)
+    scans = scan_ports(args.ports, args.baud or [1_000_000], **kwargs)
+    for scan in scans:
+        print(f"{scan.port} @ {scan.baudrate}: {[s.sts_id for s in scan.servos]} in {scan.seconds:.2f} s"
+              + (f", suspect IDs {scan.suspects}" if scan.suspects else ""))
+        for s in scan.servos:
+            print(f"  id {s.sts_id:3d} model {s.model} mode {s.mode} limits {s.min_limit}..{s.max_limit} "
+                  f"abs {s.abs_position}")
+
+    assign = dict(args.assign)
+    for scan in scans:
+        try:
+            id_moves(assign, [s.sts_id for s in scan.servos])
+        except ValueError as e:
+            raise SystemExit(f"--assign on {scan.port}: {e}")
+    final = [assign.get(s.sts_id, s.sts_id) for scan in scans for s in scan.servos]
+
+    if assign or args.mode is not None or args.limits or args.midpoint:
+        def plan_for(servo):
+            spec = {"id": assign.get(servo.sts_id, servo.sts_id), "midpoint": args.midpoint}
+            if args.mode is not None:
+                spec["mode"] = args.mode
+            if args.limits:
+                spec["min_limit"], spec["max_limit"] = args.limits[0]
+            return spec
+
+        results = configure_ports([s for s in scans if s.servos], plan_for)
+        failed = {f"{port}:{sid}": err for (port, _), res in results.items() for sid, err in res.items() if err}
+        for where, err in failed.items():
+            print(f"{where}: {err}")
+        # report what is actually on the buses now
+        kwargs["ids"] = sorted(set(args.ids) | set(final))
+        scans = scan_ports([s.port for s in scans if s.servos], sorted({s.baudrate for s in scans}), **kwargs)
+
+    print()
+    print(real_config_block(scans, [n.strip() for n in args.names.split(",") if n.strip()], args.home))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+# disk_cache.py
+from typing import Callable, IO
+import hashlib
+import os
+
+
+def cache_dir() -> str:
+    """Where derived robot data (parsed URDF, simplified meshes, ...) is cached: $ARKBOT_CACHE or ~/.cache/arkbot."""
+    return os.environ.get("ARKBOT_CACHE") or os.path.join(os.path.expanduser("~"), ".cache", "arkbot")
+
+
+def file_digest(path: str, length: int = 16) -> str:
+    """Content hash of a file, for cache keys that survive copies and touch but not edits."""
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()[:length]
+
+
+def atomic_write(path: str, write: Callable[[IO[bytes]], None]) -> None:
+    """Call ``write`` on a temp file next to ``path`` and rename it into place, so readers
+    never see a half-written file."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, "wb") as f:
+            write(f)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
@@ -0,0 +1,164 @@
+# ik.py
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+import numpy as np
+
+from kinematics import KinematicChain, quat_to_matrix, rotation_error
+
+
+class IKSolver:
+    """Damped least-squares IK on a KinematicChain, warm-started from the previous solution.
+
+    Converged solutions are kept in an LRU cache keyed on the target pose
+    quantized to ``pos_quantum`` metres / ``rot_quantum`` (quaternion units), so
+    a controller re-sending the same pose costs a dict lookup. Orientation error
+    is weighted by ``rot_weight`` metres per radian against position error.
+    """
+
+    def __init__(self, chain: KinematicChain, max_iters: int = 100, pos_tol: float = 1e-4, rot_tol: float = 1e-3,
+                 damping: float = 1e-2, rot_weight: float = 0.1, max_step: float = 0.5, restarts: int = 8,
+                 restart_pool: int = 256, cache_size: int = 4096,
+                 pos_quantum: float = 1e-4, rot_quantum: float = 1e-3, seed: Optional[np.ndarray] = None):
+        self.chain = chain
+        self.max_iters = max_iters
+        self.pos_tol = pos_tol
+        self.rot_tol = rot_tol
+        self.damping = damping
+        self.rot_weight = rot_weight
+        self.max_step = max_step
+        self.restarts = restarts
+        self.restart_pool = max(restart_pool, restarts)
+        self.cache_size = cache_size
+        self.pos_quantum = pos_quantum
+        self.rot_quantum = rot_quantum
+
+        # finite box to draw restarts from; continuous joints get one turn either way
+        self._lo = np.where(np.isfinite(chain.lower), chain.lower, -np.pi)
+        self._hi = np.where(np.isfinite(chain.upper), chain.upper, np.pi)
+        self._rng = np.random.default_rng(0)
+        self._cache: "OrderedDict[tuple, np.ndarray]" = OrderedDict()
+        self.last = self.clip(np.zeros(chain.n) if seed is None else np.asarray(seed, dtype=float))
+        self.stats = {"solves": 0, "cache_hits": 0, "iterations": 0, "failures": 0}
+
+    def clip(self, q: np.ndarray) -> np.ndarray:
+        return np.clip(q, self.chain.lower, self.chain.upper)
+
+    def _key(self, position, quaternion) -> tuple:
+        p = tuple(np.rint(np.asarray(position, dtype=float) / self.pos_quantum).astype(np.int64).tolist())
+        if quaternion is None:
+            return p
+        q = np.asarray(quaternion, dtype=float)
+        q = q / np.linalg.norm(q)
+        if q[3] < 0:
+            q = -q  # q and -q are the same rotation
+        return p + tuple(np.rint(q / self.rot_quantum).astype(np.int64).tolist())
+
+    def _error(self, T, p_target, R_target, out) -> float:
+        out[:3] = p_target - T[:3, 3]
+        if R_target is not None:
+            out[3:] = self.rot_weight * rotation_error(R_target, T[:3, :3])
+        return float(np.dot(out, out))
+
+    def _converged(self, err) -> bool:
+        if np.dot(err[:3], err[:3]) > self.pos_tol ** 2:
+            return False
+        return len(err) == 3 or np.dot(err[3:], err[3:]) <= (self.rot_weight * self.rot_tol) ** 2
+
+    def _converge(self, q, p_target, R_target) -> Tuple[np.ndarray, bool, int]:
+        """Levenberg-Marquardt: damping shrinks while steps reduce the error and grows when they don't."""
+        rows = 6 if R_target is not None else 3
+        eye = np.eye(rows)
+        err, trial_err = np.empty(rows), np.empty(rows)
+        T, J = self.chain.fk_jacobian(q)
+        cost = self._error(T, p_target, R_target, err)
+        lam = self.damping
+        stalled = 0
+        for it in range(1, self.max_iters + 1):
+            if self._converged(err):
+                return q, True, it
+            if stalled >= 8:
+                break  # wedged against a limit or in a local minimum; let a restart have the time
+            Jw = J[:rows].copy()
+            if rows == 6:
+                Jw[3:] *= self.rot_weight
+            # dq = J^T (J J^T + λ² I)^-1 e
+            dq = Jw.T @ np.linalg.solve(Jw @ Jw.T + lam * lam * eye, err)
+            step = np.abs(dq).max()
+            if step > self.max_step:
+                dq *= self.max_step / step
+            trial = self.clip(q + dq)
+            T, J_trial = self.chain.fk_jacobian(trial)
+            trial_cost = self._error(T, p_target, R_target, trial_err)
+            stalled = stalled + 1 if trial_cost > cost * 0.99 else 0
+            if trial_cost < cost:
+                q, J, cost = trial, J_trial, trial_cost
+                err, trial_err = trial_err, err
+                lam = max(lam * 0.5, 1e-6)
+            else:
+                lam = min(lam * 4.0, 1e3)
+        return q, self._converged(err), it
+
+    def _restart_seeds(self, p_target, R_target) -> np.ndarray:
+        """The ``restarts`` random configurations, out of a pool scored with one batched FK, closest to the target."""
+        pool = self._rng.uniform(self._lo, self._hi, (self.restart_pool, self.chain.n))
+        T = self.chain.fk(pool)
+        cost = np.sum((T[:, :3, 3] - p_target) ** 2, axis=1)
+        if R_target is not None:
+            # 3 - tr(R_target^T R) = 2 (1 - cos angle) ~ angle^2
+            cost += self.rot_weight ** 2 * (3.0 - np.einsum("ij,nij->n", R_target, T[:, :3, :3]))
+        return pool[np.argsort(cost)[:self.restarts]]
+
+    def solve(self, position, quaternion=None, seed: Optional[np.ndarray] = None) -> Tuple[np.ndarray, bool]:
+        """Joint angles reaching ``position`` (and the (x, y, z, w) ``quaternion`` if given).
+
+        Starts from ``seed`` or the last solution; if that does not converge, restarts
+        from the random configurations whose tips land closest to the target. Returns the best attempt and whether it converged;
+        only converged solutions become the next warm start. A cached solution for the same
+        pose is only used without a ``seed``: it may be on another branch than the one nearest the seed.
+        """
+        self.stats["solves"] += 1
+        key = self._key(position, quaternion)
+        hit = self._cache.get(key) if seed is None else None
+        if hit is not None:
+            self._cache.move_to_end(key)
+            self.stats["cache_hits"] += 1
+            self.last = hit
+            return hit.copy(), True
+
+        p_target = np.asarray(position, dtype=float)
+        R_target = None if quaternion is None else quat_to_matrix(quaternion)
+        start = self.last if seed is None else self.clip(np.asarray(seed, dtype=float))
+
+        q, ok, iters = self._converge(start.copy(), p_target, R_target)
+        if not ok and self.restarts:
+            for seed_q in self._restart_seeds(p_target, R_target):
+                q, ok, n = self._converge(seed_q, p_target, R_target)
+                iters += n
+                if ok:
+                    break
+        self.stats["iterations"] += iters
+        if not ok:
+            self.stats["failures"] += 1
+            return q, False
+
+        # continuous joints: take the turn closest to where we started, not wherever the solver wandered
+        cont = self.chain.continuous
+        q[cont] = start[cont] + (q[cont] - start[cont] + np.pi) % (2 * np.pi) - np.pi
+
+        self.last = q
+        self._cache[key] = q
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return q.copy(), True
+
+    def solve_path(self, positions, quaternions=None, seed: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Solve N poses in order, each warm-started from the one before; (N x n angles, N converged flags)."""
+        positions = np.asarray(positions, dtype=float).reshape(-1, 3)
+        out = np.empty((len(positions), self.chain.n))
+        ok = np.zeros(len(positions), dtype=bool)
+        if seed is not None:
+            self.last = self.clip(np.asarray(seed, dtype=float))
+        for i, p in enumerate(positions):
+            out[i], ok[i] = self.solve(p, None if quaternions is None else quaternions[i])
+        return out, ok
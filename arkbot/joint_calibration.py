@@ -0,0 +1,74 @@
+# joint_calibration.py
+from typing import Dict, Optional, Sequence
+import math
+
+import numpy as np
+
+_TWO_PI = 2.0 * math.pi
+
+
+class JointCalibration:
+    """Tick <-> angle calibration for every joint, compiled into arrays ordered like joint_order.
+
+    All transforms take either the full joint vector or ``slots`` (indices into
+    joint_order) and broadcast over leading axes, so an N x joints trajectory
+    converts in one call.
+    """
+
+    def __init__(self, motor_ids: Sequence[int], ticks_per_turn: int,
+                 gear_ratio: Dict[int, float], orientation: Dict[int, int],
+                 home_total_ticks: Dict[int, int], pos_off: Dict[int, float]):
+        self.motor_ids = np.asarray(motor_ids, dtype=np.int64)
+        self.ticks_per_turn = int(ticks_per_turn)
+        self.half_turn = self.ticks_per_turn // 2
+
+        self.gear = np.array([gear_ratio.get(sid, 1.0) for sid in motor_ids], dtype=np.float64)
+        self.orientation = np.array([orientation.get(sid, 1) for sid in motor_ids], dtype=np.float64)
+        self.home_total = np.array([home_total_ticks.get(sid, 0) for sid in motor_ids], dtype=np.float64)
+        self.pos_off = np.array([pos_off.get(sid, 0.0) for sid in motor_ids], dtype=np.float64)
+
+        # motor ticks -> joint radians, and joint radians -> signed motor ticks
+        self.rad_per_tick = _TWO_PI / (self.ticks_per_turn * self.gear)
+        self.ticks_per_rad = self.orientation * self.gear * (self.ticks_per_turn / _TWO_PI)
+
+        # multi-turn tracking: last raw tick and loop count per joint
+        self.previous = np.zeros(len(motor_ids), dtype=np.int64)
+        self.loops = np.zeros(len(motor_ids), dtype=np.int64)
+
+    def seed(self, ticks, loops) -> None:
+        self.previous[:] = ticks
+        self.loops[:] = loops
+
+    def unwrap(self, ticks, slots: Optional[np.ndarray] = None) -> np.ndarray:
+        """Raw 0..4095 ticks -> total ticks, counting a loop whenever a reading jumps more than half a turn."""
+        idx = slice(None) if slots is None else slots
+        ticks = np.asarray(ticks, dtype=np.int64)
+        raw = ticks - self.previous[idx]
+        self.loops[idx] += (raw < -self.half_turn).astype(np.int64) - (raw > self.half_turn)  # 0->4095 / 4095->0
+        self.previous[idx] = ticks
+        return self.loops[idx] * self.ticks_per_turn + ticks
+
+    def unwrap_series(self, ticks, slots: Optional[np.ndarray] = None) -> np.ndarray:
+        """Unwrap an N x joints series of raw ticks offline, starting from the current state (left untouched)."""
+        idx = slice(None) if slots is None else slots
+        ticks = np.asarray(ticks, dtype=np.int64)
+        steps = np.diff(ticks, axis=0, prepend=self.previous[idx][np.newaxis])
+        wraps = (steps < -self.half_turn).astype(np.int64) - (steps > self.half_turn)
+        return (self.loops[idx] + np.cumsum(wraps, axis=0)) * self.ticks_per_turn + ticks
+
+    def ticks_to_rad(self, total_ticks, slots: Optional[np.ndarray] = None) -> np.ndarray:
+        idx = slice(None) if slots is None else slots
+        # orientation is only applied on the command side, as it always has been
+        return (np.asarray(total_ticks) - self.home_total[idx]) * self.rad_per_tick[idx] - self.pos_off[idx]
+
+    def ticks_to_command_rad(self, total_ticks, slots: Optional[np.ndarray] = None) -> np.ndarray:
+        """Inverse of rad_to_ticks: the command angle that would put the motor at ``total_ticks``.
+        Differs from ticks_to_rad on orientation -1 joints; use it wherever a command starts from
+        the measured pose (trajectory start, IK seed)."""
+        idx = slice(None) if slots is None else slots
+        return (np.asarray(total_ticks) - self.home_total[idx]) / self.ticks_per_rad[idx] - self.pos_off[idx]
+
+    def rad_to_ticks(self, angles, slots: Optional[np.ndarray] = None) -> np.ndarray:
+        """goal_total_ticks = home_total_ticks + (angle + pos_offset) * orientation * (ticks_per_turn / 2π) * gear"""
+        idx = slice(None) if slots is None else slots
+        return self.home_total[idx] + (np.asarray(angles) + self.pos_off[idx]) * self.ticks_per_rad[idx]
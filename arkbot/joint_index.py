@@ -0,0 +1,65 @@
+# joint_index.py
+from typing import Any, Dict, List, NamedTuple, Sequence, Tuple
+
+import numpy as np
+
+
+class JointGroup(NamedTuple):
+    name: str
+    joints: Tuple[str, ...]
+    motor_ids: Tuple[int, ...]
+    slots: np.ndarray           # indices into joint_order, read-only
+    control_mode: str
+
+
+def _frozen_slots(slots: Sequence[int]) -> np.ndarray:
+    arr = np.array(slots, dtype=np.intp)
+    arr.flags.writeable = False
+    return arr
+
+
+class JointIndex:
+    """Joint names, motor IDs and joint groups resolved to integer slots once at startup.
+
+    Everything on the hot path addresses motors by slot (position in joint_order),
+    so commands and reads never scan or hash joint names.
+    """
+
+    def __init__(self, joint_order: Sequence[str], motor_ids: Sequence[int],
+                 joint_groups: Dict[str, Dict[str, Any]] = None):
+        self.names: Tuple[str, ...] = tuple(joint_order)
+        self.motor_ids: Tuple[int, ...] = tuple(int(sid) for sid in motor_ids)
+        self.slot: Dict[str, int] = {jname: i for i, jname in enumerate(self.names)}
+        self.all = JointGroup("", self.names, self.motor_ids, _frozen_slots(range(len(self.names))), "position")
+
+        self.groups: Dict[str, JointGroup] = {}
+        for gname, spec in (joint_groups or {}).items():
+            joints = tuple(spec["joints"])
+            slots = self.slots_for(joints)
+            self.groups[gname] = JointGroup(gname, joints, tuple(self.motor_ids[i] for i in slots),
+                                            _frozen_slots(slots), spec.get("control_mode", "position"))
+
+        # ad-hoc joint lists (dict-based driver API) resolved on first use
+        self._adhoc: Dict[Tuple[str, ...], JointGroup] = {self.names: self.all}
+
+    def group(self, name: str) -> JointGroup:
+        try:
+            return self.groups[name]
+        except KeyError:
+            raise KeyError(f"Unknown joint group '{name}', expected one of {sorted(self.groups)}")
+
+    def lookup(self, joints: Sequence[str]) -> JointGroup:
+        """JointGroup for an arbitrary joint list, resolved once per distinct list."""
+        key = tuple(joints)
+        group = self._adhoc.get(key)
+        if group is None:
+            slots = self.slots_for(key)
+            group = JointGroup("", key, tuple(self.motor_ids[i] for i in slots), _frozen_slots(slots), "position")
+            self._adhoc[key] = group
+        return group
+
+    def slots_for(self, joints: Sequence[str]) -> List[int]:
+        try:
+            return [self.slot[jname] for jname in joints]
+        except KeyError as e:
+            raise KeyError(f"Unknown joint name '{e.args[0]}'. Check real_config.joint_order.")
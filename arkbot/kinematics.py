@@ -0,0 +1,253 @@
+# kinematics.py
+from typing import Dict, List, NamedTuple, Optional, Tuple
+import os
+import xml.etree.ElementTree as ET
+
+import numpy as np
+
+from disk_cache import atomic_write, cache_dir, file_digest
+
+MOVABLE = ("revolute", "continuous", "prismatic")
+
+# on-disk joint table; a cache written with any other layout is rebuilt
+_JOINT_DTYPE = np.dtype([("name", "U64"), ("kind", "U16"), ("parent", "U64"), ("child", "U64"),
+                         ("origin", "f8", (4, 4)), ("axis", "f8", (3,)), ("limits", "f8", (2,))])
+
+_EYE3 = np.eye(3)
+_parsed: Dict[str, List["UrdfJoint"]] = {}
+
+
+class UrdfJoint(NamedTuple):
+    name: str
+    kind: str            # revolute / continuous / prismatic / fixed ...
+    parent: str
+    child: str
+    origin: np.ndarray   # 4x4 parent -> joint frame at q = 0
+    axis: np.ndarray     # unit axis in the joint frame
+    lower: float         # -inf / inf when the URDF gives no limit (continuous)
+    upper: float
+
+
+def rpy_to_matrix(rpy) -> np.ndarray:
+    """URDF fixed-axis roll/pitch/yaw: R = Rz(yaw) @ Ry(pitch) @ Rx(roll)."""
+    r, p, y = rpy
+    cr, sr, cp, sp, cy, sy = np.cos(r), np.sin(r), np.cos(p), np.sin(p), np.cos(y), np.sin(y)
+    return np.array([[cy * cp, cy * sp * sr - sy * cr, cy * sp * cr + sy * sr],
+                     [sy * cp, sy * sp * sr + cy * cr, sy * sp * cr - cy * sr],
+                     [-sp, cp * sr, cp * cr]])
+
+
+def quat_to_matrix(quat) -> np.ndarray:
+    """Rotation matrix of an (x, y, z, w) quaternion, the order PyBullet and arktypes use."""
+    x, y, z, w = np.asarray(quat, dtype=float) / np.linalg.norm(quat)
+    return np.array([[1 - 2 * (y * y + z * z), 2 * (x * y - z * w), 2 * (x * z + y * w)],
+                     [2 * (x * y + z * w), 1 - 2 * (x * x + z * z), 2 * (y * z - x * w)],
+                     [2 * (x * z - y * w), 2 * (y * z + x * w), 1 - 2 * (x * x + y * y)]])
+
+
+def matrix_to_quat(R) -> np.ndarray:
+    """(x, y, z, w) quaternion of a rotation matrix, with w >= 0."""
+    t = np.trace(R)
+    if t > 0:
+        s = 2.0 * np.sqrt(t + 1.0)
+        q = np.array([(R[2, 1] - R[1, 2]) / s, (R[0, 2] - R[2, 0]) / s, (R[1, 0] - R[0, 1]) / s, 0.25 * s])
+    else:
+        i = int(np.argmax(np.diag(R)))
+        j, k = (i + 1) % 3, (i + 2) % 3
+        s = 2.0 * np.sqrt(1.0 + R[i, i] - R[j, j] - R[k, k])
+        q = np.empty(4)
+        q[i] = 0.25 * s
+        q[j] = (R[j, i] + R[i, j]) / s
+        q[k] = (R[k, i] + R[i, k]) / s
+        q[3] = (R[k, j] - R[j, k]) / s
+    return q if q[3] >= 0 else -q
+
+
+def rotation_error(R_target, R) -> np.ndarray:
+    """Axis * angle (world frame) that rotates R onto R_target."""
+    E = R_target @ R.T
+    v = np.array([E[2, 1] - E[1, 2], E[0, 2] - E[2, 0], E[1, 0] - E[0, 1]])
+    s = 0.5 * np.linalg.norm(v)
+    c = 0.5 * (np.trace(E) - 1.0)
+    angle = np.arctan2(s, c)
+    if s < 1e-9:
+        if c > 0:
+            return 0.5 * v  # tiny angle: sin(angle) ~ angle
+        # half a turn: the axis is the column of E + I with the largest norm
+        B = E + np.eye(3)
+        axis = B[:, int(np.argmax(np.linalg.norm(B, axis=0)))]
+        return np.pi * axis / np.linalg.norm(axis)
+    return v * (angle / (2.0 * s))
+
+
+def _parse_urdf(urdf_path: str) -> List[UrdfJoint]:
+    root = ET.parse(urdf_path).getroot()
+    joints = []
+    for el in root.findall("joint"):
+        origin = np.eye(4)
+        o = el.find("origin")
+        if o is not None:
+            origin[:3, :3] = rpy_to_matrix([float(v) for v in o.get("rpy", "0 0 0").split()])
+            origin[:3, 3] = [float(v) for v in o.get("xyz", "0 0 0").split()]
+        a = el.find("axis")
+        axis = np.array([float(v) for v in a.get("xyz").split()]) if a is not None else np.array([1.0, 0.0, 0.0])
+        kind = el.get("type")
+        lim = el.find("limit")
+        if kind == "continuous" or lim is None:
+            lower, upper = -np.inf, np.inf
+        else:
+            lower, upper = float(lim.get("lower", "-inf")), float(lim.get("upper", "inf"))
+        joints.append(UrdfJoint(el.get("name"), kind, el.find("parent").get("link"), el.find("child").get("link"),
+                                origin, axis / np.linalg.norm(axis), lower, upper))
+    return joints
+
+
+def _save_joints(path: str, joints: List[UrdfJoint]) -> None:
+    if any(len(v) > 64 for j in joints for v in (j.name, j.kind, j.parent, j.child)):
+        raise ValueError("URDF names too long for the cached joint table")
+    table = np.empty(len(joints), dtype=_JOINT_DTYPE)
+    for row, j in zip(table, joints):
+        row["name"], row["kind"], row["parent"], row["child"] = j.name, j.kind, j.parent, j.child
+        row["origin"], row["axis"], row["limits"] = j.origin, j.axis, (j.lower, j.upper)
+    atomic_write(path, lambda f: np.save(f, table, allow_pickle=False))
+
+
+def _load_joints(path: str) -> List[UrdfJoint]:
+    table = np.load(path, allow_pickle=False)
+    if table.dtype != _JOINT_DTYPE:
+        raise ValueError("stale kinematics cache")
+    return [UrdfJoint(str(r["name"]), str(r["kind"]), str(r["parent"]), str(r["child"]), r["origin"].copy(),
+                      r["axis"].copy(), float(r["limits"][0]), float(r["limits"][1])) for r in table]
+
+
+def load_urdf_joints(urdf_path: str, use_cache: bool = True) -> List[UrdfJoint]:
+    """Every <joint> of the URDF, in file order (PyBullet's link index order for a chain).
+
+    The parsed joint table is kept per process and as one record array under
+    cache_dir(), keyed by the URDF's content hash, so only an edited URDF is
+    parsed again.
+    """
+    digest = file_digest(urdf_path)
+    joints = _parsed.get(digest)
+    if joints is not None:
+        return joints
+
+    path = os.path.join(cache_dir(), f"urdf-{digest}.npy")
+    joints = None
+    if use_cache and os.path.exists(path):
+        try:
+            joints = _load_joints(path)
+        except Exception:
+            joints = None  # unreadable or from another version: rebuild below
+    if joints is None:
+        joints = _parse_urdf(urdf_path)
+        if use_cache:
+            try:
+                _save_joints(path, joints)
+            except (OSError, ValueError):
+                pass  # read-only home or odd names: just parse every time
+    _parsed[digest] = joints
+    return joints
+
+
+class KinematicChain:
+    """The joints from the URDF root link to ``tip_link``, as arrays, with FK and the geometric Jacobian.
+
+    Fixed joints are folded into the following joint's origin; ``joint_names``,
+    ``lower`` and ``upper`` cover the movable joints only, root first.
+    """
+
+    def __init__(self, joints: List[UrdfJoint], tip_link: str):
+        by_child = {j.child: j for j in joints}
+        path = []
+        link = tip_link
+        while link in by_child:
+            path.append(by_child[link])
+            link = by_child[link].parent
+        if not path:
+            raise KeyError(f"Link '{tip_link}' is not the child of any URDF joint")
+        path.reverse()
+        self.root_link, self.tip_link = link, tip_link
+
+        origins, axes, prismatic, names, lower, upper = [], [], [], [], [], []
+        pending = np.eye(4)
+        for j in path:
+            if j.kind not in MOVABLE:
+                pending = pending @ j.origin
+                continue
+            origins.append(pending @ j.origin)
+            pending = np.eye(4)
+            axes.append(j.axis)
+            prismatic.append(j.kind == "prismatic")
+            names.append(j.name)
+            lower.append(j.lower)
+            upper.append(j.upper)
+        self.tip_offset = pending  # fixed joints after the last movable one
+        self.joint_names: Tuple[str, ...] = tuple(names)
+        self.origins = np.array(origins).reshape(-1, 4, 4)
+        self.axes = np.array(axes).reshape(-1, 3)
+        self.prismatic = np.array(prismatic, dtype=bool)
+        self.lower = np.array(lower, dtype=float)
+        self.upper = np.array(upper, dtype=float)
+        self.continuous = ~np.isfinite(self.lower) & ~np.isfinite(self.upper) & ~self.prismatic
+        self.n = len(names)
+        x, y, z = self.axes.T
+        zero = np.zeros(self.n)
+        self._skew = np.stack([np.stack([zero, -z, y], -1), np.stack([z, zero, -x], -1), np.stack([-y, x, zero], -1)], 1)
+        self._outer = self.axes[:, :, np.newaxis] * self.axes[:, np.newaxis, :]
+
+    @classmethod
+    def from_urdf(cls, urdf_path: str, tip_link: Optional[str] = None) -> "KinematicChain":
+        """Chain to ``tip_link`` (default: the child of the last revolute joint)."""
+        joints = load_urdf_joints(urdf_path)
+        if tip_link is None:
+            tip_link = [j for j in joints if j.kind in ("revolute", "continuous")][-1].child
+        return cls(joints, tip_link)
+
+    def _local(self, q: np.ndarray) -> np.ndarray:
+        """Parent -> child transform of every joint at ``q`` (..., n): origin @ motion, built in one go."""
+        # Rodrigues, R = c I + s [a]x + (1 - c) a a^T; prismatic joints get angle 0, i.e. the identity
+        angle = np.where(self.prismatic, 0.0, q)[..., np.newaxis, np.newaxis]
+        c, s = np.cos(angle), np.sin(angle)
+        M = np.zeros(q.shape + (4, 4))
+        M[..., :3, :3] = c * _EYE3 + s * self._skew + (1.0 - c) * self._outer
+        M[..., :3, 3] = self.axes * np.where(self.prismatic, q, 0.0)[..., np.newaxis]
+        M[..., 3, 3] = 1.0
+        return self.origins @ M
+
+    def joint_frames(self, q) -> np.ndarray:
+        """Root-frame pose of every movable joint's child frame: (..., n, 4, 4) for q of shape (..., n)."""
+        L = self._local(np.asarray(q, dtype=float))
+        for i in range(1, self.n):
+            L[..., i, :, :] = L[..., i - 1, :, :] @ L[..., i, :, :]
+        return L
+
+    def fk(self, q) -> np.ndarray:
+        """Pose of the tip link in the root frame: 4x4 for one configuration, (N, 4, 4) for N x n."""
+        return self.joint_frames(q)[..., -1, :, :] @ self.tip_offset
+
+    def fk_jacobian(self, q) -> Tuple[np.ndarray, np.ndarray]:
+        """Tip pose and its geometric Jacobian (linear rows first, root frame): 4x4 and 6 x n for one
+        configuration, (N, 4, 4) and (N, 6, n) for N x n."""
+        frames = self.joint_frames(q)
+        T = frames[..., -1, :, :] @ self.tip_offset
+        # a joint's own motion leaves its axis, and a revolute joint's origin, where they were
+        points = frames[..., :3, 3]
+        dirs = np.einsum("...nij,nj->...ni", frames[..., :3, :3], self.axes)
+
+        r = T[..., np.newaxis, :3, 3] - points
+        J = np.empty(T.shape[:-2] + (6, self.n))
+        # linear rows: a x r for revolute joints (np.cross is slow on arrays this small), a for prismatic ones
+        J[..., 0, :] = dirs[..., 1] * r[..., 2] - dirs[..., 2] * r[..., 1]
+        J[..., 1, :] = dirs[..., 2] * r[..., 0] - dirs[..., 0] * r[..., 2]
+        J[..., 2, :] = dirs[..., 0] * r[..., 1] - dirs[..., 1] * r[..., 0]
+        J[..., 3:, :] = np.swapaxes(dirs, -1, -2)
+        if self.prismatic.any():
+            J[..., :3, self.prismatic] = np.swapaxes(dirs[..., self.prismatic, :], -1, -2)
+            J[..., 3:, self.prismatic] = 0.0
+        return T, J
+
+    def within_limits(self, q) -> np.ndarray:
+        """Whether each configuration (..., n) respects every joint limit."""
+        q = np.asarray(q, dtype=float)
+        return np.all((q >= self.lower) & (q <= self.upper), axis=-1)
@@ -0,0 +1,93 @@
+# motion_profile.py
+from typing import Dict, Sequence, Tuple
+
+import numpy as np
+
+ACC_UNIT = 100.0  # STS acc register counts 100 ticks/s^2; 0 would mean "no ramp" so it is never sent
+ACC_MAX = 254
+MODES = ("synchronized", "fixed")
+
+
+class MotionProfile:
+    """Per-joint speed and acc limits, compiled into arrays ordered like joint_order.
+
+    Each joint's speed cap is its ``motor_speeds`` entry if there is one, else
+    round(speed_default) * gear ratio, clamped to speed_min..speed_max; its acc
+    cap is its ``motor_accs`` entry, else acc_default. ``speed_for`` is the same
+    table as a dict for the bus threads (trajectory ticks, keepalives).
+
+    ``profile`` scales a group command so every joint follows the same
+    normalised trapezoid: speeds and accs are proportional to each joint's
+    distance, limited by whichever joint is tightest, so they all start and
+    arrive together (a straight line in joint space) instead of each running
+    at its own cap and the short moves finishing first. The acc register is
+    coarse (whole 100 ticks/s^2, at least 1), so a short move often gets more
+    acc than its share; its speed is then solved from the shared duration
+    instead of scaled, which keeps the arrival time. What is left is speed
+    rounding (whole ticks/s, at least 1): moves of a few ticks can still end
+    a little early.
+    """
+
+    def __init__(self, motor_ids: Sequence[int], speed_caps: Dict[int, int], acc_caps: Dict[int, int],
+                 synchronized: bool = True):
+        self.motor_ids = [int(sid) for sid in motor_ids]
+        self.vcap = np.array([speed_caps[sid] for sid in self.motor_ids], dtype=np.float64)
+        self.acap = np.array([acc_caps[sid] for sid in self.motor_ids], dtype=np.float64) * ACC_UNIT
+        self.synchronized = synchronized
+        self.speed_for = {sid: int(v) for sid, v in zip(self.motor_ids, self.vcap.tolist())}
+        self.acc_for = {sid: int(a) for sid, a in acc_caps.items()}
+        self._speed_caps = self.vcap.astype(np.int64)
+        self._acc_caps = np.array([acc_caps[sid] for sid in self.motor_ids], dtype=np.int64)
+
+    @classmethod
+    def from_config(cls, rc: Dict, motor_ids: Sequence[int], gear_ratio: Dict[int, float]) -> "MotionProfile":
+        speed_default = int(rc.get("speed_default", 133))
+        acc_default = int(rc.get("acc_default", 50))
+        speed_min = int(rc.get("speed_min", 1))
+        speed_max = int(rc.get("speed_max", 4095))
+        motor_speeds = {int(k): int(v) for k, v in (rc.get("motor_speeds") or {}).items()}
+        motor_accs = {int(k): int(v) for k, v in (rc.get("motor_accs") or {}).items()}
+
+        # the gripper section's speed/acc apply to its servo when it is one of ours
+        gripper = rc.get("gripper") or {}
+        if "id" in gripper:
+            gid = int(gripper["id"])
+            if "speed" in gripper:
+                motor_speeds.setdefault(gid, int(gripper["speed"]))
+            if "acc" in gripper:
+                motor_accs.setdefault(gid, int(gripper["acc"]))
+
+        speeds, accs = {}, {}
+        for sid in motor_ids:
+            spd = motor_speeds.get(sid, int(round(speed_default) * float(gear_ratio.get(sid, 1.0))))
+            speeds[sid] = max(speed_min, min(speed_max, spd))
+            accs[sid] = max(1, min(ACC_MAX, motor_accs.get(sid, acc_default)))
+        mode = rc.get("motion_profile", "synchronized")
+        if mode not in MODES:
+            raise ValueError(f"real_config.motion_profile must be one of {MODES}, got {mode!r}")
+        return cls(motor_ids, speeds, accs, mode == "synchronized")
+
+    def profile(self, slots: np.ndarray, start_ticks, goal_ticks) -> Tuple[np.ndarray, np.ndarray]:
+        """Speed and acc register values for moving joints ``slots`` from ``start_ticks`` to ``goal_ticks``."""
+        if not self.synchronized:
+            return self._speed_caps[slots], self._acc_caps[slots]
+        dist = np.abs(np.asarray(goal_ticks, dtype=np.float64) - np.asarray(start_ticks, dtype=np.float64))
+        moving = dist >= 1.0
+        if not moving.any():
+            return self._speed_caps[slots], self._acc_caps[slots]
+        vcap, acap = self.vcap[slots], self.acap[slots]
+        # peak speed / acc of the shared unit-distance trapezoid that no moving joint exceeds
+        d = dist[moving]
+        v_unit = (vcap[moving] / d).min()
+        a_unit = (acap[moving] / d).min()
+        # its duration: accelerate, cruise, decelerate; or a triangle if the unit move is too short to cruise
+        duration = 1.0 / v_unit + v_unit / a_unit if v_unit * v_unit < a_unit else 2.0 / np.sqrt(a_unit)
+
+        # rounded up, so every joint can still make the duration (never above its cap: acap is whole units)
+        accs = np.where(moving, np.clip(np.ceil(dist * a_unit / ACC_UNIT - 1e-9), 1, ACC_MAX), acap / ACC_UNIT)
+        # with the acc actually sent, the cruise speed that covers dist in duration: d = v T - v^2 / a
+        a = accs * ACC_UNIT
+        aT = a * duration
+        v = 0.5 * (aT - np.sqrt(np.maximum(aT * aT - 4.0 * a * dist, 0.0)))
+        speeds = np.where(moving, np.maximum(np.rint(v), 1.0), vcap)
+        return speeds.astype(np.int64), accs.astype(np.int64)
@@ -0,0 +1,262 @@
+# recorder.py
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+from disk_cache import atomic_write
+from servopkg import trace
+from state_snapshot import JointSample, _ARRAY_FIELDS
+
+_trace = trace.channel("driver")
+
+FORMAT_VERSION = 1
+
+
+def _state_columns(n: int) -> Dict[str, Tuple[str, tuple]]:
+    cols = {"t": ("<f8", ()), "wall": ("<f8", ())}
+    cols.update({name: ("<f8", (n,)) for name in _ARRAY_FIELDS})
+    cols["raw_ticks"] = ("<f8", (n,))  # position register as read, before unwrapping into ticks
+    return cols
+
+
+def _goal_columns(n: int) -> Dict[str, Tuple[str, tuple]]:
+    return {"t": ("<f8", ()), "goal": ("<f8", (n,)), "speed": ("<f8", (n,)), "acc": ("<f8", (n,)),
+            "result": ("<i4", ())}
+
+
+class _Table:
+    """Append-only columns, one fixed-stride file each.
+
+    Rows are filled into a preallocated in-memory chunk (NaN where a row has
+    no value, e.g. joints on another bus); the flusher appends finished rows
+    to the column files. Producers only ever copy a handful of small arrays.
+    """
+
+    def __init__(self, directory: str, name: str, columns: Dict[str, Tuple[str, tuple]], chunk_rows: int):
+        self.name = name
+        self.columns = columns
+        self.chunk_rows = chunk_rows
+        self._files = {col: open(os.path.join(directory, f"{name}.{col}.bin"), "ab") for col in columns}
+        self._lock = threading.Lock()        # producers vs chunk hand-over
+        self._flush_lock = threading.Lock()  # one flush at a time
+        self._free: List[Dict[str, np.ndarray]] = []
+        self._full: List[Dict[str, np.ndarray]] = []
+        self._chunk = self._take()
+        self._count = 0     # rows filled in the current chunk
+        self._written = 0   # rows of the current chunk already on disk
+        self.rows = 0       # rows on disk
+
+    def _take(self) -> Dict[str, np.ndarray]:
+        if self._free:
+            return self._free.pop()
+        chunk = {col: np.empty((self.chunk_rows,) + shape, dtype) for col, (dtype, shape) in self.columns.items()}
+        self._blank(chunk)
+        return chunk
+
+    @staticmethod
+    def _blank(chunk) -> None:
+        for arr in chunk.values():
+            arr.fill(np.nan if arr.dtype.kind == "f" else 0)
+
+    def row(self) -> Tuple[Dict[str, np.ndarray], int]:
+        """Claim the next row; call with the table lock held and fill it before releasing."""
+        if self._count == self.chunk_rows:
+            self._full.append(self._chunk)
+            self._chunk = self._take()
+            self._count = 0
+        i = self._count
+        self._count += 1
+        return self._chunk, i
+
+    def flush(self) -> None:
+        with self._flush_lock:
+            with self._lock:
+                full, self._full = self._full, []
+                chunk, count, start = self._chunk, self._count, self._written
+                self._written = count
+            for i, done in enumerate(full):
+                # the first full chunk may have been partly written by an earlier flush
+                self._write(done, start if i == 0 else 0, self.chunk_rows)
+                self._blank(done)
+                with self._lock:
+                    self._free.append(done)
+            self._write(chunk, 0 if full else start, count)
+
+    def _write(self, chunk, start: int, stop: int) -> None:
+        if stop <= start:
+            return
+        for col, f in self._files.items():
+            f.write(chunk[col][start:stop].tobytes())
+            f.flush()
+        self.rows += stop - start
+
+    def close(self) -> None:
+        self.flush()
+        for f in self._files.values():
+            f.close()
+
+
+class Recorder:
+    """Columnar log of everything the bus threads read and write.
+
+    ``state`` gets one row per poll (time, every JointSample field incl. the
+    unwrapped ticks and COMM results, and ``raw_ticks``: the position
+    registers exactly as the bus returned them, NaN where a servo did not
+    answer); ``goals`` one row per SYNC_WRITE (goal ticks,
+    speed, acc and the write's COMM result). Columns are joint_order wide; a
+    bus shard fills only its own joints. A background thread appends rows to
+    ``<path>/<table>.<column>.bin`` every ``flush_interval`` seconds.
+    """
+
+    def __init__(self, path: str, joint_names: Sequence[str], motor_ids: Sequence[int],
+                 chunk_rows: int = 4096, flush_interval: float = 0.5):
+        self.path = path
+        if os.path.exists(os.path.join(path, "meta.json")):
+            raise FileExistsError(f"{path} already holds a recording")
+        os.makedirs(path, exist_ok=True)
+        n = len(joint_names)
+        self.state = _Table(path, "state", _state_columns(n), chunk_rows)
+        self.goals = _Table(path, "goals", _goal_columns(n), chunk_rows)
+        self._slot_of = {int(sid): i for i, sid in enumerate(motor_ids)}
+        self._meta = {
+            "version": FORMAT_VERSION, "joint_names": list(joint_names), "motor_ids": [int(s) for s in motor_ids],
+            "started": time.time(), "started_monotonic": time.monotonic(),
+            "tables": {t.name: {col: [dtype, list(shape)] for col, (dtype, shape) in t.columns.items()}
+                       for t in (self.state, self.goals)},
+        }
+        self._write_meta()
+
+        self._stop = threading.Event()
+        self._flush_interval = flush_interval
+        self._thread = threading.Thread(target=self._flusher, daemon=True, name="arkbot-recorder")
+        self._thread.start()
+
+    def _write_meta(self) -> None:
+        atomic_write(os.path.join(self.path, "meta.json"), lambda f: f.write(json.dumps(self._meta, indent=1).encode()))
+
+    def record_state(self, slots: np.ndarray, sample: JointSample, raw_ticks=None) -> None:
+        table = self.state
+        with table._lock:
+            chunk, i = table.row()
+            chunk["t"][i] = sample.stamp
+            chunk["wall"][i] = time.time()
+            for name in _ARRAY_FIELDS:
+                chunk[name][i, slots] = getattr(sample, name)
+            if raw_ticks is not None:
+                chunk["raw_ticks"][i, slots] = raw_ticks
+
+    def record_goals(self, goals: Dict[int, Tuple[int, int, int]], result: int) -> None:
+        table = self.goals
+        slot_of = self._slot_of
+        with table._lock:
+            chunk, i = table.row()
+            chunk["t"][i] = time.monotonic()
+            chunk["result"][i] = result
+            goal, speed, acc = chunk["goal"][i], chunk["speed"][i], chunk["acc"][i]
+            for sid, (position, spd, a) in goals.items():
+                slot = slot_of[sid]
+                goal[slot], speed[slot], acc[slot] = position, spd, a
+
+    def _flusher(self) -> None:
+        while not self._stop.wait(self._flush_interval):
+            self.flush()
+
+    def flush(self) -> None:
+        try:
+            self.state.flush()
+            self.goals.flush()
+        except Exception as e:
+            _trace.error("recorder %s: %r", self.path, e)
+
+    def close(self) -> None:
+        self._stop.set()
+        self._thread.join(timeout=2.0)
+        self.state.close()
+        self.goals.close()
+        self._meta["rows"] = {"state": self.state.rows, "goals": self.goals.rows}
+        self._write_meta()
+
+
+class RecordingLog:
+    """A Recorder directory opened for reading; every column is a read-only memmap (N rows x ...)."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, "meta.json")) as f:
+            self.meta = json.load(f)
+        if self.meta.get("version") != FORMAT_VERSION:
+            raise ValueError(f"{path}: recording format {self.meta.get('version')}, expected {FORMAT_VERSION}")
+        self.joint_names: List[str] = self.meta["joint_names"]
+        self.motor_ids: List[int] = self.meta["motor_ids"]
+        self.state = self._open("state")
+        self.goals = self._open("goals")
+
+    def _open(self, table: str) -> Dict[str, np.ndarray]:
+        spec = {col: (np.dtype(dtype), tuple(shape)) for col, (dtype, shape) in self.meta["tables"][table].items()}
+        paths = {col: os.path.join(self.path, f"{table}.{col}.bin") for col in spec}
+        # a log still being written may have some columns a row ahead of others
+        rows = min(os.path.getsize(paths[col]) // (dt.itemsize * int(np.prod(shape, dtype=np.int64)))
+                   for col, (dt, shape) in spec.items())
+        if rows == 0:
+            return {col: np.empty((0,) + shape, dt) for col, (dt, shape) in spec.items()}
+        return {col: np.memmap(paths[col], dt, "r", 0, (rows,) + shape) for col, (dt, shape) in spec.items()}
+
+    def samples(self) -> Iterator[JointSample]:
+        """State rows as JointSamples (views into the log)."""
+        st = self.state
+        for i in range(len(st["t"])):
+            yield JointSample(*(st[name][i] for name in _ARRAY_FIELDS), float(st["t"][i]))
+
+    def goal_writes(self) -> Iterator[Tuple[float, Dict[int, Tuple[int, int, int]]]]:
+        """(time, {sid: (goal, speed, acc)}) per recorded SYNC_WRITE."""
+        g = self.goals
+        sids = np.asarray(self.motor_ids)
+        for i in range(len(g["t"])):
+            sent = np.flatnonzero(np.isfinite(g["goal"][i]))
+            yield float(g["t"][i]), {int(sids[s]): (int(g["goal"][i, s]), int(g["speed"][i, s]), int(g["acc"][i, s]))
+                                     for s in sent}
+
+
+def _paced(times: Iterator[float], speed: float, stop: Optional[threading.Event]) -> Iterator[None]:
+    """Sleep so that successive ``times`` are reproduced ``speed`` times faster than recorded."""
+    t_log0 = t_wall0 = None
+    for t in times:
+        if stop is not None and stop.is_set():
+            return
+        now = time.monotonic()
+        if t_log0 is None:
+            t_log0, t_wall0 = t, now
+        elif speed > 0:
+            delay = t_wall0 + (t - t_log0) / speed - now
+            if delay > 0:
+                time.sleep(delay)
+        yield
+
+
+def replay_goals(log: RecordingLog, buses, speed: float = 1.0, stop: Optional[threading.Event] = None) -> int:
+    """Re-send every recorded SYNC_WRITE to ``buses`` (ServoBus objects, e.g. ``driver.buses`` or buses
+    on servopkg.emulator ports) with the original spacing, ``speed`` times faster (0 = as fast as possible).
+    Returns the number of writes sent."""
+    bus_of = {sid: bus for bus in buses for sid in bus.motor_ids}
+    writes = list(log.goal_writes())
+    sent = 0
+    for (_, goals), _ in zip(writes, _paced((t for t, _ in writes), speed, stop)):
+        by_bus: Dict[object, Dict[int, Tuple[int, int, int]]] = {}
+        for sid, goal in goals.items():
+            if sid in bus_of:
+                by_bus.setdefault(bus_of[sid], {})[sid] = goal
+        for bus, part in by_bus.items():
+            bus.writeGoals(part)
+        sent += 1
+    return sent
+
+
+def replay_states(log: RecordingLog, speed: float = 1.0, stop: Optional[threading.Event] = None) -> Iterator[JointSample]:
+    """Recorded JointSamples paced like the original run (``speed`` times faster), e.g. to drive a simulator."""
+    samples = list(log.samples())
+    for sample, _ in zip(samples, _paced((s.stamp for s in samples), speed, stop)):
+        yield sample
@@ -1,8 +1,12 @@
 #!/usr/bin/env python
 
 from .port_handler import *
+from .packet_codec import *
 from .protocol_packet_handler import *
 from .group_sync_write import *
 from .group_sync_read import *
 from .st_servo import *
+from .async_bus import *
+from .bus import *
 from .bytes import *
+from .bus_stats import *
@@ -0,0 +1,289 @@
+#!/usr/bin/env python
+"""asyncio front end for an STS bus.
+
+``AsyncServoBus`` owns a ``PortHandler`` and runs every transaction through a
+single worker task, so any number of coroutines can issue requests without a
+lock: the queue is the only thing that touches the wire. On POSIX serial ports
+replies are collected by a reader registered on the fd; ports without one
+(e.g. ``VirtualPortHandler``) are polled at byte-time granularity.
+
+    async with AsyncServoBus(port) as bus:
+        ticks = await bus.ReadAbsPos(1)
+        await asyncio.gather(*(bus.WritePosEx(sid, 2048, 800, 50) for sid in ids))
+
+As on ``sts``, ``SyncWritePosEx`` only queues a goal; the queued goals go
+out as one SYNC_WRITE with ``await bus.groupSyncWrite.txPacket()``.
+"""
+
+import asyncio
+import os
+
+from .bytes import *
+from .group_sync_write import GroupSyncWrite
+from .port_handler import RX_MODE_SPIN
+from .protocol_packet_handler import protocol_packet_handler
+
+
+class AsyncGroupSyncWrite(GroupSyncWrite):
+    """GroupSyncWrite on an AsyncServoBus: same params, awaitable txPacket."""
+
+    async def txPacket(self):
+        if len(self.data_dict.keys()) == 0:
+            return COMM_NOT_AVAILABLE
+        return await self.ph.sync_write(self.start_address, self.data_length, self.data_dict)
+
+
+class AsyncServoBus(object):
+    def __init__(self, portHandler, protocol_end=0):
+        self.portHandler = portHandler
+        # the bus reads without blocking; select mode would stall the event loop
+        self.portHandler.setRxMode(RX_MODE_SPIN)
+        self.ph = protocol_packet_handler(portHandler, protocol_end)
+        self.groupSyncWrite = AsyncGroupSyncWrite(self, STS_ACC, 7)
+
+        self._queue = None
+        self._worker = None
+        self._rx = bytearray()
+        self._rx_event = None
+        self._fd = None
+
+    # ---- lifecycle ----
+
+    async def start(self):
+        if self._worker is not None:
+            return self
+        loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        self._rx_event = asyncio.Event()
+        ser = getattr(self.portHandler, "ser", None)
+        if ser is not None and hasattr(ser, "fileno"):
+            try:
+                self._fd = ser.fileno()
+                loop.add_reader(self._fd, self._on_readable)
+            except (NotImplementedError, OSError, ValueError):
+                self._fd = None
+        self._worker = loop.create_task(self._run())
+        return self
+
+    async def close(self):
+        if self._worker is None:
+            return
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        if self._fd is not None:
+            asyncio.get_running_loop().remove_reader(self._fd)
+            self._fd = None
+        self._worker = None
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    # ---- transaction queue ----
+
+    async def _submit(self, packet, instruction, reply_ids, reply_length):
+        if self._worker is None:
+            await self.start()
+        fut = asyncio.get_running_loop().create_future()
+        # the codec buffer is reused, so the queued packet must be a copy
+        await self._queue.put((bytes(packet), instruction, reply_ids, reply_length, fut))
+        return await fut
+
+    async def _run(self):
+        while True:
+            packet, instruction, reply_ids, reply_length, fut = await self._queue.get()
+            if fut.cancelled():
+                continue
+            try:
+                result = await self._exchange(packet, instruction, reply_ids, reply_length)
+            except Exception as e:
+                if not fut.cancelled():
+                    fut.set_exception(e)
+            else:
+                if not fut.cancelled():
+                    fut.set_result(result)
+
+    async def _exchange(self, packet, instruction, reply_ids, reply_length):
+        """Send one packet and collect a status packet from each of ``reply_ids``.
+
+        Returns ``{sts_id: (params, error)}`` for the replies that arrived intact
+        and the overall COMM_* result.
+        """
+        port = self.portHandler
+        self._drain()
+        if port.writePort(packet) != len(packet):
+            return {}, COMM_TX_FAIL
+        if not reply_ids:
+            return {}, COMM_SUCCESS
+
+        loop = asyncio.get_running_loop()
+        wire_time = port.tx_time_per_byte * ((reply_length + 6) * len(reply_ids) + 3)
+        deadline = loop.time() + (wire_time + port.getLatencyTimer(instruction)) / 1000.0
+        poll = max(port.tx_time_per_byte * 4 / 1000.0, 0.0001)
+
+        replies = {}
+        corrupt = False
+        while True:
+            corrupt |= self._parse(replies, reply_ids)
+            if len(replies) == len(reply_ids):
+                return replies, COMM_SUCCESS
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                if replies or corrupt or self._rx:
+                    return replies, COMM_RX_CORRUPT
+                return replies, COMM_RX_TIMEOUT
+            await self._wait(min(remaining, poll) if self._fd is None else remaining)
+
+    def _on_readable(self):
+        try:
+            data = os.read(self._fd, RXPACKET_MAX_LEN)
+        except (BlockingIOError, InterruptedError):
+            return
+        if data:
+            self._rx.extend(data)
+            self._rx_event.set()
+
+    async def _wait(self, timeout):
+        if self._fd is None:
+            await asyncio.sleep(timeout)
+            self._rx.extend(self.portHandler.readPort(RXPACKET_MAX_LEN))
+            return
+        self._rx_event.clear()
+        try:
+            await asyncio.wait_for(self._rx_event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    def _drain(self):
+        # anything still buffered belongs to an earlier, abandoned transaction
+        if self._fd is None:
+            while self.portHandler.readPort(RXPACKET_MAX_LEN):
+                pass
+        self._rx.clear()
+
+    def _parse(self, replies, reply_ids):
+        """Move every complete status packet out of the rx buffer; returns True if one was corrupt."""
+        rx = self._rx
+        corrupt = False
+        while True:
+            start = rx.find(b"\xff\xff")
+            if start < 0:
+                del rx[:max(0, len(rx) - 1)]
+                return corrupt
+            if start:
+                del rx[:start]
+            if len(rx) < 6:
+                return corrupt
+            if rx[PKT_ID] > 0xFD or rx[PKT_LENGTH] > RXPACKET_MAX_LEN or rx[PKT_ERROR] > 0x7F:
+                del rx[0]
+                continue
+            total = rx[PKT_LENGTH] + 4
+            if len(rx) < total:
+                return corrupt
+            sts_id = rx[PKT_ID]
+            if ~sum(rx[2:total - 1]) & 0xFF != rx[total - 1]:
+                corrupt = True
+            elif sts_id in reply_ids:
+                replies[sts_id] = (bytes(rx[PKT_PARAMETER0:total - 1]), rx[PKT_ERROR])
+            del rx[:total]
+
+    # ---- instructions ----
+
+    async def ping(self, sts_id):
+        if sts_id >= BROADCAST_ID:
+            return 0, COMM_NOT_AVAILABLE, 0
+        packet = self.ph.codec.packInstruction(sts_id, INST_PING)
+        replies, result = await self._submit(packet, INST_PING, (sts_id,), 0)
+        if result != COMM_SUCCESS:
+            return 0, result, 0
+        data, result, error = await self.read(sts_id, STS_MODEL_L, 2)
+        model_number = self.ph.sts_makeword(data[0], data[1]) if result == COMM_SUCCESS else 0
+        return model_number, result, error
+
+    async def read(self, sts_id, address, length):
+        if sts_id >= BROADCAST_ID:
+            return [], COMM_NOT_AVAILABLE, 0
+        packet = self.ph.codec.packInstruction(sts_id, INST_READ, address, length)
+        replies, result = await self._submit(packet, INST_READ, (sts_id,), length)
+        if sts_id not in replies:
+            return [], result, 0
+        params, error = replies[sts_id]
+        if len(params) < length:
+            return [], COMM_RX_CORRUPT, error  # answered, but not with all the bytes asked for
+        return list(params[:length]), result, error
+
+    async def write(self, sts_id, address, data, instruction=INST_WRITE):
+        packet = self.ph.codec.packWrite(sts_id, instruction, address, len(data), data)
+        if packet is None:
+            return COMM_TX_ERROR, 0
+        reply_ids = () if sts_id == BROADCAST_ID else (sts_id,)
+        replies, result = await self._submit(packet, instruction, reply_ids, 0)
+        return result, replies[sts_id][1] if sts_id in replies else 0
+
+    async def sync_read(self, address, length, sts_ids):
+        """Returns ``{sts_id: (data, result, error)}``; servos that missed their slot get COMM_RX_TIMEOUT."""
+        sts_ids = tuple(sts_ids)
+        packet = self.ph.codec.packSync(INST_SYNC_READ, address, length, sts_ids, len(sts_ids))
+        if packet is None:
+            return {sid: ([], COMM_TX_ERROR, 0) for sid in sts_ids}
+        replies, _ = await self._submit(packet, INST_SYNC_READ, sts_ids, length)
+        out = {}
+        for sid in sts_ids:
+            if sid in replies:
+                params, error = replies[sid]
+                out[sid] = (list(params[:length]), COMM_SUCCESS, error) if len(params) >= length else ([], COMM_RX_CORRUPT, error)
+            else:
+                out[sid] = ([], COMM_RX_TIMEOUT, 0)
+        return out
+
+    async def sync_write(self, address, length, data_by_id):
+        param = []
+        for sid, data in data_by_id.items():
+            param.append(sid)
+            param.extend(data[0:length])
+        packet = self.ph.codec.packSync(INST_SYNC_WRITE, address, length, param, len(param))
+        if packet is None:
+            return COMM_TX_ERROR
+        _, result = await self._submit(packet, INST_SYNC_WRITE, (), 0)
+        return result
+
+    # ---- sts helpers ----
+
+    async def ReadAbsPos(self, sts_id):
+        data, result, error = await self.read(sts_id, STS_ABSPOS, 2)
+        if result == COMM_SUCCESS and error == 0:
+            return self.ph.sts_makeword(data[0], data[1])
+        return None
+
+    async def WritePosEx(self, sts_id, position, speed, acc):
+        ph = self.ph
+        data = [acc, ph.sts_lobyte(position), ph.sts_hibyte(position), 0, 0, ph.sts_lobyte(speed), ph.sts_hibyte(speed)]
+        return await self.write(sts_id, STS_ACC, data)
+
+    def SyncWritePosEx(self, sts_id, position, speed, acc):
+        ph = self.ph
+        txpacket = [acc, ph.sts_lobyte(position), ph.sts_hibyte(position), 0, 0, ph.sts_lobyte(speed), ph.sts_hibyte(speed)]
+        return self.groupSyncWrite.addParam(sts_id, txpacket)
+
+    async def ReadPosSpeedAccCurrent(self, sts_id):
+        ph = self.ph
+        data, comm1, err1 = await self.read(sts_id, STS_PRESENT_POSITION_L, 4)
+        pos = speed = 0
+        if comm1 == COMM_SUCCESS:
+            pos = ph.sts_tohost(ph.sts_makeword(data[0], data[1]), 15)
+            speed = ph.sts_tohost(ph.sts_makeword(data[2], data[3]), 15)
+
+        data, comm2, err2 = await self.read(sts_id, STS_ACC, 1)
+        acc = data[0] if comm2 == COMM_SUCCESS else 0
+
+        data, comm3, err3 = await self.read(sts_id, STS_PRESENT_CURRENT_L, 2)
+        current = ph.sts_tohost(ph.sts_makeword(data[0], data[1]), 15) if comm3 == COMM_SUCCESS else 0
+
+        comm_result = next((c for c in (comm1, comm2, comm3) if c != 0), 0)
+        sts_error = next((e for e in (err1, err2, err3) if e != 0), 0)
+        return pos, speed, acc, current, comm_result, sts_error
@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+
+from .bytes import *
+from .bus_stats import TimedLock
+from .port_handler import PortHandler, DEFAULT_BAUDRATE, RX_MODE_SPIN
+from .group_sync_read import GroupSyncRead
+from .st_servo import sts
+
+
+class ServoBus(object):
+    """One serial adapter: its PortHandler, an sts SDK on it, and the lock that
+    serialises transactions. ``motor_ids`` are the servos wired to this adapter."""
+
+    def __init__(self, port_name, baudrate=DEFAULT_BAUDRATE, motor_ids=(), rx_mode=RX_MODE_SPIN):
+        self.port_name = port_name
+        self.baudrate = int(baudrate)
+        self.motor_ids = [int(sid) for sid in motor_ids]
+
+        self.port = PortHandler(port_name, rx_mode)
+        if not self.port.openPort():
+            raise RuntimeError(f"Failed to open port {port_name}")
+        if not self.port.setBaudRate(self.baudrate):
+            self.port.closePort()
+            raise RuntimeError(f"Failed to set baudrate {self.baudrate} on {port_name}")
+        self.sdk = sts(self.port)
+        self.lock = TimedLock(self.port.stats)  # serialises transactions; waits land in stats.lock_wait_us
+
+        self.status_reader = GroupSyncRead(self.sdk, STS_PRESENT_POSITION_L, STS_STATUS_LENGTH)
+        for sid in self.motor_ids:
+            self.status_reader.addParam(sid)
+        # COMM_* result of each servo's part of the last readStatus, in motor_ids order
+        self.last_comm = [COMM_NOT_AVAILABLE] * len(self.motor_ids)
+        # status error byte (overload, overheat, ... bits) each servo sent with it; 0 = no alarm
+        self.last_error = [0] * len(self.motor_ids)
+
+    def readStatus(self, bulk=True):
+        """ServoStatus (or None if it did not answer) for every motor on the bus, in motor_ids order."""
+        sdk = self.sdk
+        by_sid, errors = {}, {}
+        if bulk and self.motor_ids:
+            with self.lock:
+                self.status_reader.txRxPacket()
+                by_sid = sdk.SyncReadStatus(self.status_reader, errors)
+
+        # Only servos that missed their slot pay for an individual round-trip
+        out = []
+        for i, sid in enumerate(self.motor_ids):
+            status = by_sid.get(sid)
+            result, error = COMM_SUCCESS, errors.get(sid, 0)
+            if bulk:
+                self.port.stats.countServo(sid, "sync_read_ok" if status is not None else "sync_read_miss")
+            if status is None:
+                with self.lock:
+                    status, result, error = sdk.ReadStatus(sid)
+            if error and status is not None:
+                self.port.stats.countServo(sid, "status_error")
+            self.last_comm[i] = result
+            self.last_error[i] = error
+            out.append(status)
+        return out
+
+    def writeGoals(self, goals):
+        """One SYNC_WRITE of {sts_id: (position, speed, acc)}."""
+        if not goals:
+            return COMM_SUCCESS
+        group = self.sdk.groupSyncWrite
+        with self.lock:
+            for sid, (position, speed, acc) in goals.items():
+                self.sdk.SyncWritePosEx(sid, position & 0xFFFF, speed, acc)
+            result = group.txPacket()
+            group.clearParam()
+        return result
+
+    def getStats(self):
+        """BusStats snapshot plus the port's timeout / latency allowance figures."""
+        out = self.port.stats.snapshot()
+        out["timing"] = self.port.getTimingStats()
+        return out
+
+    def close(self):
+        try:
+            self.port.closePort()
+        except Exception:
+            pass
@@ -0,0 +1,159 @@
+#!/usr/bin/env python
+"""Bus health counters and latency histograms.
+
+Every PortHandler carries a ``BusStats``. The protocol layer records each
+transaction (instruction, servo, COMM result, round-trip time, bytes each
+way) and ServoBus's lock records how long callers waited for the bus.
+Histograms use power-of-two buckets, so recording is an int.bit_length()
+and a list increment; all recording happens with the bus lock held.
+
+    stats = bus.port.stats
+    stats.snapshot()["rtt_us"]["sync_read"]["p99"]
+"""
+
+import threading
+import time
+
+from .bytes import *
+
+HISTOGRAM_BUCKETS = 24  # bucket i holds values in [2**(i-1), 2**i); the last one is open-ended
+
+_RESULT_NAMES = {
+    COMM_SUCCESS: "ok",
+    COMM_PORT_BUSY: "port_busy",
+    COMM_TX_FAIL: "tx_fail",
+    COMM_RX_FAIL: "rx_fail",
+    COMM_TX_ERROR: "tx_error",
+    COMM_RX_WAITING: "rx_waiting",
+    COMM_RX_TIMEOUT: "timeout",
+    COMM_RX_CORRUPT: "corrupt",
+    COMM_NOT_AVAILABLE: "not_available",
+}
+_INST_LABELS = {inst: name for name, inst in INST_NAMES.items()}
+
+
+def resultName(result):
+    return _RESULT_NAMES.get(result, str(result))
+
+
+def instructionName(instruction):
+    return _INST_LABELS.get(instruction, str(instruction))
+
+
+class Histogram(object):
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self):
+        self.counts = [0] * HISTOGRAM_BUCKETS
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def add(self, value):
+        value = int(value)
+        i = value.bit_length()
+        self.counts[i if i < HISTOGRAM_BUCKETS else HISTOGRAM_BUCKETS - 1] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, p):
+        """Upper edge of the bucket holding the p-quantile (0 < p <= 1); an over-estimate by at most 2x."""
+        if not self.count:
+            return 0
+        rank = p * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return min(1 << i, self.max) if i else 0
+        return self.max
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "p50": self.percentile(0.5),
+            "p99": self.percentile(0.99),
+            "max": self.max,
+            # upper bucket edge -> count, non-empty buckets only
+            "buckets": {(1 << i) if i else 0: n for i, n in enumerate(self.counts) if n},
+        }
+
+
+class BusStats(object):
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.started = time.monotonic()
+        self.transactions = {}  # (instruction, result) -> count
+        self.servos = {}        # sts_id -> {counter name: count}
+        self.rtt_us = {}        # instruction -> Histogram
+        self.lock_wait_us = Histogram()
+        self.tx_bytes = Histogram()
+        self.rx_bytes = Histogram()
+
+    def record(self, instruction, sts_id, result, rtt_ns, tx_bytes, rx_bytes, error=0):
+        """One transaction on the wire; ``sts_id`` is BROADCAST_ID for SYNC_READ/SYNC_WRITE."""
+        key = (instruction, result)
+        self.transactions[key] = self.transactions.get(key, 0) + 1
+        hist = self.rtt_us.get(instruction)
+        if hist is None:
+            hist = self.rtt_us[instruction] = Histogram()
+        hist.add(rtt_ns // 1000)
+        self.tx_bytes.add(tx_bytes)
+        if rx_bytes:
+            self.rx_bytes.add(rx_bytes)
+        if sts_id != BROADCAST_ID:
+            self.countServo(sts_id, resultName(result))
+            if error:
+                self.countServo(sts_id, "status_error")
+
+    def countServo(self, sts_id, counter):
+        counts = self.servos.get(sts_id)
+        if counts is None:
+            counts = self.servos[sts_id] = {}
+        counts[counter] = counts.get(counter, 0) + 1
+
+    def snapshot(self):
+        """Plain-dict copy of everything, safe to serialise or diff against an earlier snapshot."""
+        transactions = {}
+        for (inst, result), n in list(self.transactions.items()):
+            transactions.setdefault(instructionName(inst), {})[resultName(result)] = n
+        return {
+            "uptime_s": time.monotonic() - self.started,
+            "transactions": transactions,
+            "servos": {sid: dict(counts) for sid, counts in list(self.servos.items())},
+            "rtt_us": {instructionName(inst): h.summary() for inst, h in list(self.rtt_us.items())},
+            "lock_wait_us": self.lock_wait_us.summary(),
+            "tx_bytes": self.tx_bytes.summary(),
+            "rx_bytes": self.rx_bytes.summary(),
+        }
+
+
+class TimedLock(object):
+    """threading.Lock that records how long each acquire waited into ``stats.lock_wait_us``."""
+
+    def __init__(self, stats):
+        self.stats = stats
+        self._lock = threading.Lock()
+
+    def acquire(self, blocking=True, timeout=-1):
+        t0 = time.perf_counter_ns()
+        ok = self._lock.acquire(blocking, timeout)
+        if ok:
+            self.stats.lock_wait_us.add((time.perf_counter_ns() - t0) // 1000)
+        return ok
+
+    def release(self):
+        self._lock.release()
+
+    def locked(self):
+        return self._lock.locked()
+
+    __enter__ = acquire
+
+    def __exit__(self, *exc):
+        self._lock.release()
@@ -11,6 +11,17 @@ INST_ACTION = 5
 INST_SYNC_WRITE = 131  # 0x83
 INST_SYNC_READ = 130  # 0x82
 
+# Instruction names as used in config files
+INST_NAMES = {
+    "ping": INST_PING,
+    "read": INST_READ,
+    "write": INST_WRITE,
+    "reg_write": INST_REG_WRITE,
+    "action": INST_ACTION,
+    "sync_write": INST_SYNC_WRITE,
+    "sync_read": INST_SYNC_READ,
+}
+
 # Communication Result
 COMM_SUCCESS = 0  # tx or rx packet communication success
 COMM_PORT_BUSY = -1  # Port is busy (in use)
@@ -95,3 +106,4 @@ STS_MOVING = 66
 STS_ABSPOS = 67
 STS_PRESENT_CURRENT_L = 69
 STS_PRESENT_CURRENT_H = 70
+STS_STATUS_LENGTH = STS_PRESENT_CURRENT_H + 1 - STS_PRESENT_POSITION_L  # 56..70 in one read
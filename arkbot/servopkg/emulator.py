@@ -0,0 +1,335 @@
+#!/usr/bin/env python
+"""Loopback STS bus emulator for exercising servopkg without hardware.
+
+``VirtualPortHandler`` is a drop-in ``PortHandler`` whose wire is a
+``ServoChain`` of ``SimulatedServo`` control tables. Replies become readable
+only after the modelled wire time (10 bits per byte at the port baud rate),
+the servo return delay and an optional adapter latency, so throughput
+numbers scale like they do on a real bus.
+
+    port = VirtualPortHandler(ServoChain([1, 2, 3]))
+    port.openPort()
+    packet = sts(port)
+
+``PtyServoBridge`` serves the same chain on a pseudo-terminal so an
+unmodified ``PortHandler`` (pyserial) can open it by name.
+"""
+
+import os
+import random
+import threading
+import time
+from collections import deque
+
+from .bytes import *
+from .port_handler import PortHandler, RX_MODE_SPIN, RX_MODE_SELECT
+
+STS_RETURN_DELAY = 7  # return delay time, 2 us per unit
+
+CONTROL_TABLE_SIZE = 128
+DEFAULT_MODEL = 777  # ST3215
+DEFAULT_SPEED = 3400  # steps/s when goal speed is 0 (full speed)
+
+
+def _checksum(body):
+    return ~sum(body) & 0xFF
+
+
+def _status_packet(sts_id, error, params=b""):
+    body = bytes([sts_id, len(params) + 2, error]) + bytes(params)
+    return b"\xff\xff" + body + bytes([_checksum(body)])
+
+
+class SimulatedServo(object):
+    """STS control table plus a constant-speed motion model."""
+
+    def __init__(self, sts_id, position=2048, model=DEFAULT_MODEL, return_delay_us=0):
+        self.table = bytearray(CONTROL_TABLE_SIZE)
+        self.table[STS_MODEL_L] = model & 0xFF
+        self.table[STS_MODEL_H] = (model >> 8) & 0xFF
+        self.table[STS_ID] = sts_id
+        self.table[STS_RETURN_DELAY] = int(return_delay_us) // 2
+        self.table[STS_TORQUE_ENABLE] = 1
+        self.table[STS_LOCK] = 1
+        self.table[STS_PRESENT_VOLTAGE] = 120
+        self.table[STS_PRESENT_TEMPERATURE] = 30
+
+        self.position = float(position)  # multi-turn ticks
+        self.goal = float(position)
+        self.registered = None
+        self.error = 0  # status error byte sent with every reply (ERRBIT_* alarm bits)
+        self.eeprom_writes = 0
+        self._last_update = time.perf_counter()
+        self._sync_table()
+
+    @property
+    def sts_id(self):
+        return self.table[STS_ID]
+
+    @property
+    def return_delay(self):
+        return self.table[STS_RETURN_DELAY] * 2e-6
+
+    def _word(self, address):
+        return self.table[address] | (self.table[address + 1] << 8)
+
+    def _set_word(self, address, value):
+        self.table[address] = value & 0xFF
+        self.table[address + 1] = (value >> 8) & 0xFF
+
+    def update(self, now=None):
+        now = time.perf_counter() if now is None else now
+        dt = now - self._last_update
+        self._last_update = now
+        delta = self.goal - self.position
+        speed = 0.0
+        if delta and self.table[STS_TORQUE_ENABLE]:
+            speed = float(self._word(STS_GOAL_SPEED_L) & 0x7FFF) or DEFAULT_SPEED
+            step = min(abs(delta), speed * dt)
+            self.position += step if delta > 0 else -step
+            speed = speed if delta > 0 else -speed
+            if abs(self.goal - self.position) < 1e-6:
+                speed = 0.0
+        self._sync_table(speed)
+
+    def _sync_table(self, speed=0.0):
+        pos = int(round(self.position))
+        self._set_word(STS_PRESENT_POSITION_L, (-pos | 0x8000) if pos < 0 else pos)
+        spd = int(round(speed))
+        self._set_word(STS_PRESENT_SPEED_L, (-spd | 0x8000) if spd < 0 else spd)
+        self.table[STS_MOVING] = 1 if spd else 0
+        # crude load/current model: a fixed effort, signed with the direction of travel
+        load = 0 if not spd else (200 if spd > 0 else 200 | 0x400)
+        self._set_word(STS_PRESENT_LOAD_L, load)
+        self._set_word(STS_PRESENT_CURRENT_L, 30 if spd else 2)
+        self._set_word(STS_ABSPOS, pos % 4096)
+
+    def read(self, address, length):
+        self.update()
+        return bytes(self.table[address:address + length]).ljust(length, b"\x00")
+
+    def write(self, address, data):
+        self.update()
+        for offset, value in enumerate(data):
+            addr = address + offset
+            if addr >= CONTROL_TABLE_SIZE:
+                break
+            if addr < STS_TORQUE_ENABLE:
+                self.eeprom_writes += 1
+            self.table[addr] = value & 0xFF
+        if address <= STS_GOAL_POSITION_H and address + len(data) > STS_GOAL_POSITION_L:
+            goal = self._word(STS_GOAL_POSITION_L)
+            self.goal = float(-(goal & 0x7FFF) if goal & 0x8000 else goal)
+        if address <= STS_TORQUE_ENABLE < address + len(data) and self.table[STS_TORQUE_ENABLE] == 128:
+            # SetMiddle: current position becomes 2048
+            self.position = self.goal = 2048.0
+            self.table[STS_TORQUE_ENABLE] = 1
+            self._sync_table()
+
+
+class ServoChain(object):
+    """A daisy chain of simulated servos that answers instruction packets.
+
+    ``drop_rate`` is the probability a servo stays silent, ``corrupt_rate``
+    the probability one byte of a status packet is flipped; ``seed`` makes
+    both reproducible.
+    """
+
+    def __init__(self, servos, drop_rate=0.0, corrupt_rate=0.0, seed=None):
+        self.servos = {}
+        for servo in servos:
+            if not isinstance(servo, SimulatedServo):
+                servo = SimulatedServo(int(servo))
+            self.servos[servo.sts_id] = servo
+        self.drop_rate = drop_rate
+        self.corrupt_rate = corrupt_rate
+        self.rng = random.Random(seed)
+        self.stats = {"packets": 0, "bad_checksum": 0, "dropped": 0, "corrupted": 0}
+        self._buffer = bytearray()
+
+    def feed(self, data):
+        """Consume raw bytes from the host; return ``[(return_delay_s, status_packet), ...]``."""
+        self._buffer.extend(data)
+        replies = []
+        buf = self._buffer
+        while True:
+            start = buf.find(b"\xff\xff")
+            if start < 0:
+                del buf[:max(0, len(buf) - 1)]
+                break
+            del buf[:start]
+            if len(buf) < 4:
+                break
+            total = buf[PKT_LENGTH] + 4
+            if len(buf) < total:
+                break
+            packet = bytes(buf[:total])
+            del buf[:total]
+            if _checksum(packet[2:-1]) != packet[-1]:
+                self.stats["bad_checksum"] += 1
+                continue
+            self.stats["packets"] += 1
+            replies.extend(self.handle(packet[PKT_ID], packet[PKT_INSTRUCTION], packet[PKT_PARAMETER0:-1]))
+        return replies
+
+    def handle(self, sts_id, inst, params):
+        if inst == INST_SYNC_WRITE:
+            address, length = params[0], params[1]
+            for i in range(2, len(params) - length, length + 1):
+                servo = self.servos.get(params[i])
+                if servo is not None:
+                    servo.write(address, params[i + 1:i + 1 + length])
+            return []
+
+        if inst == INST_SYNC_READ:
+            address, length = params[0], params[1]
+            replies = []
+            for target in params[2:]:
+                servo = self.servos.get(target)
+                if servo is not None:
+                    replies.extend(self._reply(servo, servo.read(address, length)))
+            return replies
+
+        targets = list(self.servos.values()) if sts_id == BROADCAST_ID else [self.servos.get(sts_id)]
+        for servo in targets:
+            if servo is None:
+                continue
+            if inst == INST_WRITE:
+                servo.write(params[0], params[1:])
+                if servo.sts_id != sts_id and sts_id != BROADCAST_ID:
+                    self.servos = {s.sts_id: s for s in self.servos.values()}
+            elif inst == INST_REG_WRITE:
+                servo.registered = (params[0], bytes(params[1:]))
+            elif inst == INST_ACTION and servo.registered is not None:
+                servo.write(*servo.registered)
+                servo.registered = None
+
+        if sts_id == BROADCAST_ID or targets[0] is None:
+            return []
+        servo = targets[0]
+        if inst == INST_READ:
+            return self._reply(servo, servo.read(params[0], params[1]))
+        return self._reply(servo, b"", sts_id)
+
+    def _reply(self, servo, params, sts_id=None):
+        if self.drop_rate and self.rng.random() < self.drop_rate:
+            self.stats["dropped"] += 1
+            return []
+        packet = bytearray(_status_packet(servo.sts_id if sts_id is None else sts_id, servo.error, params))
+        if self.corrupt_rate and self.rng.random() < self.corrupt_rate:
+            self.stats["corrupted"] += 1
+            packet[self.rng.randrange(2, len(packet))] ^= 1 << self.rng.randrange(8)
+        return [(servo.return_delay, bytes(packet))]
+
+
+class VirtualPortHandler(PortHandler):
+    """PortHandler backed by a ServoChain instead of a serial device."""
+
+    def __init__(self, chain, port_name="virtual", adapter_latency_us=0.0, rx_mode=RX_MODE_SPIN):
+        PortHandler.__init__(self, port_name, rx_mode)
+        self.chain = chain
+        self.adapter_latency = adapter_latency_us * 1e-6
+        self.byte_time = 0.0
+        self._rx = deque()  # (arrival time, byte)
+        self._bus_free_at = 0.0
+
+    def setupPort(self, cflag_baud):
+        self.is_open = True
+        self._rx.clear()
+        self.tx_time_per_byte = (1000.0 / self.baudrate) * 10.0
+        self.byte_time = 10.0 / self.baudrate
+        return True
+
+    def closePort(self):
+        self.is_open = False
+
+    def clearPort(self):
+        pass
+
+    def getBytesAvailable(self):
+        now = time.perf_counter()
+        return sum(1 for t, _ in self._rx if t <= now)
+
+    def readPort(self, length):
+        rx = self._rx
+        if self.rx_mode == RX_MODE_SELECT:
+            # sleep like select() would: until the requested bytes are on the wire or the deadline
+            remaining = (self.packet_timeout - self.getTimeSinceStart()) / 1000.0
+            ready_at = rx[min(length, len(rx)) - 1][0] if rx else float("inf")
+            wait = min(ready_at - time.perf_counter(), remaining)
+            if wait > 0:
+                time.sleep(wait)
+        now = time.perf_counter()
+        out = bytearray()
+        while rx and len(out) < length and rx[0][0] <= now:
+            out.append(rx.popleft()[1])
+        return bytes(out)
+
+    def writePort(self, packet):
+        packet = bytes(packet)
+        now = time.perf_counter()
+        t = max(now, self._bus_free_at) + len(packet) * self.byte_time + self.adapter_latency
+        for delay, reply in self.chain.feed(packet):
+            t += delay
+            for b in reply:
+                t += self.byte_time
+                self._rx.append((t, b))
+        self._bus_free_at = t
+        return len(packet)
+
+    def waitBusIdle(self):
+        # spin until the last modelled byte has left the wire
+        while time.perf_counter() < self._bus_free_at:
+            pass
+
+
+class PtyServoBridge(object):
+    """Serve a ServoChain on a pseudo-terminal (Linux/macOS).
+
+    ``bridge.port_name`` can be handed to a regular PortHandler; replies are
+    held back by the same wire-time model as VirtualPortHandler.
+    """
+
+    def __init__(self, chain, baudrate=1000000):
+        import tty
+        self.chain = chain
+        self.byte_time = 10.0 / baudrate
+        self.master_fd, self.slave_fd = os.openpty()
+        tty.setraw(self.slave_fd)
+        self.port_name = os.ttyname(self.slave_fd)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._serve, daemon=True, name="sts-pty-bridge")
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join(timeout=1.0)
+        os.close(self.master_fd)
+        os.close(self.slave_fd)
+
+    def _serve(self):
+        import select
+        while not self._stop.is_set():
+            ready, _, _ = select.select([self.master_fd], [], [], 0.05)
+            if not ready:
+                continue
+            try:
+                data = os.read(self.master_fd, 1024)
+            except OSError:
+                break
+            t = time.perf_counter() + len(data) * self.byte_time
+            for delay, reply in self.chain.feed(data):
+                t += delay + len(reply) * self.byte_time
+                wait = t - time.perf_counter()
+                if wait > 0:
+                    time.sleep(wait)
+                os.write(self.master_fd, reply)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -52,6 +52,10 @@ class GroupSyncRead:
         if self.is_param_changed is True or not self.param:
             self.makeParam()
 
+        # drop last cycle's data so a servo that misses its slot reads as unavailable
+        for sts_id in self.data_dict:
+            self.data_dict[sts_id] = []
+
         return self.ph.syncReadTx(self.start_address, self.data_length, self.param, len(self.data_dict.keys()))
 
     def rxPacket(self):
@@ -140,12 +144,12 @@ class GroupSyncRead:
         if data_length == 1:
             return self.data_dict[sts_id][address-self.start_address+1]
         elif data_length == 2:
-            return self.ph.scs_makeword(self.data_dict[sts_id][address-self.start_address+1],
+            return self.ph.sts_makeword(self.data_dict[sts_id][address-self.start_address+1],
                                 self.data_dict[sts_id][address-self.start_address+2])
         elif data_length == 4:
-            return self.ph.scs_makedword(self.ph.scs_makeword(self.data_dict[sts_id][address-self.start_address+1],
+            return self.ph.sts_makedword(self.ph.sts_makeword(self.data_dict[sts_id][address-self.start_address+1],
                                               self.data_dict[sts_id][address-self.start_address+2]),
-                                 self.ph.scs_makeword(self.data_dict[sts_id][address-self.start_address+3],
+                                 self.ph.sts_makeword(self.data_dict[sts_id][address-self.start_address+3],
                                               self.data_dict[sts_id][address-self.start_address+4]))
         else:
             return 0
@@ -0,0 +1,188 @@
+#!/usr/bin/env python
+
+from .bytes import *
+
+HEADER = b"\xff\xff"
+RX_BUFFER_LEN = RXPACKET_MAX_LEN * 4
+_RX_MAX = RXPACKET_MAX_LEN
+
+
+class PacketCodec(object):
+    """Preallocated tx/rx packet buffers for one protocol_packet_handler.
+
+    Packets are packed and parsed in place and handed out as memoryviews, so a
+    transaction allocates no packet lists. A view is only valid until the next
+    packet in the same direction; copy out what you keep. Like the handler
+    itself, a codec must not be shared by concurrent transactions.
+    """
+
+    def __init__(self):
+        self.tx = bytearray(TXPACKET_MAX_LEN)
+        self.tx_view = memoryview(self.tx)
+
+        self.rx = bytearray(RX_BUFFER_LEN)
+        self.rx_view = memoryview(self.rx)
+
+    # ---- tx ----
+
+    def packInstruction(self, sts_id, instruction, *params):
+        tx = self.tx
+        length = len(params) + 2
+        tx[PKT_HEADER0] = 0xFF
+        tx[PKT_HEADER1] = 0xFF
+        tx[PKT_ID] = sts_id
+        tx[PKT_LENGTH] = length
+        tx[PKT_INSTRUCTION] = instruction
+        tx[PKT_PARAMETER0:PKT_PARAMETER0 + len(params)] = params
+        tx[length + 3] = ~(sts_id + length + instruction + sum(params)) & 0xFF
+        return self.tx_view[:length + 4]
+
+    def packWrite(self, sts_id, instruction, address, length, data):
+        total = length + 7
+        if total > TXPACKET_MAX_LEN:
+            return None
+        if len(data) != length:
+            data = data[0:length]
+        tx = self.tx
+        tx[PKT_HEADER0] = 0xFF
+        tx[PKT_HEADER1] = 0xFF
+        tx[PKT_ID] = sts_id
+        tx[PKT_LENGTH] = length + 3
+        tx[PKT_INSTRUCTION] = instruction
+        tx[PKT_PARAMETER0] = address
+        tx[PKT_PARAMETER0 + 1:PKT_PARAMETER0 + 1 + length] = data
+        tx[total - 1] = ~(sts_id + length + 3 + instruction + address + sum(data)) & 0xFF
+        return self.tx_view[:total]
+
+    def packSync(self, instruction, start_address, data_length, param, param_length):
+        # 8: HEADER0 HEADER1 ID LEN INST START_ADDR DATA_LEN ... CHKSUM
+        total = param_length + 8
+        if total > TXPACKET_MAX_LEN:
+            return None
+        if len(param) != param_length:
+            param = param[0:param_length]
+        tx = self.tx
+        tx[PKT_HEADER0] = 0xFF
+        tx[PKT_HEADER1] = 0xFF
+        tx[PKT_ID] = BROADCAST_ID
+        tx[PKT_LENGTH] = param_length + 4
+        tx[PKT_INSTRUCTION] = instruction
+        tx[PKT_PARAMETER0] = start_address
+        tx[PKT_PARAMETER0 + 1] = data_length
+        tx[PKT_PARAMETER0 + 2:PKT_PARAMETER0 + 2 + param_length] = param
+        tx[total - 1] = ~(BROADCAST_ID + param_length + 4 + instruction + start_address + data_length
+                          + sum(param)) & 0xFF
+        return self.tx_view[:total]
+
+    # ---- rx ----
+
+    def _slide(self, head, tail, incoming):
+        # move the live window back to the start instead of deleting from the front
+        live = bytes(self.rx_view[head:tail])
+        if len(live) + incoming > len(self.rx):
+            self.rx = bytearray(len(live) + incoming + RXPACKET_MAX_LEN)
+            self.rx_view = memoryview(self.rx)
+        self.rx_view[0:len(live)] = live
+        return len(live)
+
+    def readStatus(self, port):
+        """Read one status packet from ``port``; returns ``(packet_view, result)``.
+
+        A clean reply costs two port reads, two copies into the buffer and no
+        scanning. Otherwise bytes before a header are skipped by moving the
+        window start, never deleted. Port reads are copied in through the
+        view, so they must be bytes-like.
+        """
+        rx, view = self.rx, self.rx_view
+        read = port.readPort
+
+        # fast path: a clean reply is one 6-byte read plus one read of the rest; nothing is scanned
+        first = read(6)
+        # (literal offsets: PKT_ID 2, PKT_LENGTH 3, PKT_ERROR 4; global lookups cost more than the checks)
+        if (len(first) == 6 and first[0] == 0xFF and first[1] == 0xFF and first[2] <= 0xFD
+                and 2 <= first[3] <= _RX_MAX and first[4] <= 0x7F):
+            wait_length = first[3] + 4
+            view[0:6] = first
+            if wait_length > 6:
+                rest = read(wait_length - 6)
+                n = len(rest)
+                view[6:6 + n] = rest
+                if n != wait_length - 6:
+                    return self._readStatusSlow(port, 0, 6 + n)
+                body = sum(first) - 0x1FE + sum(rest) - rest[-1]
+            else:
+                body = sum(first) - 0x1FE - first[5]
+            if ~body & 0xFF == rx[wait_length - 1]:
+                return view[0:wait_length], COMM_SUCCESS
+            return view[0:wait_length], COMM_RX_CORRUPT
+        n = len(first)
+        view[0:n] = first
+        return self._readStatusSlow(port, 0, n)
+
+    def _readStatusSlow(self, port, head, tail):
+        # resynchronising reader for noise, short reads and partial packets already in rx[head:tail]
+        rx, view = self.rx, self.rx_view
+        read, capacity = port.readPort, len(rx)
+        wait_length = 6  # minimum length (HEADER0 HEADER1 ID LENGTH ERROR CHKSUM)
+
+        while True:
+            data = read(wait_length - (tail - head)) if tail - head < wait_length else b""
+            n = len(data)
+            if n:
+                if tail + n > capacity:
+                    tail = self._slide(head, tail, n)
+                    head, rx, view, capacity = 0, self.rx, self.rx_view, len(self.rx)
+                view[tail:tail + n] = data
+                tail += n
+
+            rx_length = tail - head
+            if rx_length >= wait_length:
+                # find packet header
+                if rx[head] != 0xFF or rx[head + 1] != 0xFF:
+                    pos = rx.find(HEADER, head, tail)
+                    if pos >= 0:
+                        head = pos
+                    else:
+                        # keep a trailing 0xFF, it may be the first half of a header
+                        head = tail - 1 if rx[tail - 1] == 0xFF else tail
+                    continue
+
+                if (rx[head + PKT_ID] > 0xFD) or (rx[head + PKT_LENGTH] > RXPACKET_MAX_LEN) or (
+                        rx[head + PKT_ERROR] > 0x7F):
+                    # unavailable ID or unavailable Length or unavailable Error
+                    head += 1
+                    continue
+
+                # re-calculate the exact length of the rx packet
+                if wait_length != rx[head + PKT_LENGTH] + PKT_LENGTH + 1:
+                    wait_length = rx[head + PKT_LENGTH] + PKT_LENGTH + 1
+                    continue
+
+                # verify checksum
+                end = head + wait_length
+                if ~sum(view[head + 2:end - 1]) & 0xFF == rx[end - 1]:
+                    return view[head:end], COMM_SUCCESS
+                return view[head:end], COMM_RX_CORRUPT
+
+            # check timeout
+            if port.isPacketTimeout():
+                return view[head:tail], COMM_RX_TIMEOUT if rx_length == 0 else COMM_RX_CORRUPT
+
+    def readBlock(self, port, wait_length):
+        """Read ``wait_length`` raw bytes (e.g. a SYNC_READ reply train); returns ``(result, view)``."""
+        if wait_length > len(self.rx):
+            self.rx = bytearray(wait_length)
+            self.rx_view = memoryview(self.rx)
+        view = self.rx_view
+        rx_length = 0
+        while True:
+            data = port.readPort(wait_length - rx_length)
+            n = len(data)
+            if n:
+                view[rx_length:rx_length + n] = data
+                rx_length += n
+            if rx_length >= wait_length:
+                return COMM_SUCCESS, view[:rx_length]
+            # check timeout
+            if port.isPacketTimeout():
+                return COMM_RX_TIMEOUT if rx_length == 0 else COMM_RX_CORRUPT, view[:rx_length]
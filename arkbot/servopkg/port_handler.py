@@ -1,23 +1,64 @@
 #!/usr/bin/env python
 
+import os
+import select
 import time
 import serial
 import sys
+from collections import deque
+
+from . import trace
+from .bus_stats import BusStats
+
+_trace = trace.channel("port")
 
 DEFAULT_BAUDRATE = 1000000
 LATENCY_TIMER = 50 
 
+# Adaptive latency: timeout allowance = percentile of observed reply delay * factor + margin
+ADAPTIVE_WINDOW = 256
+ADAPTIVE_MIN_SAMPLES = 32
+ADAPTIVE_PERCENTILE = 0.99
+ADAPTIVE_FACTOR = 1.5
+ADAPTIVE_MARGIN_MS = 1.0
+ADAPTIVE_UPDATE_EVERY = 16  # replies between recomputing the percentile
+ADAPTIVE_BACKOFF = 2.0      # a timeout multiplies the learned allowance by this (up to the configured one)
+
+# Receive modes
+RX_MODE_SPIN = "spin"      # poll readPort/isPacketTimeout in a tight loop
+RX_MODE_SELECT = "select"  # sleep on the fd until bytes arrive or the packet deadline passes (POSIX)
+
 class PortHandler(object):
-    def __init__(self, port_name):
+    def __init__(self, port_name, rx_mode=RX_MODE_SPIN):
         self.is_open = False
         self.baudrate = DEFAULT_BAUDRATE
         self.packet_start_time = 0.0
         self.packet_timeout = 0.0
         self.tx_time_per_byte = 0.0
+        self._packet_start_ns = 0
+        self._packet_deadline_ns = 0
+        self._packet_wire_time = 0.0
+        self._packet_instruction = None
+
+        # Latency allowance (ms) added to the wire time of every reply, optionally per instruction
+        self.latency_timer = float(LATENCY_TIMER)
+        self.latency_by_instruction = {}
+        self.adaptive_latency = False
+        self._adaptive_samples = {}
+        self._adaptive_latency = {}
+        self._adaptive_pending = {}  # replies per instruction since the allowance was last recomputed
+        self._adaptive_floor = {}    # allowance per instruction that has already proven too short, times the backoff
+        self._rx_stale = False       # a reply timed out; its late bytes may still arrive
+        self._rx_stale_instruction = None
+        self.timeout_count = 0
+        self.timeouts_by_instruction = {}
+        self.stats = BusStats()  # per-servo / per-instruction counters and latency histograms
 
         self.is_using = False
         self.port_name = port_name
         self.ser = None
+        self.rx_mode = RX_MODE_SPIN
+        self.setRxMode(rx_mode)
 
     def openPort(self):
         return self.setBaudRate(self.baudrate)
@@ -28,6 +69,20 @@ class PortHandler(object):
 
     def clearPort(self):
         self.ser.flush()
+        if self._rx_stale:
+            # a timed-out reply may still be on its way: wait until the line has been quiet for one
+            # reply allowance (bounded by the configured one) before dropping what it left behind,
+            # so a late reply is not parsed as the next one
+            inst = self._rx_stale_instruction
+            quiet = (self.getLatencyTimer(inst) + self.tx_time_per_byte * 3.0) / 1000.0
+            limit = time.monotonic() + self.latency_by_instruction.get(inst, self.latency_timer) / 1000.0
+            while True:
+                time.sleep(quiet)
+                if not self.ser.in_waiting or time.monotonic() >= limit:
+                    break
+                self.ser.reset_input_buffer()
+            self.ser.reset_input_buffer()
+            self._rx_stale = False
 
     def setPortName(self, port_name):
         self.port_name = port_name
@@ -47,42 +102,137 @@ class PortHandler(object):
     def getBaudRate(self):
         return self.baudrate
 
+    def setRxMode(self, rx_mode):
+        if rx_mode not in (RX_MODE_SPIN, RX_MODE_SELECT):
+            raise ValueError(f"Unknown rx_mode {rx_mode!r}, expected '{RX_MODE_SPIN}' or '{RX_MODE_SELECT}'")
+        self.rx_mode = rx_mode
+
+    def getRxMode(self):
+        return self.rx_mode
+
     def getBytesAvailable(self):
         return self.ser.in_waiting
 
     def readPort(self, length):
+        if self.rx_mode == RX_MODE_SELECT:
+            return self.readPortSelect(length)
         if (sys.version_info > (3, 0)):
             return self.ser.read(length)
         else:
             return [ord(ch) for ch in self.ser.read(length)]
 
+    def readPortSelect(self, length):
+        # Block until the fd is readable or the packet deadline (set from tx_time_per_byte
+        # by setPacketTimeout) passes, then take what is there with a single read
+        fd = self.ser.fileno()
+        timeout = (self.packet_timeout - self.getTimeSinceStart()) / 1000.0
+        ready, _, _ = select.select([fd], [], [], max(0.0, timeout))
+        if not ready:
+            return b""
+        return os.read(fd, length)
+
     def writePort(self, packet):
         return self.ser.write(packet)
 
-    def setPacketTimeout(self, packet_length):
-        self.packet_start_time = self.getCurrentTime()
-        self.packet_timeout = (self.tx_time_per_byte * packet_length) + (self.tx_time_per_byte * 3.0) + LATENCY_TIMER
+    def setLatencyTimer(self, msec, instruction=None):
+        if instruction is None:
+            self.latency_timer = float(msec)
+        else:
+            self.latency_by_instruction[instruction] = float(msec)
+
+    def getLatencyTimer(self, instruction=None):
+        latency = self.latency_by_instruction.get(instruction, self.latency_timer)
+        if self.adaptive_latency and instruction in self._adaptive_latency:
+            return min(latency, self._adaptive_latency[instruction])
+        return latency
+
+    def setAdaptiveLatency(self, enabled):
+        # Learn the reply delay per instruction from successful round-trips and
+        # shrink the allowance to a high percentile of it (never above the configured one)
+        self.adaptive_latency = bool(enabled)
+        self._adaptive_samples.clear()
+        self._adaptive_latency.clear()
+        self._adaptive_pending.clear()
+        self._adaptive_floor.clear()
+
+    def setPacketTimeout(self, packet_length, instruction=None):
+        wire_time = (self.tx_time_per_byte * packet_length) + (self.tx_time_per_byte * 3.0)
+        self._packet_instruction = instruction
+        self._packet_wire_time = wire_time
+        self._startPacketTimer(wire_time + self.getLatencyTimer(instruction))
 
     def setPacketTimeoutMillis(self, msec):
-        self.packet_start_time = self.getCurrentTime()
+        self._packet_instruction = None
+        self._packet_wire_time = 0.0
+        self._startPacketTimer(msec)
+
+    def _startPacketTimer(self, msec):
+        now = time.monotonic_ns()
+        self._packet_start_ns = now
+        self._packet_deadline_ns = now + int(msec * 1000000)
+        self.packet_start_time = now / 1000000.0
         self.packet_timeout = msec
 
     def isPacketTimeout(self):
-        if self.getTimeSinceStart() > self.packet_timeout:
+        if time.monotonic_ns() > self._packet_deadline_ns:
+            if self.packet_timeout:
+                self.timeout_count += 1
+                inst = self._packet_instruction
+                self.timeouts_by_instruction[inst] = self.timeouts_by_instruction.get(inst, 0) + 1
+                _trace.debug("reply timeout on %s (instruction %s)", self.port_name, inst)
+                self._rx_stale = True
+                self._rx_stale_instruction = inst
+                if inst in self._adaptive_latency:
+                    self._widenLatency(inst)
             self.packet_timeout = 0
             return True
 
         return False
 
+    def packetReceived(self):
+        """Called by the protocol layer when a reply arrived intact; feeds the adaptive latency."""
+        if not self.adaptive_latency or self._packet_instruction is None:
+            return
+        inst = self._packet_instruction
+        delay = (time.monotonic_ns() - self._packet_start_ns) / 1000000.0 - self._packet_wire_time
+        samples = self._adaptive_samples.get(inst)
+        if samples is None:
+            samples = self._adaptive_samples[inst] = deque(maxlen=ADAPTIVE_WINDOW)
+        samples.append(max(0.0, delay))
+        pending = self._adaptive_pending.get(inst, 0) + 1
+        if pending < ADAPTIVE_UPDATE_EVERY or len(samples) < ADAPTIVE_MIN_SAMPLES:
+            self._adaptive_pending[inst] = pending
+            return
+        self._adaptive_pending[inst] = 0
+        ordered = sorted(samples)
+        p = ordered[int(ADAPTIVE_PERCENTILE * (len(ordered) - 1))]
+        self._adaptive_latency[inst] = max(p * ADAPTIVE_FACTOR + ADAPTIVE_MARGIN_MS, self._adaptive_floor.get(inst, 0.0))
+
+    def _widenLatency(self, inst):
+        # successful replies can only teach a shorter allowance; a timeout is the evidence it got too
+        # short. Back off towards the configured allowance and never learn below that again.
+        widened = self._adaptive_latency[inst] * ADAPTIVE_BACKOFF
+        self._adaptive_floor[inst] = widened
+        if widened >= self.latency_by_instruction.get(inst, self.latency_timer):
+            del self._adaptive_latency[inst]
+        else:
+            self._adaptive_latency[inst] = widened
+        self._adaptive_pending[inst] = 0
+
+    def getTimingStats(self):
+        return {
+            "timeouts": self.timeout_count,
+            "timeouts_by_instruction": dict(self.timeouts_by_instruction),
+            "latency_ms": self.latency_timer,
+            "latency_ms_by_instruction": dict(self.latency_by_instruction),
+            "adaptive_latency_ms": dict(self._adaptive_latency),
+        }
+
     def getCurrentTime(self):
-        return round(time.time() * 1000000000) / 1000000.0
+        return time.monotonic_ns() / 1000000.0
 
     def getTimeSinceStart(self):
-        time_since = self.getCurrentTime() - self.packet_start_time
-        if time_since < 0.0:
-            self.packet_start_time = self.getCurrentTime()
-
-        return time_since
+        return (time.monotonic_ns() - self._packet_start_ns) / 1000000.0
 
     def setupPort(self, cflag_baud):
         if self.is_open:
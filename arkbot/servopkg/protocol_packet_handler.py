@@ -1,12 +1,18 @@
 #!/usr/bin/env python
 
+import time
+
 from .bytes import *
+from .packet_codec import PacketCodec
 
 class protocol_packet_handler(object):
     def __init__(self, portHandler, protocol_end):
         #self.sts_setend(protocol_end)# STServo bit end(STS/SMS=0, SCS=1)
         self.portHandler = portHandler
         self.sts_end = protocol_end
+        self.codec = PacketCodec()
+        self._sync_read_start = 0
+        self._sync_read_tx_bytes = 0
 
     def sts_getend(self):
         return self.sts_end
@@ -97,7 +103,6 @@ class protocol_packet_handler(object):
         return ""
 
     def txPacket(self, txpacket):
-        checksum = 0
         total_packet_length = txpacket[PKT_LENGTH] + 4  # 4: HEADER0 HEADER1 ID LENGTH
 
         if self.portHandler.is_using:
@@ -109,15 +114,14 @@ class protocol_packet_handler(object):
             self.portHandler.is_using = False
             return COMM_TX_ERROR
 
-        # make packet header
-        txpacket[PKT_HEADER0] = 0xFF
-        txpacket[PKT_HEADER1] = 0xFF
-
-        # add a checksum to the packet
-        for idx in range(2, total_packet_length - 1):  # except header, checksum
-            checksum += txpacket[idx]
+        # codec packets arrive with header and checksum already in place
+        if not isinstance(txpacket, memoryview):
+            # make packet header
+            txpacket[PKT_HEADER0] = 0xFF
+            txpacket[PKT_HEADER1] = 0xFF
 
-        txpacket[total_packet_length - 1] = ~checksum & 0xFF
+            # add a checksum to the packet
+            txpacket[total_packet_length - 1] = ~sum(txpacket[2:total_packet_length - 1]) & 0xFF
 
         #print "[TxPacket] %r" % txpacket
 
@@ -131,103 +135,50 @@ class protocol_packet_handler(object):
         return COMM_SUCCESS
 
     def rxPacket(self):
-        rxpacket = []
-
-        result = COMM_TX_FAIL
-        checksum = 0
-        rx_length = 0
-        wait_length = 6  # minimum length (HEADER0 HEADER1 ID LENGTH ERROR CHKSUM)
-
-        while True:
-            rxpacket.extend(self.portHandler.readPort(wait_length - rx_length))
-            rx_length = len(rxpacket)
-            if rx_length >= wait_length:
-                # find packet header
-                for idx in range(0, (rx_length - 1)):
-                    if (rxpacket[idx] == 0xFF) and (rxpacket[idx + 1] == 0xFF):
-                        break
-
-                if idx == 0:  # found at the beginning of the packet
-                    if (rxpacket[PKT_ID] > 0xFD) or (rxpacket[PKT_LENGTH] > RXPACKET_MAX_LEN) or (
-                            rxpacket[PKT_ERROR] > 0x7F):
-                        # unavailable ID or unavailable Length or unavailable Error
-                        # remove the first byte in the packet
-                        del rxpacket[0]
-                        rx_length -= 1
-                        continue
-
-                    # re-calculate the exact length of the rx packet
-                    if wait_length != (rxpacket[PKT_LENGTH] + PKT_LENGTH + 1):
-                        wait_length = rxpacket[PKT_LENGTH] + PKT_LENGTH + 1
-                        continue
-
-                    if rx_length < wait_length:
-                        # check timeout
-                        if self.portHandler.isPacketTimeout():
-                            if rx_length == 0:
-                                result = COMM_RX_TIMEOUT
-                            else:
-                                result = COMM_RX_CORRUPT
-                            break
-                        else:
-                            continue
-
-                    # calculate checksum
-                    for i in range(2, wait_length - 1):  # except header, checksum
-                        checksum += rxpacket[i]
-                    checksum = ~checksum & 0xFF
-
-                    # verify checksum
-                    if rxpacket[wait_length - 1] == checksum:
-                        result = COMM_SUCCESS
-                    else:
-                        result = COMM_RX_CORRUPT
-                    break
-
-                else:
-                    # remove unnecessary packets
-                    del rxpacket[0: idx]
-                    rx_length -= idx
-
-            else:
-                # check timeout
-                if self.portHandler.isPacketTimeout():
-                    if rx_length == 0:
-                        result = COMM_RX_TIMEOUT
-                    else:
-                        result = COMM_RX_CORRUPT
-                    break
-
+        rxpacket, result = self.codec.readStatus(self.portHandler)
+        if result == COMM_SUCCESS:
+            self.portHandler.packetReceived()
         self.portHandler.is_using = False
         return rxpacket, result
 
     def txRxPacket(self, txpacket):
+        # every transaction that expects a reply (and SYNC_WRITE) passes here; time it for BusStats
+        t0 = time.perf_counter_ns()
+        rxpacket, result, error = self._txRxPacket(txpacket)
+        self.portHandler.stats.record(txpacket[PKT_INSTRUCTION], txpacket[PKT_ID], result,
+                                      time.perf_counter_ns() - t0, txpacket[PKT_LENGTH] + 4,
+                                      len(rxpacket) if rxpacket is not None else 0, error)
+        return rxpacket, result, error
+
+    def _txRxPacket(self, txpacket):
         rxpacket = None
         error = 0
 
         # tx packet
+        sts_id = txpacket[PKT_ID]
         result = self.txPacket(txpacket)
         if result != COMM_SUCCESS:
             return rxpacket, result, error
 
         # (ID == Broadcast ID) == no need to wait for status packet or not available
-        if (txpacket[PKT_ID] == BROADCAST_ID):
+        if (sts_id == BROADCAST_ID):
             self.portHandler.is_using = False
             return rxpacket, result, error
 
         # set packet timeout
-        if txpacket[PKT_INSTRUCTION] == INST_READ:
-            self.portHandler.setPacketTimeout(txpacket[PKT_PARAMETER0 + 1] + 6)
+        instruction = txpacket[PKT_INSTRUCTION]
+        if instruction == INST_READ:
+            self.portHandler.setPacketTimeout(txpacket[PKT_PARAMETER0 + 1] + 6, INST_READ)
         else:
-            self.portHandler.setPacketTimeout(6)  # HEADER0 HEADER1 ID LENGTH ERROR CHECKSUM
+            self.portHandler.setPacketTimeout(6, instruction)  # HEADER0 HEADER1 ID LENGTH ERROR CHECKSUM
 
         # rx packet
         while True:
             rxpacket, result = self.rxPacket()
-            if result != COMM_SUCCESS or txpacket[PKT_ID] == rxpacket[PKT_ID]:
+            if result != COMM_SUCCESS or sts_id == rxpacket[PKT_ID]:
                 break
 
-        if result == COMM_SUCCESS and txpacket[PKT_ID] == rxpacket[PKT_ID]:
+        if result == COMM_SUCCESS and sts_id == rxpacket[PKT_ID]:
             error = rxpacket[PKT_ERROR]
 
         return rxpacket, result, error
@@ -236,14 +187,10 @@ class protocol_packet_handler(object):
         model_number = 0
         error = 0
 
-        txpacket = [0] * 6
-
         if sts_id >= BROADCAST_ID:
             return model_number, COMM_NOT_AVAILABLE, error
 
-        txpacket[PKT_ID] = sts_id
-        txpacket[PKT_LENGTH] = 2
-        txpacket[PKT_INSTRUCTION] = INST_PING
+        txpacket = self.codec.packInstruction(sts_id, INST_PING)
 
         rxpacket, result, error = self.txRxPacket(txpacket)
 
@@ -255,34 +202,23 @@ class protocol_packet_handler(object):
         return model_number, result, error
 
     def action(self, sts_id):
-        txpacket = [0] * 6
-
-        txpacket[PKT_ID] = sts_id
-        txpacket[PKT_LENGTH] = 2
-        txpacket[PKT_INSTRUCTION] = INST_ACTION
+        txpacket = self.codec.packInstruction(sts_id, INST_ACTION)
 
         _, result, _ = self.txRxPacket(txpacket)
 
         return result
 
     def readTx(self, sts_id, address, length):
-
-        txpacket = [0] * 8
-
         if sts_id >= BROADCAST_ID:
             return COMM_NOT_AVAILABLE
 
-        txpacket[PKT_ID] = sts_id
-        txpacket[PKT_LENGTH] = 4
-        txpacket[PKT_INSTRUCTION] = INST_READ
-        txpacket[PKT_PARAMETER0 + 0] = address
-        txpacket[PKT_PARAMETER0 + 1] = length
+        txpacket = self.codec.packInstruction(sts_id, INST_READ, address, length)
 
         result = self.txPacket(txpacket)
 
         # set packet timeout
         if result == COMM_SUCCESS:
-            self.portHandler.setPacketTimeout(length + 6)
+            self.portHandler.setPacketTimeout(length + 6, INST_READ)
 
         return result
 
@@ -307,17 +243,12 @@ class protocol_packet_handler(object):
         return data, result, error
 
     def readTxRx(self, sts_id, address, length):
-        txpacket = [0] * 8
         data = []
 
         if sts_id >= BROADCAST_ID:
             return data, COMM_NOT_AVAILABLE, 0
 
-        txpacket[PKT_ID] = sts_id
-        txpacket[PKT_LENGTH] = 4
-        txpacket[PKT_INSTRUCTION] = INST_READ
-        txpacket[PKT_PARAMETER0 + 0] = address
-        txpacket[PKT_PARAMETER0 + 1] = length
+        txpacket = self.codec.packInstruction(sts_id, INST_READ, address, length)
 
         rxpacket, result, error = self.txRxPacket(txpacket)
         if result == COMM_SUCCESS:
@@ -369,14 +300,9 @@ class protocol_packet_handler(object):
         return data_read, result, error
 
     def writeTxOnly(self, sts_id, address, length, data):
-        txpacket = [0] * (length + 7)
-
-        txpacket[PKT_ID] = sts_id
-        txpacket[PKT_LENGTH] = length + 3
-        txpacket[PKT_INSTRUCTION] = INST_WRITE
-        txpacket[PKT_PARAMETER0] = address
-
-        txpacket[PKT_PARAMETER0 + 1: PKT_PARAMETER0 + 1 + length] = data[0: length]
+        txpacket = self.codec.packWrite(sts_id, INST_WRITE, address, length, data)
+        if txpacket is None:
+            return COMM_TX_ERROR
 
         result = self.txPacket(txpacket)
         self.portHandler.is_using = False
@@ -384,14 +310,10 @@ class protocol_packet_handler(object):
         return result
 
     def writeTxRx(self, sts_id, address, length, data):
-        txpacket = [0] * (length + 7)
+        txpacket = self.codec.packWrite(sts_id, INST_WRITE, address, length, data)
+        if txpacket is None:
+            return COMM_TX_ERROR, 0
 
-        txpacket[PKT_ID] = sts_id
-        txpacket[PKT_LENGTH] = length + 3
-        txpacket[PKT_INSTRUCTION] = INST_WRITE
-        txpacket[PKT_PARAMETER0] = address
-
-        txpacket[PKT_PARAMETER0 + 1: PKT_PARAMETER0 + 1 + length] = data[0: length]
         rxpacket, result, error = self.txRxPacket(txpacket)
 
         return result, error
@@ -427,14 +349,9 @@ class protocol_packet_handler(object):
         return self.writeTxRx(sts_id, address, 4, data_write)
 
     def regWriteTxOnly(self, sts_id, address, length, data):
-        txpacket = [0] * (length + 7)
-
-        txpacket[PKT_ID] = sts_id
-        txpacket[PKT_LENGTH] = length + 3
-        txpacket[PKT_INSTRUCTION] = INST_REG_WRITE
-        txpacket[PKT_PARAMETER0] = address
-
-        txpacket[PKT_PARAMETER0 + 1: PKT_PARAMETER0 + 1 + length] = data[0: length]
+        txpacket = self.codec.packWrite(sts_id, INST_REG_WRITE, address, length, data)
+        if txpacket is None:
+            return COMM_TX_ERROR
 
         result = self.txPacket(txpacket)
         self.portHandler.is_using = False
@@ -442,68 +359,44 @@ class protocol_packet_handler(object):
         return result
 
     def regWriteTxRx(self, sts_id, address, length, data):
-        txpacket = [0] * (length + 7)
-
-        txpacket[PKT_ID] = sts_id
-        txpacket[PKT_LENGTH] = length + 3
-        txpacket[PKT_INSTRUCTION] = INST_REG_WRITE
-        txpacket[PKT_PARAMETER0] = address
-
-        txpacket[PKT_PARAMETER0 + 1: PKT_PARAMETER0 + 1 + length] = data[0: length]
+        txpacket = self.codec.packWrite(sts_id, INST_REG_WRITE, address, length, data)
+        if txpacket is None:
+            return COMM_TX_ERROR, 0
 
         _, result, error = self.txRxPacket(txpacket)
 
         return result, error
 
     def syncReadTx(self, start_address, data_length, param, param_length):
-        txpacket = [0] * (param_length + 8)
-        # 8: HEADER0 HEADER1 ID LEN INST START_ADDR DATA_LEN CHKSUM
-
-        txpacket[PKT_ID] = BROADCAST_ID
-        txpacket[PKT_LENGTH] = param_length + 4  # 7: INST START_ADDR DATA_LEN CHKSUM
-        txpacket[PKT_INSTRUCTION] = INST_SYNC_READ
-        txpacket[PKT_PARAMETER0 + 0] = start_address
-        txpacket[PKT_PARAMETER0 + 1] = data_length
-
-        txpacket[PKT_PARAMETER0 + 2: PKT_PARAMETER0 + 2 + param_length] = param[0: param_length]
+        txpacket = self.codec.packSync(INST_SYNC_READ, start_address, data_length, param, param_length)
+        if txpacket is None:
+            return COMM_TX_ERROR
 
         # print(txpacket)
+        self._sync_read_start = time.perf_counter_ns()
+        self._sync_read_tx_bytes = len(txpacket)
         result = self.txPacket(txpacket)
+        if result != COMM_SUCCESS:
+            self.portHandler.stats.record(INST_SYNC_READ, BROADCAST_ID, result, 0, len(txpacket), 0)
         return result
 
     def syncReadRx(self, data_length, param_length):
         wait_length = (6 + data_length) * param_length
-        self.portHandler.setPacketTimeout(wait_length)
-        rxpacket = []
-        rx_length = 0
-        while True:
-            rxpacket.extend(self.portHandler.readPort(wait_length - rx_length))
-            rx_length = len(rxpacket)
-            if rx_length >= wait_length:
-                result = COMM_SUCCESS
-                break
-            else:
-                # check timeout
-                if self.portHandler.isPacketTimeout():
-                    if rx_length == 0:
-                        result = COMM_RX_TIMEOUT
-                    else:
-                        result = COMM_RX_CORRUPT
-                    break
+        self.portHandler.setPacketTimeout(wait_length, INST_SYNC_READ)
+        result, rxpacket = self.codec.readBlock(self.portHandler, wait_length)
+        if result == COMM_SUCCESS:
+            self.portHandler.packetReceived()
         self.portHandler.is_using = False
+        # round trip from syncReadTx, whose packet went out just before this
+        self.portHandler.stats.record(INST_SYNC_READ, BROADCAST_ID, result,
+                                      time.perf_counter_ns() - self._sync_read_start,
+                                      self._sync_read_tx_bytes, len(rxpacket))
         return result, rxpacket
 
     def syncWriteTxOnly(self, start_address, data_length, param, param_length):
-        txpacket = [0] * (param_length + 8)
-        # 8: HEADER0 HEADER1 ID LEN INST START_ADDR DATA_LEN ... CHKSUM
-
-        txpacket[PKT_ID] = BROADCAST_ID
-        txpacket[PKT_LENGTH] = param_length + 4  # 4: INST START_ADDR DATA_LEN ... CHKSUM
-        txpacket[PKT_INSTRUCTION] = INST_SYNC_WRITE
-        txpacket[PKT_PARAMETER0 + 0] = start_address
-        txpacket[PKT_PARAMETER0 + 1] = data_length
-
-        txpacket[PKT_PARAMETER0 + 2: PKT_PARAMETER0 + 2 + param_length] = param[0: param_length]
+        txpacket = self.codec.packSync(INST_SYNC_WRITE, start_address, data_length, param, param_length)
+        if txpacket is None:
+            return COMM_TX_ERROR
 
         _, result, _ = self.txRxPacket(txpacket)
 
@@ -1,15 +1,38 @@
 import time
 import math
+from collections import namedtuple
 
 from .bytes import *
 from .protocol_packet_handler import *
 from .group_sync_read import *
 from .group_sync_write import *
 
+# Everything in the present-state block (56..70), decoded. Raw servo units:
+# position/abs_position in ticks, speed in ticks/s, load in 0.1% of max torque,
+# voltage in 0.1 V, temperature in °C, current in servo current units.
+ServoStatus = namedtuple("ServoStatus", "position speed load voltage temperature moving abs_position current")
+
+# Writable EEPROM settings: name -> (address, size). All live in one block, read with a single READ.
+# Values are raw register values (two-byte fields little-endian, no sign handling).
+EPROM_FIELDS = {
+    "id": (STS_ID, 1),
+    "baud_rate": (STS_BAUD_RATE, 1),
+    "min_limit": (STS_MIN_ANGLE_LIMIT_L, 2),
+    "max_limit": (STS_MAX_ANGLE_LIMIT_L, 2),
+    "cw_dead": (STS_CW_DEAD, 1),
+    "ccw_dead": (STS_CCW_DEAD, 1),
+    "offset": (STS_OFS_L, 2),
+    "mode": (STS_MODE, 1),
+}
+STS_EPROM_START = STS_ID
+STS_EPROM_LENGTH = STS_MODE + 1 - STS_ID  # 5..33
+EPROM_SETTLE = 0.01  # s between re-locking and the verify read, only when something was written
+
 class sts(protocol_packet_handler):
     def __init__(self, portHandler):
         protocol_packet_handler.__init__(self, portHandler, 0)
         self.groupSyncWrite = GroupSyncWrite(self, STS_ACC, 7)
+        self._sent_goals = {}  # send_goal: last (goal, speed, acc) per servo
     
     # ---- Backwards-compatible aliases ----
     ReadByte  = protocol_packet_handler.read1ByteTxRx
@@ -80,65 +103,106 @@ class sts(protocol_packet_handler):
         
 
     def ChangeMode(self, sts_id, mode):
-        # Unlock
-        sts_comm_result, sts_error = self.unLockEprom(sts_id)
-        if sts_comm_result != COMM_SUCCESS or sts_error != 0:
-            return f"Failed to unLockEprom: comm={self.getTxRxResult(sts_comm_result)}, err={self.getRxPacketError(sts_error)}"
-        
-        # Write mode
-        sts_comm_result, sts_error = self.write1ByteTxRx(sts_id, STS_MODE, mode & 0xFF)
-        if sts_comm_result != COMM_SUCCESS or sts_error != 0:
-            return f"Failed to write mode: comm={self.getTxRxResult(sts_comm_result)}, err={self.getRxPacketError(sts_error)}"
-        
-        # allow for settle
-        time.sleep(0.05)
-
-        # Verify
-        val, sts_comm_result, sts_error = self.read1ByteTxRx(sts_id, STS_MODE)
-        if sts_comm_result != COMM_SUCCESS or sts_error != 0:
-            return f"Failed to verify mode: comm={self.getTxRxResult(sts_comm_result)}, err={self.getRxPacketError(sts_error)}"
-        if val != mode:
-            return f"Verify mismatch: wrote {mode}, read back {val}"
-        
-        # Re-lock
-        sts_comm_result, sts_error = self.LockEprom(sts_id)
-        if sts_comm_result != COMM_SUCCESS or sts_error != 0:
-            return f"Mode set to {mode}, but LockEprom failed: comm={self.getTxRxResult(sts_comm_result)}, err={self.getRxPacketError(sts_error)}"
+        return self.ConfigureEproms({sts_id: {"mode": mode}})[sts_id]
 
-        return None
-    
     def ChangeMaxLimit(self, sts_id, limit):
-        # Unlock
-        sts_comm_result, sts_error = self.unLockEprom(sts_id)
-        if sts_comm_result != COMM_SUCCESS or sts_error != 0:
-            return f"Failed to unLockEprom: comm={self.getTxRxResult(sts_comm_result)}, err={self.getRxPacketError(sts_error)}"
-        # Change Limit
-        sts_comm_result, sts_error = self.write2ByteTxRx(sts_id, STS_MAX_ANGLE_LIMIT_L, limit & 0xFFFF)
-        if sts_comm_result != COMM_SUCCESS or sts_error != 0:
-            return f"Failed to write limit: comm={self.getTxRxResult(sts_comm_result)}, err={self.getRxPacketError(sts_error)}"
-        
-        # Re-lock
-        sts_comm_result, sts_error = self.LockEprom(sts_id)
-        if sts_comm_result != COMM_SUCCESS or sts_error != 0:
-            return f"Limit cahchanged to {limit & 0xFFFF}, but LockEprom failed: comm={self.getTxRxResult(sts_comm_result)}, err={self.getRxPacketError(sts_error)}"
-
-        return None
+        return self.ConfigureEproms({sts_id: {"max_limit": limit}})[sts_id]
 
     def ChangeMinLimit(self, sts_id, limit):
-        # Unlock
-        sts_comm_result, sts_error = self.unLockEprom(sts_id)
-        if sts_comm_result != COMM_SUCCESS or sts_error != 0:
-            return f"Failed to unLockEprom: comm={self.getTxRxResult(sts_comm_result)}, err={self.getRxPacketError(sts_error)}"
-        # Change Limit
-        sts_comm_result, sts_error = self.write2ByteTxRx(sts_id, STS_MIN_ANGLE_LIMIT_L, limit & 0xFFFF)
-        if sts_comm_result != COMM_SUCCESS or sts_error != 0:
-            return f"Failed to write limit: comm={self.getTxRxResult(sts_comm_result)}, err={self.getRxPacketError(sts_error)}"
-
-        # Re-lock
-        sts_comm_result, sts_error = self.LockEprom(sts_id)
-        if sts_comm_result != COMM_SUCCESS or sts_error != 0:
-            return f"Limit cahchanged to {limit & 0xFFFF}, but LockEprom failed: comm={self.getTxRxResult(sts_comm_result)}, err={self.getRxPacketError(sts_error)}"
-        return None
+        return self.ConfigureEproms({sts_id: {"min_limit": limit}})[sts_id]
+
+    # ---- EEPROM configuration, batched ----
+
+    def decodeEprom(self, data, offset=0):
+        """{field: value} from a STS_EPROM_LENGTH block read from STS_EPROM_START, starting at data[offset]."""
+        o = offset - STS_EPROM_START
+        out = {}
+        for name, (address, size) in EPROM_FIELDS.items():
+            out[name] = data[o + address] if size == 1 else self.sts_makeword(data[o + address], data[o + address + 1])
+        return out
+
+    def ReadEprom(self, sts_id):
+        """Every EPROM_FIELDS value of one servo in one READ: ({field: value} or None, comm, error)."""
+        data, sts_comm_result, sts_error = self.readTxRx(sts_id, STS_EPROM_START, STS_EPROM_LENGTH)
+        if sts_comm_result != COMM_SUCCESS or len(data) < STS_EPROM_LENGTH:
+            return None, sts_comm_result, sts_error
+        return self.decodeEprom(data), sts_comm_result, sts_error
+
+    def ReadEproms(self, sts_ids):
+        """{sts_id: {field: value} or None} with one SYNC_READ; servos that miss their slot get a READ."""
+        group = GroupSyncRead(self, STS_EPROM_START, STS_EPROM_LENGTH)
+        for sts_id in sts_ids:
+            group.addParam(sts_id)
+        group.txRxPacket()
+        out = {}
+        for sts_id in sts_ids:
+            data = group.data_dict.get(sts_id)
+            if data and len(data) > STS_EPROM_LENGTH and data[0] == 0:
+                out[sts_id] = self.decodeEprom(data, 1)
+            else:
+                out[sts_id] = self.ReadEprom(sts_id)[0]
+        return out
+
+    def _syncWriteEprom(self, writes):
+        """writes: {(address, size): {sts_id: value}} -> one SYNC_WRITE per field."""
+        for (address, size), values in writes.items():
+            group = GroupSyncWrite(self, address, size)
+            for sts_id, value in values.items():
+                group.addParam(sts_id, [value & 0xFF] if size == 1 else [self.sts_lobyte(value), self.sts_hibyte(value)])
+            group.txPacket()
+
+    def ConfigureEproms(self, desired):
+        """Bring EEPROM settings to ``desired`` ({sts_id: {field: value}}, fields from EPROM_FIELDS) on many servos.
+
+        One SYNC_READ of the whole EEPROM block finds what differs; nothing is
+        written when everything already matches. Otherwise the servos that need
+        changes are unlocked, written and re-locked with one SYNC_WRITE per step
+        (one per field across all servos), then read back once to verify.
+        Returns {sts_id: None or an error message}. Use ChangeID for IDs.
+        """
+        for fields in desired.values():
+            for name in fields:
+                if name not in EPROM_FIELDS or name == "id":
+                    raise ValueError(f"Unknown EEPROM field '{name}', expected one of "
+                                     f"{[n for n in EPROM_FIELDS if n != 'id']}")
+        sts_ids = list(desired)
+        if not sts_ids:
+            return {}
+        current = self.ReadEproms(sts_ids)
+
+        out = {}
+        writes = {}
+        for sts_id in sts_ids:
+            if current[sts_id] is None:
+                out[sts_id] = f"Could not read EEPROM of servo {sts_id}"
+                continue
+            out[sts_id] = None
+            for name, value in desired[sts_id].items():
+                address, size = EPROM_FIELDS[name]
+                value = int(value) & (0xFF if size == 1 else 0xFFFF)
+                if current[sts_id][name] != value:
+                    writes.setdefault((address, size), {})[sts_id] = value
+        changed = sorted({sts_id for values in writes.values() for sts_id in values})
+        if not changed:
+            return out
+
+        self._syncWriteEprom({(STS_LOCK, 1): dict.fromkeys(changed, 0)})
+        self._syncWriteEprom(writes)
+        self._syncWriteEprom({(STS_LOCK, 1): dict.fromkeys(changed, 1)})
+        time.sleep(EPROM_SETTLE)
+
+        # SYNC_WRITE has no replies: read back to know it took
+        after = self.ReadEproms(changed)
+        for sts_id in changed:
+            if after[sts_id] is None:
+                out[sts_id] = f"Could not verify EEPROM of servo {sts_id}"
+                continue
+            for name, value in desired[sts_id].items():
+                want = int(value) & (0xFF if EPROM_FIELDS[name][1] == 1 else 0xFFFF)
+                if after[sts_id][name] != want:
+                    out[sts_id] = f"Verify mismatch on servo {sts_id}: wrote {name}={want}, read back {after[sts_id][name]}"
+                    break
+        return out
 
 
     def LockEprom(self, sts_id):
@@ -174,22 +238,22 @@ class sts(protocol_packet_handler):
         txpacket = [acc, self.sts_lobyte(position), self.sts_hibyte(position), 0, 0, self.sts_lobyte(speed), self.sts_hibyte(speed)]
         return self.writeTxRx(sts_id, STS_ACC, len(txpacket), txpacket)
 
-    def send_goal(self, sid, goal_pos, speed, acc,
-                last_sent=[None],  # tiny cache to avoid duplicate sends
-                tol=1):
+    def send_goal(self, sid, goal_pos, speed, acc, tol=1):
         goal_pos &= 0xFFFF
         speed    &= 0xFFFF
         acc      &= 0xFF
 
-        prev = last_sent[0]
+        # skip a goal within tol of the last one this servo accepted (same speed/acc)
+        prev = self._sent_goals.get(sid)
         if prev and (abs(((goal_pos - prev[0] + 0x8000) & 0xFFFF) - 0x8000) <= tol
                     and prev[1] == speed and prev[2] == acc):
             return True  # nothing changed enough to resend
 
         sts_comm_result, sts_error = self.WritePosEx(sid, goal_pos, speed, acc)
         if sts_comm_result == COMM_SUCCESS and sts_error == 0:
-            last_sent[0] = (goal_pos, speed, acc)
+            self._sent_goals[sid] = (goal_pos, speed, acc)
             return True
+        self._sent_goals.pop(sid, None)
         return None
    
 
@@ -245,6 +309,44 @@ class sts(protocol_packet_handler):
         return pos, speed, acc,current, comm_result, sts_error
 
 
+    def decodeStatus(self, data, offset=0):
+        """Decode a STS_STATUS_LENGTH block read from STS_PRESENT_POSITION_L, starting at data[offset]."""
+        d = data
+        o = offset - STS_PRESENT_POSITION_L
+        return ServoStatus(
+            self.sts_tohost(d[o + STS_PRESENT_POSITION_L] | (d[o + STS_PRESENT_POSITION_H] << 8), 15),
+            self.sts_tohost(d[o + STS_PRESENT_SPEED_L] | (d[o + STS_PRESENT_SPEED_H] << 8), 15),
+            self.sts_tohost(d[o + STS_PRESENT_LOAD_L] | (d[o + STS_PRESENT_LOAD_H] << 8), 10),
+            d[o + STS_PRESENT_VOLTAGE],
+            d[o + STS_PRESENT_TEMPERATURE],
+            d[o + STS_MOVING],
+            d[o + STS_ABSPOS] | (d[o + STS_ABSPOS + 1] << 8),
+            self.sts_tohost(d[o + STS_PRESENT_CURRENT_L] | (d[o + STS_PRESENT_CURRENT_H] << 8), 15))
+
+    def ReadStatus(self, sts_id):
+        """Position, speed, load, voltage, temperature, moving and current in one READ."""
+        data, sts_comm_result, sts_error = self.readTxRx(sts_id, STS_PRESENT_POSITION_L, STS_STATUS_LENGTH)
+        if sts_comm_result != COMM_SUCCESS:
+            return None, sts_comm_result, sts_error
+        if len(data) < STS_STATUS_LENGTH:
+            return None, COMM_RX_CORRUPT, sts_error  # answered, but not with the whole block
+        return self.decodeStatus(data), sts_comm_result, sts_error
+
+    def SyncReadStatus(self, group, errors=None):
+        """Decode every servo in a GroupSyncRead(self, STS_PRESENT_POSITION_L, STS_STATUS_LENGTH)
+        after its txRxPacket(); servos that missed their slot map to None. A servo reporting
+        alarm bits is still decoded; its status error byte goes to ``errors`` (sts_id -> byte)."""
+        out = {}
+        for sts_id, data in group.data_dict.items():
+            # data is [error, 15 bytes], or empty/None when the slot was missed or corrupt
+            if data and len(data) > STS_STATUS_LENGTH:
+                out[sts_id] = self.decodeStatus(data, 1)
+                if errors is not None:
+                    errors[sts_id] = data[0]
+            else:
+                out[sts_id] = None
+        return out
+
     def ReadMoving(self, sts_id):
         moving, sts_comm_result, sts_error = self.read1ByteTxRx(sts_id, STS_MOVING)
         return moving, sts_comm_result, sts_error
@@ -0,0 +1,212 @@
+#!/usr/bin/env python
+"""Leveled, rate-limited tracing for servopkg and the driver.
+
+Each subsystem gets a channel; a channel's level methods are swapped for a
+no-op when that level is off, so a disabled call costs one function call and
+never formats anything:
+
+    _trace = trace.channel("driver")
+    _trace.debug("[sid %d] goal=%d", sid, goal)
+    if _trace.isEnabled(trace.DEBUG):   # guard loops that only exist to trace
+        ...
+
+Levels come from trace.configure() or the ARKBOT_TRACE environment variable
+("debug", or per subsystem: "driver=debug,port=info"). Every call site is
+limited to rate_hz records per second; the next record that gets through
+reports how many were suppressed. With ring_size set, records are appended to
+a bounded deque (oldest dropped first) and formatted and written by a
+background thread, so the caller never blocks on the sink.
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import deque
+
+OFF = 100
+ERROR = 40
+WARN = 30
+INFO = 20
+DEBUG = 10
+TRACE = 5
+
+LEVELS = {"off": OFF, "error": ERROR, "warn": WARN, "info": INFO, "debug": DEBUG, "trace": TRACE}
+LEVEL_NAMES = {v: k.upper() for k, v in LEVELS.items()}
+
+DEFAULT_LEVEL = WARN
+DEFAULT_RATE_HZ = 20
+DEFAULT_FLUSH_INTERVAL = 0.1
+
+
+def _noop(*args):
+    pass
+
+
+def _stderr_sink(line):
+    sys.stderr.write(line + "\n")
+
+
+def parseLevel(level):
+    if isinstance(level, int):
+        return level
+    try:
+        return LEVELS[str(level).lower()]
+    except KeyError:
+        raise ValueError(f"Unknown trace level '{level}', expected one of {list(LEVELS)}")
+
+
+class TraceChannel(object):
+    def __init__(self, name, tracer, level):
+        self.name = name
+        self._tracer = tracer
+        self._windows = {}  # fmt -> [window start, emitted, suppressed]
+        self.setLevel(level)
+
+    def setLevel(self, level):
+        self.level = parseLevel(level)
+        for lvl, attr in ((ERROR, "error"), (WARN, "warn"), (INFO, "info"), (DEBUG, "debug"), (TRACE, "trace")):
+            setattr(self, attr, self._emitter(lvl) if lvl >= self.level else _noop)
+
+    def isEnabled(self, level):
+        return level >= self.level
+
+    def _emitter(self, level):
+        def emit(fmt, *args):
+            self._emit(level, fmt, args)
+        return emit
+
+    def _emit(self, level, fmt, args):
+        now = time.monotonic()
+        suppressed = 0
+        rate = self._tracer.rate_hz
+        if rate:
+            # races between threads only blur the counts, never lose the record
+            window = self._windows.get(fmt)
+            if window is None or now - window[0] >= 1.0:
+                if window is not None:
+                    suppressed = window[2]
+                window = self._windows[fmt] = [now, 0, 0]
+            if window[1] >= rate:
+                window[2] += 1
+                return
+            window[1] += 1
+        self._tracer.write((time.time(), level, self.name, fmt, args, suppressed))
+
+
+class Tracer(object):
+    def __init__(self):
+        self.channels = {}
+        self.levels = {}
+        self.default_level = DEFAULT_LEVEL
+        self.rate_hz = DEFAULT_RATE_HZ
+        self.sink = _stderr_sink
+        self.flush_interval = DEFAULT_FLUSH_INTERVAL
+        self.ring = None
+        self._flusher = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    def channel(self, name):
+        ch = self.channels.get(name)
+        if ch is None:
+            with self._lock:
+                ch = self.channels.get(name)
+                if ch is None:
+                    ch = self.channels[name] = TraceChannel(name, self, self.levels.get(name, self.default_level))
+        return ch
+
+    def configure(self, levels=None, rate_hz=None, ring_size=None, sink=None, flush_interval=None):
+        """``levels`` is a level for every channel or a {subsystem: level} dict ("*" sets the default)."""
+        if isinstance(levels, dict):
+            for name, level in levels.items():
+                if name == "*":
+                    self.default_level = parseLevel(level)
+                else:
+                    self.levels[name] = parseLevel(level)
+        elif levels is not None:
+            self.default_level = parseLevel(levels)
+            self.levels.clear()
+        for name, ch in self.channels.items():
+            ch.setLevel(self.levels.get(name, self.default_level))
+
+        if rate_hz is not None:
+            self.rate_hz = rate_hz
+        if sink is not None:
+            self.sink = sink
+        if flush_interval is not None:
+            self.flush_interval = flush_interval
+        if ring_size is not None:
+            self.stop()
+            if ring_size > 0:
+                self.ring = deque(maxlen=ring_size)
+                self._stop.clear()
+                self._flusher = threading.Thread(target=self._flush_loop, daemon=True, name="servopkg-trace")
+                self._flusher.start()
+
+    def write(self, record):
+        ring = self.ring
+        if ring is not None:
+            ring.append(record)  # deque.append is atomic, no lock on the caller's side
+        else:
+            self.sink(self.format(record))
+
+    @staticmethod
+    def format(record):
+        stamp, level, name, fmt, args, suppressed = record
+        try:
+            msg = fmt % args if args else fmt
+        except (TypeError, ValueError):
+            msg = f"{fmt} {args!r}"
+        if suppressed:
+            msg += f" ({suppressed} suppressed)"
+        return f"{stamp:.6f} {LEVEL_NAMES.get(level, level)} [{name}] {msg}"
+
+    def flush(self):
+        ring = self.ring
+        if ring is None:
+            return
+        while True:
+            try:
+                record = ring.popleft()
+            except IndexError:
+                return
+            self.sink(self.format(record))
+
+    def _flush_loop(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+        self.flush()
+
+    def stop(self):
+        """Stop the background flusher (if any) after writing out what is buffered."""
+        if self._flusher is not None:
+            self._stop.set()
+            self._flusher.join(timeout=1.0)
+            self._flusher = None
+        self.flush()
+        self.ring = None
+
+
+def _from_env(tracer, spec):
+    levels = {}
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        name, sep, level = part.partition("=")
+        if sep:
+            levels[name.strip()] = level.strip()
+        else:
+            levels["*"] = name
+    tracer.configure(levels=levels)
+
+
+_tracer = Tracer()
+if os.environ.get("ARKBOT_TRACE"):
+    _from_env(_tracer, os.environ["ARKBOT_TRACE"])
+
+channel = _tracer.channel
+configure = _tracer.configure
+flush = _tracer.flush
+stop = _tracer.stop
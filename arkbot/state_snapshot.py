@@ -0,0 +1,82 @@
+# state_snapshot.py
+from dataclasses import dataclass, fields
+import time
+
+import numpy as np
+
+
+@dataclass
+class JointSample:
+    """One poll of every joint, in joint_order. Fields the bus did not provide are NaN."""
+    positions: np.ndarray     # rad
+    velocities: np.ndarray    # rad/s
+    loads: np.ndarray         # raw servo load, ±1000 = ±100% of max torque
+    voltages: np.ndarray      # V
+    temperatures: np.ndarray  # °C
+    currents: np.ndarray      # raw servo current units
+    moving: np.ndarray        # 1.0 while the servo is moving
+    ticks: np.ndarray         # unwrapped multi-turn encoder ticks the positions came from
+    comm: np.ndarray          # COMM_* result of the read (0 = answered)
+    stamp: float = 0.0        # time.monotonic() when the read finished
+
+    @classmethod
+    def empty(cls, n: int) -> "JointSample":
+        return cls(*(np.full(n, np.nan) for _ in range(len(_ARRAY_FIELDS))))
+
+    def copy(self) -> "JointSample":
+        return JointSample(*(getattr(self, name).copy() for name in _ARRAY_FIELDS), self.stamp)
+
+    @classmethod
+    def merge(cls, n: int, parts) -> "JointSample":
+        """Assemble one joint_order sample from ``(slots, sample)`` parts; stamped with the oldest part."""
+        out = cls.empty(n)
+        stamps = []
+        for slots, part in parts:
+            for name in _ARRAY_FIELDS:
+                getattr(out, name)[slots] = getattr(part, name)
+            stamps.append(part.stamp)
+        out.stamp = min(stamps) if stamps else 0.0
+        return out
+
+    def efforts(self) -> np.ndarray:
+        """Load as a signed fraction of max torque."""
+        return self.loads * 0.001
+
+    def age(self) -> float:
+        """Seconds since this sample was read."""
+        return time.monotonic() - self.stamp
+
+
+_ARRAY_FIELDS = tuple(f.name for f in fields(JointSample) if f.name != "stamp")
+
+
+class StateSnapshot:
+    """Single-writer, many-reader latest sample: a double buffer guarded by a sequence counter.
+
+    The writer fills ``back()`` and calls ``publish()`` to swap it to the front.
+    Readers copy the front and retry if the counter moved meanwhile, so they
+    never see a half-written sample and never block the writer.
+    """
+
+    def __init__(self, n: int):
+        self._buffers = (JointSample.empty(n), JointSample.empty(n))
+        self._front = 0
+        self._seq = 0
+
+    def back(self) -> JointSample:
+        return self._buffers[self._front ^ 1]
+
+    def publish(self) -> None:
+        self._seq += 1  # odd while swapping
+        self._front ^= 1
+        self._seq += 1
+
+    def read(self) -> JointSample:
+        while True:
+            seq = self._seq
+            if seq & 1:
+                time.sleep(0)  # let the writer finish the swap
+                continue
+            sample = self._buffers[self._front].copy()
+            if self._seq == seq:
+                return sample
@@ -0,0 +1,128 @@
+# stl_io.py
+from typing import Dict, List, Tuple
+import filecmp
+import os
+import re
+import threading
+
+import numpy as np
+
+# one binary STL facet: normal, three vertices, attribute byte count
+FACET_DTYPE = np.dtype([("normal", "<f4", (3,)), ("vertices", "<f4", (3, 3)), ("attr", "<u2")])
+HEADER_SIZE = 84  # 80-byte header + uint32 facet count
+
+_MESH_REF = re.compile(r'<mesh\s+filename="([^"]+)"')
+
+
+class StlMesh:
+    """One STL file, mapped read-only: ``facets`` is a structured view straight onto the file.
+
+    ``vertices`` and ``normals`` are views of it too, so nothing is copied and
+    the pages live in the OS page cache, shared by every process that maps the
+    same file. The arrays are read-only; copy before modifying.
+    """
+
+    def __init__(self, path: str, facets: np.ndarray, header: bytes):
+        self.path = path
+        self.facets = facets
+        self.header = header
+
+    @property
+    def vertices(self) -> np.ndarray:
+        """(F, 3, 3) float32 triangle corners."""
+        return self.facets["vertices"]
+
+    @property
+    def normals(self) -> np.ndarray:
+        """(F, 3) float32 facet normals as stored in the file."""
+        return self.facets["normal"]
+
+    def __len__(self) -> int:
+        return len(self.facets)
+
+
+_lock = threading.Lock()
+_by_path: Dict[Tuple[str, int, int], StlMesh] = {}  # (realpath, size, mtime_ns)
+_by_size: Dict[int, List[StlMesh]] = {}
+
+
+def _map(path: str, size: int) -> StlMesh:
+    with open(path, "rb") as f:
+        head = f.read(HEADER_SIZE)
+    count = int(np.frombuffer(head[80:84], "<u4")[0]) if len(head) == HEADER_SIZE else -1
+    # "solid" also starts plenty of binary headers; the size check is what tells them apart
+    if count >= 0 and size == HEADER_SIZE + count * FACET_DTYPE.itemsize:
+        if count == 0:
+            return StlMesh(path, np.empty(0, FACET_DTYPE), head[:80])
+        return StlMesh(path, np.memmap(path, FACET_DTYPE, "r", HEADER_SIZE, (count,)), head[:80])
+
+    # ASCII: parsed into memory, there is nothing to map
+    with open(path, "r", errors="replace") as f:
+        coords = [line.split()[1:4] for line in f if line.lstrip().startswith("vertex")]
+    facets = np.zeros(len(coords) // 3, FACET_DTYPE)
+    facets["vertices"] = np.array(coords, dtype=np.float32).reshape(-1, 3, 3)
+    facets.flags.writeable = False
+    return StlMesh(path, facets, head[:80])
+
+
+def load_stl(path: str) -> StlMesh:
+    """Map an STL once per process; files with identical contents share one mapping."""
+    real = os.path.realpath(path)
+    st = os.stat(real)
+    size = st.st_size
+    key = (real, size, st.st_mtime_ns)  # a rewritten file gets mapped afresh
+    with _lock:
+        mesh = _by_path.get(key)
+        if mesh is not None:
+            return mesh
+        # only a file the same size as one already mapped can be a duplicate, so only those get compared
+        for other in _by_size.get(size, ()):
+            if filecmp.cmp(real, other.path, shallow=False):
+                _by_path[key] = other
+                return other
+        mesh = _map(real, size)
+        _by_path[key] = mesh
+        _by_size.setdefault(size, []).append(mesh)
+        return mesh
+
+
+def read_stl(path: str) -> np.ndarray:
+    """Triangles of a binary or ASCII STL as an (F, 3, 3) float32 array (a read-only view)."""
+    return load_stl(path).vertices
+
+
+def resolve_mesh(urdf_path: str, filename: str) -> str:
+    """Filesystem path of a URDF mesh reference; "/meshes/..." and package:// are taken relative to the URDF."""
+    if filename.startswith("package://"):
+        filename = filename[len("package://"):].split("/", 1)[1]
+    return os.path.join(os.path.dirname(os.path.abspath(urdf_path)), filename.lstrip("/"))
+
+
+def load_urdf_meshes(urdf_path: str) -> Dict[str, StlMesh]:
+    """Every STL the URDF references (visual and collision), keyed by the reference as written."""
+    with open(urdf_path) as f:
+        refs = dict.fromkeys(_MESH_REF.findall(f.read()))
+    return {ref: load_stl(resolve_mesh(urdf_path, ref)) for ref in refs if ref.lower().endswith(".stl")}
+
+
+def face_normals(vertices: np.ndarray, faces: np.ndarray) -> np.ndarray:
+    tri = vertices[faces]
+    n = np.cross(tri[:, 1] - tri[:, 0], tri[:, 2] - tri[:, 0])
+    length = np.linalg.norm(n, axis=1, keepdims=True)
+    return n / np.where(length > 0, length, 1.0)
+
+
+def write_stl(f, vertices: np.ndarray, faces: np.ndarray, header: bytes = b"arkbot") -> None:
+    """Binary STL of an indexed mesh to the open file ``f``."""
+    table = np.zeros(len(faces), dtype=FACET_DTYPE)
+    table["vertices"] = vertices[faces]
+    table["normal"] = face_normals(vertices, faces)
+    f.write(header[:80].ljust(80, b" "))
+    f.write(np.uint32(len(faces)).astype("<u4").tobytes())
+    f.write(table.tobytes())
+
+
+def index_triangles(triangles: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Shared vertices and (F, 3) faces of a triangle soup."""
+    vertices, inverse = np.unique(triangles.reshape(-1, 3), axis=0, return_inverse=True)
+    return vertices, inverse.reshape(-1, 3)
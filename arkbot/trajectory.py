@@ -0,0 +1,145 @@
+# trajectory.py
+from typing import Optional, Tuple
+import threading
+
+import numpy as np
+
+INTERPOLATIONS = ("linear", "cubic", "min_jerk")
+
+# consumed waypoints are kept this long, so bus threads sampling a little behind still find their segment
+RELEASE_SLACK_S = 0.1
+
+
+class TrajectoryBuffer:
+    """Timestamped joint waypoints in a preallocated ring, sampled at the bus tick.
+
+    Waypoints hold the full joint vector (joint_order) but only ``slots`` are
+    driven. Times are absolute time.monotonic() seconds. Pushing waypoints
+    replaces any buffered ones at or after the first new time, so a stream of
+    overlapping batches splices cleanly; consumed waypoints are released as
+    sampling moves past them. Every push bumps ``generation``, which lets each
+    bus thread send the final waypoint exactly once.
+
+    Interpolation between consecutive waypoints:
+      linear    straight line, velocity jumps at waypoints
+      cubic     cubic Hermite with finite-difference velocities (zero at the ends)
+      min_jerk  quintic with zero velocity/acceleration at every waypoint
+    """
+
+    def __init__(self, n_joints: int, capacity: int = 1024):
+        self.capacity = int(capacity)
+        self.times = np.empty(self.capacity)
+        self.positions = np.empty((self.capacity, n_joints))
+        self.velocities = np.zeros((self.capacity, n_joints))
+        self.slots = np.empty(0, dtype=np.intp)
+        self.interpolation = "min_jerk"
+        self.start_time = 0.0  # time base for appended batches
+        self.generation = 0
+
+        self._head = 0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    @property
+    def active(self) -> bool:
+        return self._count > 0
+
+    def clear(self) -> None:
+        with self._lock:
+            self._count = 0
+            self.generation += 1
+
+    def _index(self, logical):
+        return (self._head + logical) % self.capacity
+
+    def push(self, slots, times, positions, interpolation: str = "min_jerk",
+             start: Optional[Tuple[float, np.ndarray]] = None) -> None:
+        """Buffer ``positions`` (len(times) x len(slots)) at absolute ``times``.
+
+        ``start`` = (time, full joint vector) replaces the whole buffer with a new
+        trajectory that begins there; without it the waypoints splice onto the
+        buffered ones, which must drive the same slots.
+        """
+        if interpolation not in INTERPOLATIONS:
+            raise ValueError(f"Unknown interpolation '{interpolation}', expected one of {INTERPOLATIONS}")
+        slots = np.asarray(slots, dtype=np.intp)
+        times = np.asarray(times, dtype=float)
+        positions = np.asarray(positions, dtype=float).reshape(len(times), len(slots))
+        if len(times) > 1 and np.any(np.diff(times) <= 0):
+            raise ValueError("Trajectory times must be strictly increasing")
+
+        with self._lock:
+            if start is not None or self._count == 0:
+                self.slots = slots
+                self.interpolation = interpolation
+                self._head = self._count = 0
+                if start is not None:
+                    self.start_time = start[0]
+                    self.positions[0] = start[1]
+                    self.times[0] = start[0]
+                    self._count = 1
+            elif not np.array_equal(slots, self.slots):
+                raise ValueError("Appended waypoints must drive the same joints as the running trajectory")
+            else:
+                self.interpolation = interpolation
+
+            # drop buffered waypoints the new batch supersedes
+            while self._count and self.times[self._index(self._count - 1)] >= times[0]:
+                self._count -= 1
+            if self._count + len(times) > self.capacity:
+                raise ValueError(f"Trajectory exceeds the buffer capacity of {self.capacity} waypoints")
+
+            prev = self.positions[self._index(self._count - 1)] if self._count else None
+            for t, row in zip(times, positions):
+                i = self._index(self._count)
+                if prev is not None:
+                    self.positions[i] = prev
+                self.positions[i, slots] = row
+                self.times[i] = t
+                prev = self.positions[i]
+                self._count += 1
+            self._update_velocities()
+            self.generation += 1
+
+    def _update_velocities(self) -> None:
+        idx = self._index(np.arange(self._count))
+        t, p = self.times[idx], self.positions[idx]
+        v = np.zeros_like(p)
+        if len(idx) > 2:
+            v[1:-1] = (p[2:] - p[:-2]) / (t[2:] - t[:-2])[:, np.newaxis]
+        self.velocities[idx] = v
+
+    def sample(self, now: float) -> Tuple[Optional[np.ndarray], bool, int]:
+        """``(positions for slots, past the last waypoint, generation)`` at ``now``; positions is None when empty."""
+        with self._lock:
+            gen = self.generation
+            if self._count == 0:
+                return None, True, gen
+            while self._count > 1 and self.times[self._index(1)] <= now - RELEASE_SLACK_S:
+                self._head = self._index(1)
+                self._count -= 1
+
+            k = 0
+            while k + 1 < self._count and self.times[self._index(k + 1)] <= now:
+                k += 1
+            i0 = self._index(k)
+            if k + 1 == self._count or now <= self.times[i0]:
+                # before the start or at/after the final waypoint: hold it
+                return self.positions[i0, self.slots].copy(), bool(k + 1 == self._count and now >= self.times[i0]), gen
+
+            i1 = self._index(k + 1)
+            t0, t1 = self.times[i0], self.times[i1]
+            p0, p1 = self.positions[i0, self.slots], self.positions[i1, self.slots]
+            dt = t1 - t0
+            s = (now - t0) / dt
+            if self.interpolation == "linear":
+                q = p0 + (p1 - p0) * s
+            elif self.interpolation == "min_jerk":
+                q = p0 + (p1 - p0) * (s * s * s * (10.0 - 15.0 * s + 6.0 * s * s))
+            else:
+                # cubic Hermite
+                v0, v1 = self.velocities[i0, self.slots] * dt, self.velocities[i1, self.slots] * dt
+                s2, s3 = s * s, s * s * s
+                q = ((2 * s3 - 3 * s2 + 1) * p0 + (s3 - 2 * s2 + s) * v0
+                     + (-2 * s3 + 3 * s2) * p1 + (s3 - s2) * v1)
+            return q, False, gen
@@ -0,0 +1,118 @@
+# turn_state.py
+from typing import Callable, Dict, Optional, Sequence, Tuple
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+from disk_cache import atomic_write
+from servopkg import trace
+
+_trace = trace.channel("driver")
+
+FORMAT_VERSION = 1
+
+
+class TurnState:
+    """Last raw tick and loop count per servo, persisted so a restart keeps the multi-turn count.
+
+    The servos only report a position within one motor turn; on a geared joint
+    the turn count exists only in the driver. ``save`` writes it atomically
+    (temp file, fsync, rename), so a crash leaves either the previous or the
+    new file. ``restore`` accepts a saved count only if the fresh reading is
+    within ``max_drift`` ticks of the saved tick (the joint was not moved far
+    while the driver was down), correcting for the small motion there was.
+    """
+
+    def __init__(self, path: str, motor_ids: Sequence[int], ticks_per_turn: int, max_drift: int = 1024):
+        self.path = path
+        self.motor_ids = [int(sid) for sid in motor_ids]
+        self.ticks_per_turn = int(ticks_per_turn)
+        self.max_drift = int(max_drift)
+        self._last_saved: Optional[np.ndarray] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def load(self) -> Dict[int, Tuple[int, int]]:
+        """{sid: (tick, loops)} from the file; empty if it is missing, unreadable or for another setup."""
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            _trace.warn("turn state %s unreadable: %r", self.path, e)
+            return {}
+        if data.get("version") != FORMAT_VERSION or data.get("ticks_per_turn") != self.ticks_per_turn:
+            _trace.warn("turn state %s is for a different format or ticks_per_turn, ignored", self.path)
+            return {}
+        return {int(sid): (int(s["tick"]), int(s["loops"])) for sid, s in data.get("servos", {}).items()}
+
+    def restore(self, ticks: Sequence[int], fallback_loops: Sequence[int]) -> Tuple[np.ndarray, np.ndarray]:
+        """Loop counts for the fresh raw ``ticks`` (motor_ids order) and which of them came from the file;
+        the rest get ``fallback_loops``."""
+        saved = self.load()
+        tpt, half = self.ticks_per_turn, self.ticks_per_turn // 2
+        loops = np.array(fallback_loops, dtype=np.int64)
+        restored = np.zeros(len(self.motor_ids), dtype=bool)
+        for i, (sid, tick) in enumerate(zip(self.motor_ids, ticks)):
+            if sid not in saved:
+                continue
+            saved_tick, saved_loops = saved[sid]
+            drift = (int(tick) - saved_tick + half) % tpt - half
+            if abs(drift) > self.max_drift:
+                _trace.warn("[sid %d] moved %d ticks since the turn count was saved; falling back to home_loops",
+                            sid, drift)
+                continue
+            total = saved_loops * tpt + saved_tick + drift
+            loops[i] = (total - int(tick)) // tpt
+            restored[i] = True
+        return loops, restored
+
+    def save(self, total_ticks: np.ndarray) -> bool:
+        """Write unwrapped ``total_ticks`` (motor_ids order) unless they match the last save."""
+        total = np.asarray(total_ticks, dtype=np.int64)
+        if self._last_saved is not None and np.array_equal(total, self._last_saved):
+            return False
+        loops, ticks = np.divmod(total, self.ticks_per_turn)
+        data = {
+            "version": FORMAT_VERSION, "ticks_per_turn": self.ticks_per_turn, "saved": time.time(),
+            "servos": {str(sid): {"tick": int(t), "loops": int(l)}
+                       for sid, t, l in zip(self.motor_ids, ticks.tolist(), loops.tolist())},
+        }
+
+        def write(f):
+            f.write(json.dumps(data).encode())
+            f.flush()
+            os.fsync(f.fileno())
+
+        atomic_write(self.path, write)
+        self._last_saved = total.copy()
+        return True
+
+    def start(self, read_total_ticks: Callable[[], np.ndarray], interval: float = 0.5) -> None:
+        """Save ``read_total_ticks()`` every ``interval`` seconds from a background thread (only when it changed)."""
+        def run():
+            while not self._stop.wait(interval):
+                self._save_from(read_total_ticks)
+
+        self._read = read_total_ticks
+        self._thread = threading.Thread(target=run, daemon=True, name="arkbot-turn-state")
+        self._thread.start()
+
+    def _save_from(self, read_total_ticks) -> None:
+        try:
+            self.save(read_total_ticks())
+        except Exception as e:
+            _trace.error("turn state %s: %r", self.path, e)
+
+    def stop(self) -> None:
+        """Stop the writer and save one last time."""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout=2.0)
+        self._thread = None
+        self._save_from(self._read)
@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+"""Protocol stack throughput against the loopback STS emulator.
+
+Reports transactions/s for PING, READ, WRITE, SYNC_READ and SYNC_WRITE at
+several baud rates:
+
+    python benchmarks/bench_bus.py --bauds 115200 500000 1000000 --motors 8
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "arkbot"))
+
+from servopkg import sts, GroupSyncRead, STS_ABSPOS, STS_GOAL_POSITION_L, STS_PRESENT_POSITION_L
+from servopkg.emulator import ServoChain, SimulatedServo, VirtualPortHandler
+
+
+def rate(fn, seconds):
+    n = 0
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        fn()
+        n += 1
+    return n / seconds
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--bauds", type=int, nargs="+", default=[115200, 500000, 1_000_000])
+    ap.add_argument("--motors", type=int, default=8)
+    ap.add_argument("--adapter-latency-us", type=float, default=0.0)
+    ap.add_argument("--return-delay-us", type=float, default=20.0)
+    ap.add_argument("--drop-rate", type=float, default=0.0)
+    ap.add_argument("--corrupt-rate", type=float, default=0.0)
+    ap.add_argument("--seconds", type=float, default=1.0)
+    args = ap.parse_args()
+
+    ids = list(range(1, args.motors + 1))
+    print(f"{'baud':>8} {'ping':>9} {'read':>9} {'write':>9} {'sync_read':>10} {'sync_write':>11}  (transactions/s)")
+    for baud in args.bauds:
+        chain = ServoChain([SimulatedServo(sid, return_delay_us=args.return_delay_us) for sid in ids],
+                           drop_rate=args.drop_rate, corrupt_rate=args.corrupt_rate, seed=0)
+        port = VirtualPortHandler(chain, adapter_latency_us=args.adapter_latency_us)
+        port.setBaudRate(baud)
+        pkt = sts(port)
+
+        reader = GroupSyncRead(pkt, STS_PRESENT_POSITION_L, STS_ABSPOS + 2 - STS_PRESENT_POSITION_L)
+        for sid in ids:
+            reader.addParam(sid)
+
+        def sync_write():
+            for sid in ids:
+                pkt.SyncWritePosEx(sid, 2048, 0, 0)
+            pkt.groupSyncWrite.txPacket()
+            pkt.groupSyncWrite.clearParam()
+            # SYNC_WRITE has no status reply; wait out the wire time before the next packet
+            port.waitBusIdle()
+
+        results = [
+            rate(lambda: pkt.ping(ids[0]), args.seconds),
+            rate(lambda: pkt.read2ByteTxRx(ids[0], STS_ABSPOS), args.seconds),
+            rate(lambda: pkt.write2ByteTxRx(ids[0], STS_GOAL_POSITION_L, 2048), args.seconds),
+            rate(reader.txRxPacket, args.seconds),
+            rate(sync_write, args.seconds),
+        ]
+        print(f"{baud:>8} " + " ".join(f"{r:>{w}.0f}" for r, w in zip(results, (9, 9, 9, 10, 11))))
+    print(chain.stats)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+"""Collision geometry cost with the full CAD meshes (ark_bot.urdf) vs the light ones (ark_bot_collision.urdf).
+
+Build the light meshes first with arkbot/collision_mesh.py. Measures reading
+every <collision> mesh, and a per-step collision check: pose every link's mesh
+with FK, AABB broad phase over non-adjacent link pairs, then a vertices-inside-
+box narrow phase. With pybullet installed it also times loadURDF and
+performCollisionDetection on both URDFs.
+
+    python benchmarks/bench_collision_mesh.py --steps 200
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "arkbot"))
+
+from kinematics import KinematicChain, load_urdf_joints, rpy_to_matrix
+from stl_io import index_triangles, read_stl, resolve_mesh
+
+ARKBOT = os.path.join(os.path.dirname(__file__), "..", "arkbot")
+_LINK = re.compile(r'<link name="([^"]+)">.*?</link>', re.DOTALL)
+_COLLISION = re.compile(r"<collision\b.*?</collision>", re.DOTALL)
+_ORIGIN = re.compile(r'<origin\s+rpy="([^"]+)"\s+xyz="([^"]+)"')
+_MESH = re.compile(r'filename="([^"]+)"(?:\s+scale="([^"]+)")?')
+
+
+def collision_meshes(urdf):
+    """{link: (mesh path, scale, 4x4 link -> mesh origin)} for every link with a collision mesh."""
+    with open(urdf) as f:
+        text = f.read()
+    out = {}
+    for m in _LINK.finditer(text):
+        c = _COLLISION.search(m.group(0))
+        mesh = c and _MESH.search(c.group(0))
+        if mesh:
+            origin = np.eye(4)
+            o = _ORIGIN.search(c.group(0))
+            if o:
+                origin[:3, :3] = rpy_to_matrix([float(v) for v in o.group(1).split()])
+                origin[:3, 3] = [float(v) for v in o.group(2).split()]
+            scale = np.array([float(v) for v in (mesh.group(2) or "1 1 1").split()])
+            out[m.group(1)] = (resolve_mesh(urdf, mesh.group(1)), scale, origin)
+    return out
+
+
+def load(urdf):
+    """Collision vertices of every link, in the link frame."""
+    out = {}
+    for link, (path, scale, origin) in collision_meshes(urdf).items():
+        v = index_triangles(read_stl(path))[0] * scale
+        out[link] = v @ origin[:3, :3].T + origin[:3, 3]
+    return out
+
+
+class Scene:
+    def __init__(self, urdf, vertices):
+        joints = load_urdf_joints(urdf)
+        self.movable = [j.name for j in joints if j.kind != "fixed"]
+        parent = {j.child: j.parent for j in joints}
+        self.links = list(vertices)
+        self.vertices = [vertices[link] for link in self.links]
+        self.chains = {link: KinematicChain(joints, link) for link in self.links if link in parent}
+        self.pairs = [(a, b) for a in range(len(self.links)) for b in range(a + 1, len(self.links))
+                      if parent.get(self.links[a]) != self.links[b] and parent.get(self.links[b]) != self.links[a]]
+
+    def pose(self, q):
+        by_name = dict(zip(self.movable, q))
+        out = []
+        for link in self.links:
+            chain = self.chains.get(link)
+            out.append(np.eye(4) if chain is None else chain.fk([by_name[n] for n in chain.joint_names]))
+        return out
+
+    def check(self, q):
+        """Number of link pairs with a vertex inside the other's world box."""
+        world = [v @ T[:3, :3].T + T[:3, 3] for v, T in zip(self.vertices, self.pose(q))]
+        lo = [w.min(axis=0) for w in world]
+        hi = [w.max(axis=0) for w in world]
+        hits = 0
+        for a, b in self.pairs:
+            if np.any(lo[a] > hi[b]) or np.any(lo[b] > hi[a]):
+                continue
+            inside = np.all((world[a] >= lo[b]) & (world[a] <= hi[b]), axis=1)
+            hits += bool(inside.any())
+        return hits
+
+
+def bench(label, urdf, qs, pybullet):
+    t0 = time.perf_counter()
+    vertices = load(urdf)
+    t_load = time.perf_counter() - t0
+    scene = Scene(urdf, vertices)
+    t0 = time.perf_counter()
+    hits = sum(scene.check(q) for q in qs)
+    t_step = (time.perf_counter() - t0) / len(qs)
+    n = sum(len(v) for v in vertices.values())
+    print(f"{label:<8} {n:8d} vertices   load {t_load * 1e3:8.1f} ms   "
+          f"collision step {t_step * 1e3:7.2f} ms   ({hits} pair hits)")
+
+    if pybullet is not None:
+        client = pybullet.connect(pybullet.DIRECT)
+        t0 = time.perf_counter()
+        body = pybullet.loadURDF(os.path.abspath(urdf), useFixedBase=True, physicsClientId=client)
+        t_load = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        for q in qs:
+            for i in range(min(len(q), pybullet.getNumJoints(body, physicsClientId=client))):
+                pybullet.resetJointState(body, i, q[i], physicsClientId=client)
+            pybullet.performCollisionDetection(physicsClientId=client)
+        t_step = (time.perf_counter() - t0) / len(qs)
+        pybullet.disconnect(client)
+        print(f"{'':<8} pybullet loadURDF {t_load * 1e3:8.1f} ms   performCollisionDetection {t_step * 1e3:7.3f} ms")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--steps", type=int, default=200)
+    args = ap.parse_args()
+
+    try:
+        import pybullet
+    except ImportError:
+        pybullet = None
+
+    light = os.path.join(ARKBOT, "ark_bot_collision.urdf")
+    if not os.path.exists(light):
+        sys.exit("ark_bot_collision.urdf not found; run arkbot/collision_mesh.py first")
+    n = len([j for j in load_urdf_joints(light) if j.kind != "fixed"])
+    qs = np.random.default_rng(0).uniform(-1.5, 1.5, (args.steps, n))
+    qs[:, 6:] = np.clip(qs[:, 6:], -0.04, 0.04)  # finger sliders
+    bench("full", os.path.join(ARKBOT, "ark_bot.urdf"), qs, pybullet)
+    bench("light", light, qs, pybullet)
+
+
+if __name__ == "__main__":
+    main()
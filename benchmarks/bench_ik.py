@@ -0,0 +1,59 @@
+#!/usr/bin/env python
+"""Cartesian IK rate on the arm chain from ark_bot.urdf: streamed, repeated and cold poses.
+
+    python benchmarks/bench_ik.py --poses 500
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "arkbot"))
+
+from kinematics import KinematicChain, matrix_to_quat
+from ik import IKSolver
+
+URDF = os.path.join(os.path.dirname(__file__), "..", "arkbot", "ark_bot.urdf")
+
+
+def poses(chain, qs):
+    frames = [chain.fk(q) for q in qs]
+    return np.array([T[:3, 3] for T in frames]), np.array([matrix_to_quat(T[:3, :3]) for T in frames])
+
+
+def run(label, solver, positions, quaternions):
+    t0 = time.perf_counter()
+    _, ok = solver.solve_path(positions, quaternions)
+    dt = time.perf_counter() - t0
+    print(f"{label:<28} {len(positions) / dt:10.1f} solves/s  ({ok.mean() * 100:.1f}% converged)")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--poses", type=int, default=500)
+    ap.add_argument("--ee-link", default=None, help="tip link (default: child of the last revolute joint)")
+    args = ap.parse_args()
+
+    chain = KinematicChain.from_urdf(URDF, args.ee_link)
+    solver = IKSolver(chain)
+    lo = np.where(np.isfinite(chain.lower), chain.lower, -np.pi) * 0.8
+    hi = np.where(np.isfinite(chain.upper), chain.upper, np.pi) * 0.8
+
+    # a smooth path, as a teleop or planner streams it
+    path = np.linspace(lo * 0.3, hi * 0.3, args.poses)
+    positions, quaternions = poses(chain, path)
+    solver.last = path[0]
+    run("streamed path (warm start)", solver, positions, quaternions)
+    run("same path again (cache)", solver, positions, quaternions)
+
+    # unrelated poses one after another
+    rng = np.random.default_rng(0)
+    positions, quaternions = poses(chain, rng.uniform(lo, hi, (min(args.poses, 200), chain.n)))
+    run("random poses (cold)", IKSolver(chain, cache_size=0), positions, quaternions)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+"""Joint-state read throughput: one READ per servo vs a single SYNC_READ.
+
+Runs against the servopkg.emulator loopback bus, so no hardware is needed:
+
+    python benchmarks/bench_joint_read.py --motors 8 --baud 1000000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "arkbot"))
+
+from servopkg import sts, GroupSyncRead, STS_ABSPOS
+from servopkg.emulator import ServoChain, SimulatedServo, VirtualPortHandler
+
+
+def run(label, fn, seconds):
+    n = 0
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        fn()
+        n += 1
+    print(f"{label:<22} {n / seconds:10.1f} joint-state reads/s")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--motors", type=int, default=8)
+    ap.add_argument("--baud", type=int, default=1_000_000)
+    ap.add_argument("--usb-latency-us", type=float, default=500.0)
+    ap.add_argument("--return-delay-us", type=float, default=20.0)
+    ap.add_argument("--seconds", type=float, default=2.0)
+    args = ap.parse_args()
+
+    ids = list(range(1, args.motors + 1))
+    chain = ServoChain([SimulatedServo(sid, return_delay_us=args.return_delay_us) for sid in ids])
+    port = VirtualPortHandler(chain, adapter_latency_us=args.usb_latency_us)
+    port.setBaudRate(args.baud)
+    pkt = sts(port)
+
+    def per_id():
+        for sid in ids:
+            pkt.ReadAbsPos(sid)
+
+    reader = GroupSyncRead(pkt, STS_ABSPOS, 2)
+    for sid in ids:
+        reader.addParam(sid)
+
+    def bulk():
+        reader.txRxPacket()
+        for sid in ids:
+            reader.getData(sid, STS_ABSPOS, 2)
+
+    print(f"{args.motors} motors @ {args.baud} baud, usb latency {args.usb_latency_us} us")
+    run("per-ID READ", per_id, args.seconds)
+    run("SYNC_READ", bulk, args.seconds)
+
+
+if __name__ == "__main__":
+    main()
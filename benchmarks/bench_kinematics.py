@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+"""Forward kinematics of the arm chain: one configuration at a time vs N at once, and URDF load cost.
+
+    python benchmarks/bench_kinematics.py --configs 10000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "arkbot"))
+
+import kinematics
+from kinematics import KinematicChain, load_urdf_joints
+
+URDF = os.path.join(os.path.dirname(__file__), "..", "arkbot", "ark_bot.urdf")
+
+
+def timed(fn, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--configs", type=int, default=10000)
+    args = ap.parse_args()
+
+    os.environ["ARKBOT_CACHE"] = tempfile.mkdtemp(prefix="arkbot-bench-")
+    parse = timed(lambda: (kinematics._parsed.clear(), load_urdf_joints(URDF, use_cache=False)))
+    load_urdf_joints(URDF)  # writes the cache
+    cached = timed(lambda: (kinematics._parsed.clear(), load_urdf_joints(URDF)))
+    print(f"URDF parse {parse * 1e3:7.2f} ms   binary cache {cached * 1e3:7.2f} ms")
+
+    chain = KinematicChain.from_urdf(URDF)
+    q = np.random.default_rng(0).uniform(-np.pi, np.pi, (args.configs, chain.n))
+    n_loop = min(args.configs, 2000)
+    for label, fn in (("fk", chain.fk), ("fk_jacobian", chain.fk_jacobian)):
+        loop = timed(lambda: [fn(row) for row in q[:n_loop]], repeat=2) / n_loop
+        batch = timed(lambda: fn(q)) / args.configs
+        print(f"{label:<12} loop {1 / loop:12.0f} configs/s   batched {1 / batch:12.0f} configs/s  ({loop / batch:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+"""Full joint-state read rate with the motors split across 1, 2, 4 ... adapters.
+
+Each adapter is an emulated STS chain behind a pty, served from a child process
+so the emulators don't compete with the bus threads for the GIL. One thread per
+bus polls its servos' 56..70 status block, as the driver's bus shards do:
+
+    python benchmarks/bench_multibus.py --motors 8 --buses 1 2 4
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "arkbot"))
+
+from servopkg import ServoBus
+from servopkg.emulator import ServoChain, SimulatedServo, PtyServoBridge
+
+
+def serve(id_groups, baud, return_delay_us, conn, stop):
+    bridges = []
+    for ids in id_groups:
+        chain = ServoChain([SimulatedServo(sid, return_delay_us=return_delay_us) for sid in ids])
+        bridges.append(PtyServoBridge(chain, baud).start())
+    conn.send([br.port_name for br in bridges])
+    stop.wait()
+    for br in bridges:
+        br.stop()
+
+
+def measure(ports, id_groups, baud, rx_mode, bulk, seconds):
+    buses = [ServoBus(port, baud, ids, rx_mode) for port, ids in zip(ports, id_groups)]
+    for bus in buses:
+        bus.port.setLatencyTimer(5)
+    counts = [0] * len(buses)
+    go, end = threading.Event(), [0.0]
+
+    def worker(i, bus):
+        go.wait()
+        while time.perf_counter() < end[0]:
+            bus.readStatus(bulk)
+            counts[i] += 1
+
+    threads = [threading.Thread(target=worker, args=(i, bus)) for i, bus in enumerate(buses)]
+    for t in threads:
+        t.start()
+    end[0] = time.perf_counter() + seconds
+    go.set()
+    for t in threads:
+        t.join()
+    for bus in buses:
+        bus.close()
+    # the merged vector is only as fresh as the slowest bus
+    return min(counts) / seconds
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--motors", type=int, default=8)
+    ap.add_argument("--buses", type=int, nargs="+", default=[1, 2, 4])
+    ap.add_argument("--baud", type=int, default=1_000_000)
+    ap.add_argument("--return-delay-us", type=float, default=20.0)
+    ap.add_argument("--rx-mode", default="select")
+    ap.add_argument("--no-bulk", action="store_true", help="READ per servo instead of one SYNC_READ per bus")
+    ap.add_argument("--seconds", type=float, default=2.0)
+    args = ap.parse_args()
+
+    ids = list(range(1, args.motors + 1))
+    base = None
+    print(f"{args.motors} motors @ {args.baud} baud, {'READ per servo' if args.no_bulk else 'SYNC_READ'}")
+    for n in args.buses:
+        id_groups = [ids[i::n] for i in range(n)]
+        parent, child = multiprocessing.Pipe()
+        stop = multiprocessing.Event()
+        proc = multiprocessing.Process(target=serve, args=(id_groups, args.baud, args.return_delay_us, child, stop))
+        proc.start()
+        ports = parent.recv()
+        try:
+            rate = measure(ports, id_groups, args.baud, args.rx_mode, not args.no_bulk, args.seconds)
+        finally:
+            stop.set()
+            proc.join()
+        base = base or rate
+        print(f"{n} bus(es): {rate:8.1f} full joint-state reads/s  ({rate / base:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
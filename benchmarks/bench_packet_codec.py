@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+"""Encode/decode cost per packet: PacketCodec vs the previous list-based code.
+
+    python benchmarks/bench_packet_codec.py --iterations 200000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "arkbot"))
+
+from servopkg import (PortHandler, PacketCodec, INST_WRITE, STS_ACC,
+                      PKT_ID, PKT_LENGTH, PKT_INSTRUCTION, PKT_PARAMETER0, PKT_ERROR, RXPACKET_MAX_LEN)
+
+
+class CannedPort(PortHandler):
+    """Replays the same status packet forever, optionally behind some line noise."""
+
+    def __init__(self, packet):
+        PortHandler.__init__(self, "canned")
+        self.packet = packet
+        self.pos = 0
+        self.packet_timeout = 1e12
+
+    def readPort(self, length):
+        out = self.packet[self.pos:self.pos + length]
+        self.pos += len(out)
+        if self.pos >= len(self.packet):
+            self.pos = 0
+        return out
+
+
+# ---- previous implementation, kept here as the reference ----
+
+def legacy_encode_write(sts_id, address, length, data):
+    txpacket = [0] * (length + 7)
+    txpacket[PKT_ID] = sts_id
+    txpacket[PKT_LENGTH] = length + 3
+    txpacket[PKT_INSTRUCTION] = INST_WRITE
+    txpacket[PKT_PARAMETER0] = address
+    txpacket[PKT_PARAMETER0 + 1: PKT_PARAMETER0 + 1 + length] = data[0: length]
+
+    checksum = 0
+    total_packet_length = txpacket[PKT_LENGTH] + 4
+    txpacket[0] = 0xFF
+    txpacket[1] = 0xFF
+    for idx in range(2, total_packet_length - 1):
+        checksum += txpacket[idx]
+    txpacket[total_packet_length - 1] = ~checksum & 0xFF
+    return txpacket
+
+
+def legacy_rx_packet(port):
+    rxpacket = []
+    checksum = 0
+    rx_length = 0
+    wait_length = 6
+    while True:
+        rxpacket.extend(port.readPort(wait_length - rx_length))
+        rx_length = len(rxpacket)
+        if rx_length >= wait_length:
+            for idx in range(0, (rx_length - 1)):
+                if (rxpacket[idx] == 0xFF) and (rxpacket[idx + 1] == 0xFF):
+                    break
+            if idx == 0:
+                if (rxpacket[PKT_ID] > 0xFD) or (rxpacket[PKT_LENGTH] > RXPACKET_MAX_LEN) or (
+                        rxpacket[PKT_ERROR] > 0x7F):
+                    del rxpacket[0]
+                    rx_length -= 1
+                    continue
+                if wait_length != (rxpacket[PKT_LENGTH] + PKT_LENGTH + 1):
+                    wait_length = rxpacket[PKT_LENGTH] + PKT_LENGTH + 1
+                    continue
+                for i in range(2, wait_length - 1):
+                    checksum += rxpacket[i]
+                checksum = ~checksum & 0xFF
+                return rxpacket, rxpacket[wait_length - 1] == checksum
+            else:
+                del rxpacket[0: idx]
+                rx_length -= idx
+
+
+def ns_per_call(fn, iterations, repeats=25):
+    # best of many short batches: on a shared or single-core box long batches mostly measure the neighbours
+    batch = max(1, iterations // repeats)
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter_ns()
+        for _ in range(batch):
+            fn()
+        best = min(best, (time.perf_counter_ns() - start) / batch)
+    return best
+
+
+def status_packet(sts_id, params):
+    body = bytes([sts_id, len(params) + 2, 0]) + bytes(params)
+    return b"\xff\xff" + body + bytes([~sum(body) & 0xFF])
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--iterations", type=int, default=50000)
+    args = ap.parse_args()
+    n = args.iterations
+
+    codec = PacketCodec()
+    data = [50, 0x00, 0x08, 0, 0, 0xE8, 0x03]  # WritePosEx payload
+    print(f"{'case':<34} {'legacy ns':>10} {'codec ns':>10} {'speedup':>8}")
+
+    def row(label, legacy, new):
+        a, b = ns_per_call(legacy, n), ns_per_call(new, n)
+        print(f"{label:<34} {a:10.0f} {b:10.0f} {a / b:7.2f}x")
+
+    row("encode WRITE (7 data bytes)",
+        lambda: legacy_encode_write(1, STS_ACC, 7, data),
+        lambda: codec.packWrite(1, INST_WRITE, STS_ACC, 7, data))
+
+    big = list(range(7)) * 16
+    row("encode WRITE (112 data bytes)",
+        lambda: legacy_encode_write(1, STS_ACC, len(big), big),
+        lambda: codec.packWrite(1, INST_WRITE, STS_ACC, len(big), big))
+
+    for label, wire in (("decode status (2 data bytes)", status_packet(1, [0x00, 0x08])),
+                        ("decode status (15 data bytes)", status_packet(1, list(range(15)))),
+                        ("decode after 8 bytes of noise", b"\x00\x13\xff\x01\x02\x03\x04\x05" + status_packet(1, [0x00, 0x08]))):
+        legacy_port, new_port = CannedPort(wire), CannedPort(wire)
+        row(label, lambda: legacy_rx_packet(legacy_port), lambda: codec.readStatus(new_port))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+"""Cost of recording on the bus threads: Recorder.record_state / record_goals per call,
+and the resulting bytes per row on disk.
+
+    python benchmarks/bench_recorder.py --rows 100000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "arkbot"))
+
+from recorder import Recorder, RecordingLog  # noqa: E402
+from state_snapshot import JointSample  # noqa: E402
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--rows", type=int, default=100_000)
+    ap.add_argument("--joints", type=int, default=8)
+    args = ap.parse_args()
+
+    n = args.joints
+    names = [f"joint_{i}" for i in range(n)]
+    sids = list(range(1, n + 1))
+    slots = np.arange(n)
+    sample = JointSample.empty(n)
+    sample.positions[:] = np.linspace(-1, 1, n)
+    goals = {sid: (2048 + sid, 1000, 50) for sid in sids}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        rec = Recorder(os.path.join(tmp, "log"), names, sids)
+        t0 = time.perf_counter()
+        for i in range(args.rows):
+            sample.stamp = float(i)
+            rec.record_state(slots, sample)
+        t_state = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        for _ in range(args.rows):
+            rec.record_goals(goals, 0)
+        t_goals = time.perf_counter() - t0
+        rec.close()
+
+        size = sum(os.path.getsize(os.path.join(rec.path, f)) for f in os.listdir(rec.path) if f.endswith(".bin"))
+        t0 = time.perf_counter()
+        log = RecordingLog(rec.path)
+        rows = len(log.state["t"])
+        mean = float(log.state["positions"].mean())
+        t_open = time.perf_counter() - t0
+
+    print(f"{n} joints, {args.rows} rows")
+    print(f"record_state   {t_state / args.rows * 1e6:6.2f} us/row")
+    print(f"record_goals   {t_goals / args.rows * 1e6:6.2f} us/row")
+    print(f"on disk        {size / (2 * args.rows):6.0f} bytes/row")
+    print(f"open + scan    {t_open * 1e3:6.1f} ms for {rows} state rows (mean position {mean:+.3f})")
+
+
+if __name__ == "__main__":
+    main()
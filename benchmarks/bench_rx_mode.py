@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+"""CPU time and latency per transaction: spin-polling vs select() receive.
+
+The servo chain runs behind a pty in a child process, so the host side goes
+through real pyserial file descriptors (POSIX only):
+
+    python benchmarks/bench_rx_mode.py --transactions 2000 --motors 8
+"""
+
+import argparse
+import multiprocessing
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "arkbot"))
+
+from servopkg import (PortHandler, sts, GroupSyncRead, STS_ABSPOS,
+                      RX_MODE_SPIN, RX_MODE_SELECT)
+from servopkg.emulator import ServoChain, PtyServoBridge
+
+
+def serve(ids, baud, conn):
+    with PtyServoBridge(ServoChain(ids), baud) as bridge:
+        conn.send(bridge.port_name)
+        conn.recv()  # block until the parent is done
+
+
+def measure(port_name, baud, rx_mode, ids, transactions):
+    port = PortHandler(port_name, rx_mode)
+    port.openPort()
+    port.setBaudRate(baud)
+    pkt = sts(port)
+    reader = GroupSyncRead(pkt, STS_ABSPOS, 2)
+    for sid in ids:
+        reader.addParam(sid)
+
+    rows = []
+    for label, fn in (("READ", lambda: pkt.read2ByteTxRx(ids[0], STS_ABSPOS)),
+                      ("SYNC_READ", reader.txRxPacket)):
+        latencies = []
+        cpu_start = time.thread_time()
+        for _ in range(transactions):
+            t0 = time.perf_counter()
+            fn()
+            latencies.append((time.perf_counter() - t0) * 1e6)
+        cpu = (time.thread_time() - cpu_start) / transactions * 1e6
+        latencies.sort()
+        rows.append((label, statistics.mean(latencies), latencies[int(len(latencies) * 0.99) - 1], cpu))
+    port.closePort()
+    return rows
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--motors", type=int, default=8)
+    ap.add_argument("--baud", type=int, default=1_000_000)
+    ap.add_argument("--transactions", type=int, default=1000)
+    args = ap.parse_args()
+
+    ids = list(range(1, args.motors + 1))
+    parent, child = multiprocessing.Pipe()
+    proc = multiprocessing.Process(target=serve, args=(ids, args.baud, child), daemon=True)
+    proc.start()
+    port_name = parent.recv()
+
+    print(f"{'mode':<8} {'txn':<10} {'mean us':>9} {'p99 us':>9} {'cpu us/txn':>11} {'cpu %':>7}")
+    try:
+        for mode in (RX_MODE_SPIN, RX_MODE_SELECT):
+            for label, mean, p99, cpu in measure(port_name, args.baud, mode, ids, args.transactions):
+                print(f"{mode:<8} {label:<10} {mean:9.0f} {p99:9.0f} {cpu:11.0f} {100 * cpu / mean:6.0f}%")
+    finally:
+        parent.send("stop")
+        proc.join(timeout=2.0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+"""Loading every STL ark_bot.urdf references: reading each file into memory vs mapping them.
+
+Each strategy runs in a fresh process; reported are wall time to load, time to
+then touch every vertex once, and the process's private (anonymous) memory
+growth. Mapped pages are file-backed and shared through the page cache, so
+they do not count against any one process.
+
+    python benchmarks/bench_stl_load.py
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "arkbot"))
+
+URDF = os.path.join(os.path.dirname(__file__), "..", "arkbot", "ark_bot.urdf")
+
+
+def rss_anon_kb():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("RssAnon:"):
+                return int(line.split()[1])
+    return 0
+
+
+def run(strategy, conn):
+    import numpy as np
+    import stl_io
+
+    base = rss_anon_kb()
+    t0 = time.perf_counter()
+    if strategy == "read":
+        with open(URDF) as f:
+            refs = dict.fromkeys(stl_io._MESH_REF.findall(f.read()))
+        meshes = {}
+        for ref in refs:
+            with open(stl_io.resolve_mesh(URDF, ref), "rb") as f:
+                f.seek(stl_io.HEADER_SIZE)
+                meshes[ref] = np.fromfile(f, stl_io.FACET_DTYPE)["vertices"]
+        distinct = len(meshes)
+    else:
+        loaded = stl_io.load_urdf_meshes(URDF)
+        meshes = {ref: m.vertices for ref, m in loaded.items()}
+        distinct = len({id(m) for m in loaded.values()})
+    t_load = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    total = sum(float(v.sum(dtype=np.float64)) for v in meshes.values())
+    t_touch = time.perf_counter() - t0
+    conn.send((len(meshes), distinct, t_load, t_touch, rss_anon_kb() - base, total))
+
+
+def main():
+    argparse.ArgumentParser(description=__doc__.splitlines()[0]).parse_args()
+    for strategy in ("read", "mmap"):
+        parent, child = multiprocessing.Pipe()
+        proc = multiprocessing.Process(target=run, args=(strategy, child))
+        proc.start()
+        refs, distinct, t_load, t_touch, anon_kb, _ = parent.recv()
+        proc.join()
+        print(f"{strategy:<5} {refs} refs -> {distinct:2d} arrays   load {t_load * 1e3:8.2f} ms   "
+              f"touch all {t_touch * 1e3:7.1f} ms   private memory +{anon_kb / 1024:6.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
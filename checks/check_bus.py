@@ -0,0 +1,160 @@
+#!/usr/bin/env python
+"""Packet codec round trips and the SYNC_READ status path, against the emulator.
+
+Needs only servopkg (no ark): reads and writes of every width and a
+SYNC_WRITE must land in / come back from the servos' control tables; the
+codec must decode replies split into small reads and behind line noise;
+the status poll must fall back to a READ for servos that miss their
+SYNC_READ slot, survive corrupt and short replies, and keep the data of a
+servo reporting an alarm bit:
+
+    python checks/check_bus.py
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "arkbot"))
+
+from servopkg import (ServoBus, PacketCodec, PortHandler, COMM_SUCCESS, COMM_RX_CORRUPT,
+                      ERRBIT_OVERLOAD, STS_ACC, STS_GOAL_SPEED_L, STS_GOAL_POSITION_L, STS_ABSPOS)
+from servopkg.emulator import ServoChain, SimulatedServo, PtyServoBridge, _status_packet
+
+from emulated_driver import report, wait_until
+
+IDS = [1, 2, 3, 4]
+POLLS = 200
+
+
+class SplitPort(PortHandler):
+    """Hands out ``wire`` at most ``chunk`` bytes per read and never times out."""
+
+    def __init__(self, wire, chunk):
+        PortHandler.__init__(self, "split")
+        self.wire, self.chunk, self.pos = wire, chunk, 0
+
+    def readPort(self, length):
+        out = self.wire[self.pos:self.pos + min(length, self.chunk)]
+        self.pos += len(out)
+        return out
+
+    def isPacketTimeout(self):
+        return False
+
+
+def check_codec():
+    ok = True
+    codec = PacketCodec()
+    bad = []
+    for params in (b"", b"\x00\x08", bytes(range(15))):
+        packet = _status_packet(3, 0, params)
+        for noise in (b"", b"\x00\x13\xff\x01\x02", b"\xff"):
+            for chunk in (1, 2, 3, 100):
+                view, result = codec.readStatus(SplitPort(noise + packet, chunk))
+                if result != COMM_SUCCESS or bytes(view) != packet:
+                    bad.append((len(params), noise, chunk))
+    ok &= report("codec decodes split, noisy and bare replies", not bad, f"failed {bad}")
+    flipped = bytearray(_status_packet(3, 0, b"\x01\x02"))
+    flipped[-2] ^= 0x10
+    ok &= report("codec flags a bad checksum", codec.readStatus(SplitPort(bytes(flipped), 100))[1] == COMM_RX_CORRUPT)
+    return ok
+
+
+def check_round_trips(bus, chain):
+    ok = True
+    sdk, sid, servo = bus.sdk, IDS[0], chain.servos[IDS[0]]
+    with bus.lock:
+        sdk.write1ByteTxRx(sid, STS_ACC, 37)
+        sdk.write2ByteTxRx(sid, STS_GOAL_SPEED_L, 1234)
+        sdk.write4ByteTxRx(sid, STS_GOAL_POSITION_L, 2100)  # goal position, then goal time 0
+        acc, r1, _ = sdk.read1ByteTxRx(sid, STS_ACC)
+        speed, r2, _ = sdk.read2ByteTxRx(sid, STS_GOAL_SPEED_L)
+        goal, r3, _ = sdk.read4ByteTxRx(sid, STS_GOAL_POSITION_L)
+    ok &= report("1/2/4-byte writes read back", (acc, speed, goal & 0xFFFF) == (37, 1234, 2100)
+                 and r1 == r2 == r3 == COMM_SUCCESS, f"{acc} {speed} {goal & 0xFFFF}")
+    ok &= report("writes land in the control table", servo.table[STS_ACC] == 37 and servo.goal == 2100)
+
+    goals = {s: (1000 + 100 * s, 200 + s, 10 + s) for s in IDS}
+    bus.writeGoals(goals)
+    bus.readStatus(True)  # the SYNC_WRITE has no reply; a read orders after it
+    got = {s: (chain.servos[s].goal, chain.servos[s]._word(STS_GOAL_SPEED_L), chain.servos[s].table[STS_ACC])
+           for s in IDS}
+    ok &= report("SYNC_WRITE goal/speed/acc reach every servo", got == goals, f"{got}")
+
+    eproms = sdk.ReadEproms(IDS)
+    ok &= report("EEPROM block sync-read decodes", all(eproms[s] and eproms[s]["id"] == s for s in IDS))
+    return ok
+
+
+def park(bus, chain):
+    """Bring every servo to rest on its current goal (at full speed), so positions hold still."""
+    servos = [chain.servos[s] for s in IDS]
+    bus.writeGoals({s: (int(servo.goal), 0, 0) for s, servo in zip(IDS, servos)})
+    bus.readStatus(True)
+    return wait_until(lambda: all(servo.update() or servo.position == servo.goal for servo in servos))
+
+
+def check_status_path(bus, chain):
+    ok = True
+    abs_pos = lambda s: chain.servos[s].table[STS_ABSPOS] | (chain.servos[s].table[STS_ABSPOS + 1] << 8)
+    # positions compared against the table must not move between the reply and the comparison
+    ok &= report("servos park before the status checks", park(bus, chain))
+
+    chain.drop_rate = 0.2
+    wrong, consistent = 0, True
+    for _ in range(POLLS):
+        statuses = bus.readStatus(True)
+        for i, (sid, st) in enumerate(zip(IDS, statuses)):
+            consistent &= (st is None) == (bus.last_comm[i] != COMM_SUCCESS)
+            wrong += st is not None and st.abs_position != abs_pos(sid)
+    chain.drop_rate = 0.0
+    servos = bus.port.stats.snapshot()["servos"]
+    misses = sum(servos[s].get("sync_read_miss", 0) for s in IDS)
+    ok &= report("missed SYNC_READ slots fall back to READ", misses > 0 and wrong == 0 and consistent,
+                 f"{misses} misses, {wrong} wrong positions")
+
+    chain.corrupt_rate = 0.2
+    wrong = 0
+    for _ in range(POLLS):
+        for sid, st in zip(IDS, bus.readStatus(True)):
+            wrong += st is not None and st.abs_position != abs_pos(sid)
+    chain.corrupt_rate = 0.0
+    ok &= report("corrupt replies are never decoded as data", wrong == 0, f"{wrong} wrong positions")
+
+    bus.port.stats.reset()
+    chain.servos[IDS[1]].error = ERRBIT_OVERLOAD
+    for _ in range(20):
+        statuses = bus.readStatus(True)
+    chain.servos[IDS[1]].error = 0
+    counts = bus.port.stats.snapshot()["servos"][IDS[1]]
+    ok &= report("a servo with an alarm bit keeps its SYNC_READ data",
+                 statuses[1] is not None and counts.get("sync_read_miss", 0) == 0 and bus.last_error[1] == ERRBIT_OVERLOAD,
+                 f"{counts}, last_error {bus.last_error}")
+
+    reply = chain._reply
+    chain._reply = lambda servo, params, sts_id=None: reply(servo, params[:4], sts_id)
+    try:
+        statuses = bus.readStatus(True)
+    finally:
+        chain._reply = reply
+    ok &= report("short replies read as missing, not as an exception",
+                 statuses == [None] * len(IDS) and bus.last_comm == [COMM_RX_CORRUPT] * len(IDS), f"{bus.last_comm}")
+    return ok
+
+
+def main():
+    ok = check_codec()
+    chain = ServoChain([SimulatedServo(sid) for sid in IDS], seed=1)
+    with PtyServoBridge(chain) as bridge:
+        bus = ServoBus(bridge.port_name, 1_000_000, IDS, "select")
+        bus.port.setLatencyTimer(5)
+        try:
+            ok &= check_round_trips(bus, chain)
+            ok &= check_status_path(bus, chain)
+        finally:
+            bus.close()
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
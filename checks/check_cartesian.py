@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+"""Cartesian commands solve from the current pose and leave a velocity-mode gripper alone.
+
+Moves the arm away from zero, then sends a cartesian command for the pose it
+already holds: the IK must converge onto the joint angles the arm is at (not
+another branch reached from a zero seed, even with that branch already
+solved for the same pose and cached), and the arm must not move. A
+``gripper`` value for a gripper group that is not in position mode must not
+be sent as a joint angle:
+
+    python checks/check_cartesian.py
+"""
+
+import sys
+import time
+
+import numpy as np
+
+from emulated_driver import emulated_driver, report, settled, wait_until
+from kinematics import matrix_to_quat
+
+TOLERANCE_RAD = 0.02
+
+
+def main():
+    ok = True
+    with emulated_driver() as (driver, chain):
+        solver, group = driver._ik_for(None)
+        # far from zero: a solver started at zero lands on another branch, 3.5 rad away on joint 1
+        pose = np.array([-2.5, 0.8, 1.5, 1.0, -2.0, -1.0])
+        driver.pass_joint_group_position_array("arm", pose)
+        ok &= report("arm reaches the start pose", wait_until(settled(driver, group.slots, pose), timeout=15.0))
+        wait_until(lambda: all(abs(s.position - s.goal) < 0.5 for s in chain.servos.values()))
+        time.sleep(0.05)
+        pose = driver.command_positions()[group.slots]
+
+        T = solver.chain.fk(driver.command_positions()[group.slots])
+        # the zero-seeded branch for this pose goes into the solver's cache first
+        solver.solve(T[:3, 3], matrix_to_quat(T[:3, :3]), seed=np.zeros(len(pose)))
+        goals = {sid: chain.servos[sid].goal for sid in chain.servos}
+        driver.pass_cartesian_control_cmd("position", T[:3, 3], matrix_to_quat(T[:3, :3]), gripper=0.02)
+        time.sleep(0.2)
+        angles = driver.command_positions()[group.slots]
+        ok &= report("IK from the current pose keeps the arm where it is",
+                     np.abs(angles - pose).max() < TOLERANCE_RAD, f"max joint change {np.abs(angles - pose).max():.4f} rad")
+        gripper = driver.index.group("gripper")
+        moved = [sid for sid in gripper.motor_ids if chain.servos[sid].goal != goals[sid]]
+        ok &= report(f"gripper group in {gripper.control_mode} mode is not sent a position",
+                     gripper.control_mode == "position" or not moved, f"goals changed for {moved}")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
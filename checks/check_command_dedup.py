@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+"""Goal dedup keeps a held pose off the bus, with the synchronized motion profile on.
+
+The profile derives each servo's speed/acc from the distance still to go, so
+they change with every reading; the dedup must look at the goal alone. Sends
+the same pose, and the pose with +/-1 tick of jitter under a 2 tick deadband,
+many times and counts what reached the wire; then checks a real move still
+goes out and that a group move arrives together, with the poller on and
+off. With the fixed profile the
+speed/acc are part of the command, so a change of speed alone must go out:
+
+    python checks/check_command_dedup.py
+"""
+
+import sys
+import time
+
+import numpy as np
+
+from emulated_driver import emulated_driver, report, settled, wait_until
+from servopkg.bytes import STS_GOAL_SPEED_L
+
+REPEATS = 200
+
+
+def commands(driver):
+    return driver.bus_health()[driver.buses[0].port_name]["commands"]
+
+
+def check_arrivals(driver, chain, group, target, name="group move arrives together"):
+    servos = [chain.servos[s] for s in group.motor_ids]
+    wait_until(lambda: all(servo.update() or abs(servo.position - servo.goal) < 0.5 for servo in servos))
+    old = [servo.goal for servo in servos]
+    start = time.monotonic()
+    driver.pass_joint_group_position_array("arm", target)
+    arrived = [None] * len(servos)
+    while None in arrived and time.monotonic() - start < 15.0:
+        for i, servo in enumerate(servos):
+            servo.update()
+            if arrived[i] is None and servo.goal != old[i] and abs(servo.position - servo.goal) < 0.5:
+                arrived[i] = time.monotonic() - start
+        time.sleep(0.002)
+    spread = max(arrived) - min(arrived) if None not in arrived else float("inf")
+    # the emulator moves at constant speed (no ramps), so allow for the acc part of the profile
+    return report(name, spread < 0.1 * max(arrived), f"arrivals {np.round(arrived, 2).tolist()} s")
+
+
+def main():
+    ok = True
+    with emulated_driver(command_deadband_ticks=2, motion_profile="synchronized") as (driver, chain):
+        group = driver.index.group("arm")
+        pose = np.array([-0.4, 0.3, 0.2, 0.5, -0.5, 0.2])
+        driver.pass_joint_group_position_array("arm", pose)
+        ok &= report("arm reaches the pose", wait_until(settled(driver, group.slots, pose), timeout=10.0))
+
+        before = commands(driver)
+        tick = 1.0 / driver.calib.ticks_per_rad[group.slots]
+        rng = np.random.default_rng(0)
+        for i in range(REPEATS):
+            jitter = 0.0 if i % 2 else rng.integers(-1, 2, len(pose)) * np.abs(tick)
+            driver.pass_joint_group_position_array("arm", pose + jitter)
+            time.sleep(0.002)
+        time.sleep(0.05)
+        after = commands(driver)
+        sent = after["sent"] - before["sent"]
+        requested = after["requested"] - before["requested"]
+        ok &= report("held pose stays off the bus", sent == 0, f"{sent} of {requested} goals sent")
+
+        sid = group.motor_ids[3]
+        goal = chain.servos[sid].goal
+        driver.pass_joint_group_position_array("arm", pose + np.array([0, 0, 0, 0.05, 0, 0]))
+        ok &= report("a real move still goes out", wait_until(lambda: chain.servos[sid].goal != goal, timeout=1.0))
+
+        ok &= check_arrivals(driver, chain, group, pose + np.array([0.3, -0.2, 0.1, 0.4, -0.3, 0.2]))
+
+    # with the poller off the profile must not start from whatever the snapshot held last
+    # (moves under half a turn: without polls in between, the unwrap cannot count turns)
+    with emulated_driver(poll_hz=0, motion_profile="synchronized") as (driver, chain):
+        group = driver.index.group("arm")
+        pose = np.array([-0.2, 0.3, 0.2, 0.5, -0.5, 0.2])
+        servos = [chain.servos[s] for s in group.motor_ids]
+        home = [servo.goal for servo in servos]
+        driver.pass_joint_group_position_array("arm", pose)
+        # nothing polls the servos, so move the emulator along while waiting
+        wait_until(lambda: all(servo.update() or servo.goal != h and abs(servo.position - servo.goal) < 0.5
+                               for servo, h in zip(servos, home)), 10.0)
+        ok &= check_arrivals(driver, chain, group, pose + np.array([0.3, -0.2, 0.1, 0.4, -0.3, 0.2]),
+                             "group move arrives together with poll_hz 0")
+
+    with emulated_driver(command_deadband_ticks=2, motion_profile="fixed") as (driver, chain):
+        group = driver.index.group("arm")
+        pose = np.array([-0.4, 0.3, 0.2, 0.5, -0.5, 0.2])
+        driver.pass_joint_group_position_array("arm", pose)
+        wait_until(settled(driver, group.slots, pose), timeout=10.0)
+
+        sid = group.motor_ids[0]
+        shard = driver._shard_of[sid]
+        before = commands(driver)
+        goal, speed, acc = shard.commands.last(sid)
+        shard.submit({sid: (goal, speed + 50, acc)})
+        servo = chain.servos[sid]
+        ok &= report("a speed-only change goes out",
+                     wait_until(lambda: servo._word(STS_GOAL_SPEED_L) == speed + 50, timeout=1.0))
+        shard.submit({sid: (goal, speed + 50, acc)})
+        time.sleep(0.05)
+        sent = commands(driver)["sent"] - before["sent"]
+        ok &= report("the same command again stays off the bus", sent == 1, f"{sent} sent")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,52 @@
+#!/usr/bin/env python
+"""Commissioning ID changes, against the emulator.
+
+Needs only servopkg (no ark): a swap, a three-servo cycle and a chain of
+moves onto IDs freed by earlier ones must each end with every servo
+answering on its new ID (each servo is told apart by its position), and an
+assignment onto an ID that stays on the bus must be refused:
+
+    python checks/check_commissioning.py
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "arkbot"))
+
+from servopkg.emulator import ServoChain, SimulatedServo, PtyServoBridge
+
+from commissioning import configure_bus, id_moves, scan_bus
+from emulated_driver import report
+
+IDS = [1, 2, 3, 5, 7, 200]
+
+
+def check_assign(name, assign):
+    chain = ServoChain([SimulatedServo(sid, position=1000 + sid) for sid in IDS])
+    with PtyServoBridge(chain) as bridge:
+        results = configure_bus(bridge.port_name, 1_000_000, {sid: {"id": assign.get(sid, sid)} for sid in IDS})
+        scan = scan_bus(bridge.port_name, 1_000_000, ids=range(0, 254))
+    expected = {assign.get(sid, sid): 1000 + sid for sid in IDS}
+    found = {s.sts_id: s.abs_position for s in scan.servos}
+    errors = {sid: err for sid, err in results.items() if err}
+    return report(name, found == expected and not errors, f"found {found}, errors {errors}")
+
+
+def main():
+    ok = True
+    ok &= check_assign("swap", {1: 2, 2: 1})
+    ok &= check_assign("three-servo cycle", {1: 2, 2: 3, 3: 1})
+    ok &= check_assign("chain onto freed ids", {5: 6, 7: 5, 200: 7})
+    ok &= check_assign("swap plus a move", {1: 2, 2: 1, 3: 4})
+    try:
+        id_moves({3: 7}, IDS)
+        refused = False
+    except ValueError:
+        refused = True
+    ok &= report("assigning an id that stays on the bus is refused", refused)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,52 @@
+#!/usr/bin/env python
+"""A new trajectory must start where the joints are, on every joint orientation.
+
+Holds the arm at a pose, then streams a trajectory to that same pose and
+watches the goals the bus threads send: none may leave the held goal by more
+than a few ticks (an orientation -1 joint starting from its mirrored angle
+jumps by 2*|q|, thousands of ticks on the 9:1 joints):
+
+    python checks/check_trajectory_start.py
+"""
+
+import sys
+import time
+
+import numpy as np
+
+from emulated_driver import emulated_driver, report, settled, wait_until
+
+TOLERANCE_TICKS = 3
+
+
+def main():
+    ok = True
+    with emulated_driver() as (driver, chain):
+        group = driver.index.group("arm")
+        hold = np.full(len(group.joints), 0.3)
+        driver.pass_joint_group_position_array("arm", hold)
+        ok &= report("arm reaches the hold pose", wait_until(settled(driver, group.slots, hold), timeout=10.0))
+
+        servos = [chain.servos[sid] for sid in group.motor_ids]
+        wait_until(lambda: all(abs(servo.position - servo.goal) < 0.5 for servo in servos))
+        time.sleep(0.05)  # let the poller see the final position
+        held = np.array([servo.goal for servo in servos])
+        driver.push_trajectory("arm", [1.0], [hold])
+        worst = np.zeros(len(servos))
+        end = time.monotonic() + 1.2
+        while time.monotonic() < end:
+            worst = np.maximum(worst, np.abs(np.array([servo.goal for servo in servos]) - held))
+            time.sleep(0.002)
+        for sid, w in zip(group.motor_ids, worst.tolist()):
+            orientation = driver.motor_orientations.get(sid, 1)
+            ok &= report(f"sid {sid} (orientation {orientation:+d}) holds during the trajectory",
+                         w <= TOLERANCE_TICKS, f"max goal excursion {w:.0f} ticks")
+
+        moved = hold + np.linspace(-0.2, 0.2, len(hold))
+        driver.push_trajectory("arm", [0.5], [moved])
+        ok &= report("trajectory reaches its last waypoint", wait_until(settled(driver, group.slots, moved), timeout=10.0))
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
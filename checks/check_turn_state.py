@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+"""A restart keeps the multi-turn count of the geared joints, and refuses it after a large move.
+
+Turns a 9:1 joint through several motor turns, shuts the driver down and
+starts a new one on the same emulated servos and turn-state file: the joint
+must read the same angle. Then moves one servo by more than max_drift_ticks
+while the driver is down: that joint must fall back to home_loops:
+
+    python checks/check_turn_state.py
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from emulated_driver import emulated_driver, report, settled, wait_until
+
+TOLERANCE_RAD = 1e-3
+
+
+def main():
+    ok = True
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "turns.json")
+        with emulated_driver(turn_path=path) as (driver, chain):
+            group = driver.index.group("arm")
+            pose = np.array([-0.5, -1.5, -1.2, 0.4, 0.3, 0.2])  # 9:1 joints 2 and 3 go through ~2 motor turns
+            driver.pass_joint_group_position_array("arm", pose)
+            ok &= report("arm reaches the pose", wait_until(settled(driver, group.slots, pose), timeout=15.0))
+            wait_until(lambda: all(abs(s.position - s.goal) < 0.5 for s in chain.servos.values()))
+            time.sleep(0.05)
+            before = driver.command_positions()
+            loops_before = driver.calib.loops.copy()
+        ok &= report("turn state written on shutdown", os.path.exists(path))
+
+        with emulated_driver(chain=chain, turn_path=path) as (driver, chain):
+            after = driver.command_positions()
+            err = np.abs(after - before).max()
+            ok &= report("restart reads the same angles", err < TOLERANCE_RAD, f"max error {err:.5f} rad")
+            ok &= report("restart keeps the loop counts", np.array_equal(driver.calib.loops, loops_before),
+                         f"{loops_before.tolist()} -> {driver.calib.loops.tolist()}")
+            max_drift = int(driver.config["real_config"]["turn_state"].get("max_drift_ticks", 1024))
+            sid = driver.motor_ids[1]
+            slot = 1
+
+        servo = chain.servos[sid]
+        servo.position = servo.goal = servo.position + 2 * max_drift  # moved by hand while the driver was off
+        servo.update()
+        with emulated_driver(chain=chain, turn_path=path) as (driver, chain):
+            home = driver.home_loops.get(sid, 0)
+            ok &= report(f"sid {sid} moved {2 * max_drift} ticks while off falls back to home_loops",
+                         driver.calib.loops[slot] == home,
+                         f"loops {driver.calib.loops[slot]} (home_loops {home})")
+            others = [i for i in range(len(driver.motor_ids)) if i != slot]
+            ok &= report("the other joints still restore", np.array_equal(driver.calib.loops[others], loops_before[others]))
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,71 @@
+"""ArkBotDriver on emulated servos behind a pty, for the check scripts.
+
+Every servo in arkbot.yaml's real_config starts at its home pose (home_loops
+* ticks_per_turn + home_ticks), so the driver comes up at zero joint angles.
+Turn counts go to a throwaway file instead of the user's cache.
+"""
+
+import contextlib
+import os
+import sys
+import tempfile
+import time
+
+ARKBOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "arkbot")
+sys.path.insert(0, ARKBOT)
+
+import numpy as np
+import yaml
+
+from servopkg.emulator import ServoChain, SimulatedServo, PtyServoBridge
+
+
+def robot_config():
+    with open(os.path.join(ARKBOT, "arkbot.yaml")) as f:
+        return yaml.safe_load(f)["robots"][0]["config"]
+
+
+def home_chain(rc):
+    tpt = int(rc.get("ticks_per_turn", 4096))
+    loops, ticks = rc.get("home_loops", {}), rc.get("home_ticks", {})
+    return ServoChain([SimulatedServo(sid, position=loops.get(str(sid), 0) * tpt + ticks.get(str(sid), 2048))
+                       for sid in rc["motor_ids"]])
+
+
+@contextlib.contextmanager
+def emulated_driver(chain=None, turn_path=None, **real_config):
+    """Yield (driver, chain) with ``real_config`` overriding arkbot.yaml's real_config. Pass the
+    ``chain`` and ``turn_path`` of an earlier run to restart the driver on the same servos."""
+    from ark_bot_driver import ArkBotDriver
+
+    cfg = robot_config()
+    rc = cfg["real_config"]
+    rc.pop("record", None)
+    chain = home_chain(rc) if chain is None else chain
+    with tempfile.TemporaryDirectory() as tmp, PtyServoBridge(chain, rc["baudrate"]) as bridge:
+        rc.update(port=bridge.port_name, rx_mode="select", poll_hz=250,
+                  turn_state={"path": turn_path or os.path.join(tmp, "turns.json"), "interval": 0.5})
+        rc.update(real_config)
+        driver = ArkBotDriver("arkbot", cfg)
+        try:
+            yield driver, chain
+        finally:
+            driver.shutdown_driver()
+
+
+def wait_until(predicate, timeout=5.0, interval=0.005):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(interval)
+    return False
+
+
+def settled(driver, slots, target, tol=0.01):
+    return lambda: np.abs(driver.command_positions()[slots] - target).max() < tol
+
+
+def report(name, ok, detail=""):
+    print(f"{'ok  ' if ok else 'FAIL'} {name}" + (f": {detail}" if detail else ""))
+    return ok
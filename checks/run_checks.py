@@ -0,0 +1,34 @@
+#!/usr/bin/env python
+"""Run every check_*.py in this directory against the emulator; exit non-zero if any fails.
+
+The driver checks need the ark packages importable (as arkbot.py does);
+check_bus.py needs only servopkg:
+
+    python checks/run_checks.py [check_bus check_turn_state ...]
+"""
+
+import glob
+import os
+import subprocess
+import sys
+import time
+
+
+def main():
+    here = os.path.dirname(os.path.abspath(__file__))
+    names = sys.argv[1:] or sorted(os.path.basename(p)[:-3] for p in glob.glob(os.path.join(here, "check_*.py")))
+    failed = []
+    for name in names:
+        print(f"== {name}")
+        start = time.monotonic()
+        code = subprocess.call([sys.executable, os.path.join(here, name + ".py")], cwd=here)
+        print(f"== {name}: {'ok' if code == 0 else 'FAILED'} ({time.monotonic() - start:.1f} s)")
+        if code:
+            failed.append(name)
+    if failed:
+        print(f"failed: {', '.join(failed)}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())